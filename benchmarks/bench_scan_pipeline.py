@@ -0,0 +1,210 @@
+"""扫描流水线基准：用进程内合成数据库（注入往返延迟）驱动 main.run_scan，不需要真实数据库服务器
+
+每个目录形态在独立子进程中运行（峰值 RSS 互不干扰），输出：
+  - 扫描流水线：表/秒、每表往返次数、峰值 RSS、导出耗时（流式写出 + 合并 JSON）
+  - is_sensitive_column：字段/秒
+  - ResultExporter.export：整体导出耗时
+结果追加到历史文件，并与相同形态、相同参数的上一次记录对比，超出容差的指标标记为回退。
+
+用法：python benchmarks/bench_scan_pipeline.py [--shape baseline] [--latency-ms 1] [--workers 8]
+                                               [--history benchmarks/bench_history.jsonl] [--fail-on-regression]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from synthetic_db import SHAPES, RoundTripCounter, SyntheticDatabase, table_columns
+
+# 指标方向：越大越好 / 越小越好（其余指标只记录不比较）
+HIGHER_IS_BETTER = ["tables_per_sec", "columns_per_sec"]
+LOWER_IS_BETTER = ["round_trips_per_table", "peak_rss_mb", "export_seconds", "result_exporter_seconds"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程峰值 RSS（MB）；不支持 resource 模块的平台（Windows）返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_child(args: argparse.Namespace) -> Dict:
+    """在当前进程中执行单个形态的基准（由父进程以 --child 启动）"""
+    import main
+    from common.logger import logger
+    from common.exporter import ResultExporter, StreamingExporter, read_jsonl_lines
+
+    logger.setLevel(logging.WARNING)
+    shape = SHAPES[args.shape[0]]
+    latency = args.latency_ms / 1000
+    counter = RoundTripCounter()
+    export_seconds = [0.0]
+
+    class TimedExporter(StreamingExporter):
+        """统计流式写出与合并 JSON 的耗时"""
+
+        def write(self, item: Dict) -> None:
+            started = time.perf_counter()
+            super().write(item)
+            export_seconds[0] += time.perf_counter() - started
+
+        def close(self) -> None:
+            started = time.perf_counter()
+            super().close()
+            export_seconds[0] += time.perf_counter() - started
+
+    def create_db_instance(config: Dict) -> SyntheticDatabase:
+        return SyntheticDatabase(shape, latency, counter, extract_rows=config["extract_rows"],
+                                 catalog_mode=config["catalog_mode"], fetch_batch=config["fetch_batch"],
+                                 projection=config["projection"], lob_limit=config["lob_limit"])
+
+    # 以合成数据库替换真实适配器，其余流程（参数解析、引擎、检查点、导出）与 main.main 完全一致
+    main.create_db_instance = create_db_instance
+    main.StreamingExporter = TimedExporter
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        sys.argv = ["main.py", "-o", output_dir, "-w", str(args.workers), "-c", args.catalog_mode,
+                    "-e", args.export_type, "-r", str(args.extract_rows), *args.main_args]
+        config = main.load_config(main.parse_args())
+        started = time.perf_counter()
+        summary = main.run_scan(config)
+        scan_seconds = time.perf_counter() - started
+        rss = peak_rss_mb()
+
+        tables = shape.databases * shape.tables_per_db
+        metrics = {
+            "tables": tables,
+            "sensitive_tables": summary["sensitive_tables"],
+            "scan_seconds": round(scan_seconds, 3),
+            "tables_per_sec": round(tables / scan_seconds, 1),
+            "round_trips_per_table": round(counter.count / tables, 3),
+            "peak_rss_mb": rss,
+            "export_seconds": round(export_seconds[0], 3),
+        }
+
+        # is_sensitive_column：遍历全部合成字段
+        instance = create_db_instance(config)
+        columns = [column for db_idx in range(shape.databases) for table_idx in range(shape.tables_per_db)
+                   for column in table_columns(shape, f"bench_db_{db_idx:03d}", f"t_{table_idx:05d}")]
+        started = time.perf_counter()
+        for name, _, _, comment in columns:
+            instance.is_sensitive_column(name, comment)
+        metrics["columns_per_sec"] = round(len(columns) / (time.perf_counter() - started), 1)
+
+        # ResultExporter：以本次扫描的全部结果整体导出
+        if summary["jsonl_path"]:
+            data = [json.loads(line) for line in read_jsonl_lines(summary["jsonl_path"])]
+            started = time.perf_counter()
+            ResultExporter(os.path.join(output_dir, "result_exporter")).export(data, args.export_type)
+            metrics["result_exporter_seconds"] = round(time.perf_counter() - started, 3)
+    return metrics
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_history(path: str) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(previous: Dict, current: Dict, tolerance: float) -> List[str]:
+    """与上一次记录对比，返回超出容差的指标说明"""
+    regressions = []
+    for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+        old, new = previous.get(key), current.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (key in HIGHER_IS_BETTER and change < -tolerance) or (key in LOWER_IS_BETTER and change > tolerance):
+            regressions.append(f"{key}: {old} → {new}（{change:+.1%}）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描流水线基准（合成数据库）")
+    parser.add_argument("--shape", action="append", choices=sorted(SHAPES),
+                        help="目录形态，可重复指定（默认：全部）")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="每次往返注入的延迟（毫秒，默认：1）")
+    parser.add_argument("--workers", type=int, default=8, help="并发扫描线程数（默认：8）")
+    parser.add_argument("--catalog-mode", choices=["table", "schema", "instance"], default="table",
+                        help="字段目录加载方式（默认：table）")
+    parser.add_argument("--extract-rows", type=int, default=5, help="每表提取行数（默认：5）")
+    parser.add_argument("--export-type", choices=["csv", "json", "all", "parquet", "arrow"], default="all",
+                        help="导出格式（默认：all）")
+    parser.add_argument("--history", default=os.path.join(BENCH_DIR, "bench_history.jsonl"),
+                        help="历史结果文件（默认：benchmarks/bench_history.jsonl）")
+    parser.add_argument("--no-history", action="store_true", help="不写入历史结果")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="回退判定容差（默认：0.1，即 10%%）")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在回退时以非零状态码退出")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    # 其余参数原样传给 main.py（如 --projection --lob-limit 4096 --plan）
+    args, args.main_args = parser.parse_known_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    history = load_history(args.history)
+    revision = git_revision()
+    regressed = False
+    for shape in args.shape or sorted(SHAPES):
+        child_args = [sys.executable, os.path.abspath(__file__), "--child", "--shape", shape,
+                      "--latency-ms", str(args.latency_ms), "--workers", str(args.workers),
+                      "--catalog-mode", args.catalog_mode, "--extract-rows", str(args.extract_rows),
+                      "--export-type", args.export_type, *args.main_args]
+        completed = subprocess.run(child_args, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"[{shape}] 运行失败：\n{completed.stderr}")
+            regressed = True
+            continue
+        metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+        params = {"shape": shape, "latency_ms": args.latency_ms, "workers": args.workers,
+                  "catalog_mode": args.catalog_mode, "extract_rows": args.extract_rows,
+                  "export_type": args.export_type, "main_args": args.main_args}
+
+        print(f"\n[{shape}] {metrics['tables']:,} 个表（含敏感字段 {metrics['sensitive_tables']:,} 个），"
+              f"延迟 {args.latency_ms} 毫秒，并发 {args.workers}")
+        for key, value in metrics.items():
+            print(f"  {key:<26} {value}")
+
+        previous = next((entry for entry in reversed(history) if entry["params"] == params), None)
+        if previous:
+            regressions = find_regressions(previous["metrics"], metrics, args.tolerance)
+            for line in regressions:
+                print(f"  ！回退 {line}（对比 {previous['revision'] or '未知版本'} @ {previous['timestamp']}）")
+            regressed = regressed or bool(regressions)
+
+        entry = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "revision": revision,
+                 "params": params, "metrics": metrics}
+        history.append(entry)
+        if not args.no_history:
+            with open(args.history, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""进程内合成数据库适配器：按目录形态生成库/表/字段与行数据，不依赖真实数据库服务器
+
+每次「查询」注入可配置的往返延迟并计入往返次数，用于在本地复现扫描吞吐与往返开销。
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import threading
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.base_db import BaseDatabase
+
+# 敏感字段名（命中 SENSITIVE_FIELD_KEYWORDS）及其合成取值
+SENSITIVE_COLUMNS = [
+    ("phone", "varchar(20)", "手机号"),
+    ("email", "varchar(128)", "邮箱"),
+    ("id_card", "varchar(18)", "身份证号"),
+    ("username", "varchar(64)", "用户名"),
+    ("address", "varchar(255)", "收货地址"),
+    ("bank_card", "varchar(32)", "银行卡"),
+]
+# 普通字段名（不命中任何敏感关键词）
+PLAIN_COLUMNS = [
+    ("status", "tinyint", "状态"),
+    ("amount", "decimal(12,2)", "金额"),
+    ("created_at", "datetime", "创建时间"),
+    ("updated_at", "datetime", ""),
+    ("order_no", "varchar(32)", "订单号"),
+    ("price", "decimal(10,2)", ""),
+    ("quantity", "int", "数量"),
+    ("remark", "varchar(255)", "备注"),
+    ("version", "int", ""),
+    ("flag", "tinyint", ""),
+]
+# 宽字段/LOB 字段
+LOB_COLUMNS = [
+    ("content", "longtext", "正文"),
+    ("payload", "mediumtext", ""),
+    ("attachment", "longblob", "附件"),
+]
+
+# 原始字段定义：(字段名, 类型, 是否可空, 注释)
+RawColumn = Tuple[str, str, bool, str]
+
+
+class CatalogShape(NamedTuple):
+    """合成目录形态"""
+    databases: int
+    tables_per_db: int
+    columns_per_table: int
+    # 含敏感字段的表占比
+    sensitive_ratio: float = 0.2
+    # 每表行数（决定提取行数上限与统计信息）
+    rows_per_table: int = 1000
+    # 每表 LOB 字段数及单值字节数
+    lob_columns: int = 0
+    lob_bytes: int = 0
+    # 统计为空表的占比
+    empty_ratio: float = 0.05
+
+
+# 预置形态：常规、海量小表、超宽表、LOB 密集表
+SHAPES: Dict[str, CatalogShape] = {
+    "baseline": CatalogShape(databases=5, tables_per_db=200, columns_per_table=20),
+    "many_tables": CatalogShape(databases=10, tables_per_db=1000, columns_per_table=12),
+    "wide": CatalogShape(databases=2, tables_per_db=100, columns_per_table=500, sensitive_ratio=0.5),
+    "lob": CatalogShape(databases=2, tables_per_db=250, columns_per_table=8, sensitive_ratio=0.5,
+                        lob_columns=3, lob_bytes=64 * 1024),
+}
+
+
+class RoundTripCounter:
+    """跨连接共享的往返计数器（并发扫描时各工作线程的实例共用同一个计数器）"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, count: int = 1) -> None:
+        with self._lock:
+            self.count += count
+
+
+def _table_seed(db_name: str, table_name: str) -> int:
+    return zlib.crc32(f"{db_name}.{table_name}".encode("utf-8"))
+
+
+@lru_cache(maxsize=None)
+def table_columns(shape: CatalogShape, db_name: str, table_name: str) -> Tuple[RawColumn, ...]:
+    """生成表的原始字段定义（同一表每次生成结果一致）：首列为整数主键 id"""
+    rng = random.Random(_table_seed(db_name, table_name))
+    columns: List[RawColumn] = [("id", "bigint", False, "主键")]
+    lob_count = min(shape.lob_columns, shape.columns_per_table - 1)
+    for idx in range(lob_count):
+        name, column_type, comment = LOB_COLUMNS[idx % len(LOB_COLUMNS)]
+        columns.append((f"{name}_{idx}", column_type, True, comment))
+    sensitive = rng.random() < shape.sensitive_ratio
+    first = len(columns)
+    for idx in range(first, shape.columns_per_table):
+        # 含敏感字段的表每 7 个字段放置 1 个敏感字段
+        if sensitive and (idx - first) % 7 == 0:
+            name, column_type, comment = SENSITIVE_COLUMNS[rng.randrange(len(SENSITIVE_COLUMNS))]
+        else:
+            name, column_type, comment = PLAIN_COLUMNS[rng.randrange(len(PLAIN_COLUMNS))]
+        columns.append((f"{name}_{idx}", column_type, True, comment))
+    return tuple(columns)
+
+
+def table_row_count(shape: CatalogShape, db_name: str, table_name: str) -> int:
+    return 0 if random.Random(_table_seed(db_name, table_name) + 1).random() < shape.empty_ratio \
+        else shape.rows_per_table
+
+
+def synthetic_value(column: RawColumn, row_idx: int, lob_bytes: int):
+    """按字段类型生成取值"""
+    name, column_type = column[0], column[1]
+    if name == "id":
+        return row_idx + 1
+    if column_type.endswith("blob"):
+        return b"\x89" * lob_bytes
+    if column_type.endswith("text"):
+        return "x" * lob_bytes
+    if name.startswith("phone"):
+        return f"13{row_idx:09d}"
+    if name.startswith("email"):
+        return f"user{row_idx}@example.com"
+    if name.startswith("id_card"):
+        return f"11010519900101{row_idx % 10000:04d}"
+    if column_type.startswith(("int", "tinyint", "bigint")):
+        return row_idx % 100
+    return f"{name}-{row_idx}"
+
+
+class SyntheticDatabase(BaseDatabase):
+    """按 CatalogShape 生成目录与行数据的 BaseDatabase 实现，每次查询休眠 latency 秒模拟网络往返"""
+
+    def __init__(self, shape: CatalogShape, latency: float = 0.0, counter: Optional[RoundTripCounter] = None,
+                 extract_rows: int = 5, catalog_mode: str = "table", fetch_batch: int = 1000, **kwargs):
+        super().__init__("synthetic", 0, "bench", "", 0, extract_rows, catalog_mode=catalog_mode,
+                         fetch_batch=fetch_batch, **kwargs)
+        self.shape = shape
+        self.latency = latency
+        self.counter = counter or RoundTripCounter()
+
+    def _round_trip(self, statement: bool = True) -> None:
+        # 会话层 round_trips 只计语句（与真实适配器一致），共享计数器另含流式读取的逐批往返
+        if statement:
+            self.round_trips += 1
+        self.counter.add()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def connect(self) -> bool:
+        self._round_trip()
+        return True
+
+    def list_databases(self) -> List[str]:
+        self._round_trip()
+        return [f"bench_db_{idx:03d}" for idx in range(self.shape.databases)]
+
+    def list_tables(self, db_name: str) -> List[str]:
+        self._round_trip()
+        return [f"t_{idx:05d}" for idx in range(self.shape.tables_per_db)]
+
+    def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        catalog = self.get_catalog(db_name)
+        if catalog is not None:
+            return catalog.get(table_name, [])
+        self._round_trip()
+        return [self.build_column_info(*column) for column in table_columns(self.shape, db_name, table_name)]
+
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        # 与真实适配器一样逐行追加到共享目录（重复或并发加载会产生重复字段）
+        self._round_trip()
+        for schema in ([db_name] if db_name else [f"bench_db_{idx:03d}" for idx in range(self.shape.databases)]):
+            for table_name in (f"t_{idx:05d}" for idx in range(self.shape.tables_per_db)):
+                for column in table_columns(self.shape, schema, table_name):
+                    self.column_catalog.setdefault(schema, {}).setdefault(table_name, []).append(
+                        self.build_column_info(*column))
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        self._round_trip()
+        stats = {}
+        for idx in range(self.shape.tables_per_db):
+            table_name = f"t_{idx:05d}"
+            rows = table_row_count(self.shape, db_name, table_name)
+            row_bytes = 64 * self.shape.columns_per_table + self.shape.lob_columns * self.shape.lob_bytes
+            stats[table_name] = {"rows": rows, "bytes": rows * row_bytes}
+        return stats
+
+    def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        self._round_trip()
+        return table_row_count(self.shape, db_name, table_name) > 0
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        return ["id"]
+
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        return list(self.iter_top_rows(db_name, table_name, columns))
+
+    def iter_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> Iterator[Dict]:
+        raw_columns = table_columns(self.shape, db_name, table_name)
+        if columns and self.projection:
+            selected = {col["column_name"] for col in columns if col["is_sensitive"]} | {"id"}
+            raw_columns = tuple(column for column in raw_columns if column[0] in selected)
+        lob_bytes = min(self.shape.lob_bytes, self.lob_limit) if self.lob_limit else self.shape.lob_bytes
+        row_count = min(self.extract_rows, table_row_count(self.shape, db_name, table_name))
+        # 执行语句一次往返，之后每批 fetch_batch 行一次往返
+        self._round_trip()
+        for row_idx in range(row_count):
+            if row_idx and row_idx % self.fetch_batch == 0:
+                self._round_trip(statement=False)
+            yield {column[0]: synthetic_value(column, row_idx, lob_bytes) for column in raw_columns}
+
+    def disconnect(self) -> None:
+        pass
@@ -0,0 +1,187 @@
+import time
+import asyncio
+import contextvars
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from db.async_base_db import AsyncBaseDatabase
+from common.logger import logger
+from common.content_classifier import ContentClassifier
+from common.checkpoint import CheckpointJournal
+from common.schema_cache import SchemaCache
+from common.scan_engine import ScanRun, WorkUnit, build_table_result, skip_done_units
+from common.scan_planner import ScanPlanner
+from common.circuit_breaker import TableCircuitBreaker
+
+# 当前表（每个扫描任务各自的上下文）等待信号量的累计时间，不计入单表扫描耗时
+_SEMAPHORE_WAIT: contextvars.ContextVar = contextvars.ContextVar("semaphore_wait", default=None)
+
+class AsyncScanner:
+    """asyncio 扫描器：目标主机的在途查询数受扫描器持有的信号量约束，结果按枚举顺序产出，
+    结果结构、检查点与导出方式与 ScanEngine 保持一致"""
+
+    def __init__(self, db: AsyncBaseDatabase, db_type: str, concurrency: int = 16,
+                 content_classifier: Optional[ContentClassifier] = None,
+                 journal: Optional[CheckpointJournal] = None, max_retries: int = 0,
+                 schema_cache: Optional[SchemaCache] = None, planner: Optional[ScanPlanner] = None,
+                 time_budget: Optional[float] = None, circuit_breaker: Optional[TableCircuitBreaker] = None):
+        self.db = db
+        self.db_type = db_type
+        self.concurrency = max(1, concurrency)
+        self.content_classifier = content_classifier
+        self.journal = journal
+        self.max_retries = max(0, max_retries)
+        self.schema_cache = schema_cache
+        self.planner = planner
+        self.time_budget = time_budget
+        self._deadline: Optional[float] = None
+        self.circuit_breaker = circuit_breaker
+        self.failed_units: Dict[WorkUnit, str] = {}
+        self.budget_skipped: List[WorkUnit] = []
+        self._fingerprints: Dict[str, Dict[str, str]] = {}
+        self._stats: Dict[str, Dict[str, Dict]] = {}
+        self._stats_seconds: List[float] = []
+        self._estimated_empty = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _query(self, coro):
+        """在并发信号量约束下执行单次查询，等待信号量的时间累计到当前表的排队耗时"""
+        waited = _SEMAPHORE_WAIT.get()
+        started = time.monotonic()
+        async with self._semaphore:
+            if waited is not None:
+                waited[0] += time.monotonic() - started
+            return await coro
+
+    async def enumerate_units(self) -> List[WorkUnit]:
+        """枚举所有 (库, 表) 工作单元，各库的表列表并发获取，顺序与目录顺序一致"""
+        databases = await self._query(self.db.list_databases())
+        logger.info(f"\n共发现 {len(databases)} 个非系统数据库")
+        table_lists = await asyncio.gather(*(self._query(self.db.list_tables(db_name)) for db_name in databases))
+        if self.schema_cache:
+            fingerprints = await asyncio.gather(
+                *(self._query(self.db.get_table_fingerprints(db_name)) for db_name in databases)
+            )
+            self._fingerprints = dict(zip(databases, fingerprints))
+        if self.planner:
+            await asyncio.gather(*(self._load_stats(db_name) for db_name in databases))
+
+        units = []
+        for db_name, tables in zip(databases, table_lists):
+            logger.info(f"数据库 {db_name} 包含 {len(tables)} 个表")
+            units.extend((db_name, table_name) for table_name in tables)
+        return units
+
+    async def _load_stats(self, db_name: str) -> None:
+        """获取库内表统计信息并记录查询耗时；失败时按未知统计处理"""
+        started = time.monotonic()
+        try:
+            self._stats[db_name] = await self._query(self.db.get_table_stats(db_name))
+        except Exception as e:
+            logger.warning(f"获取数据库 {db_name} 的表统计信息失败，按未知统计规划：{str(e)}")
+            return
+        self._stats_seconds.append(time.monotonic() - started)
+
+    def _budget_exhausted(self) -> bool:
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    async def _load_columns(self, unit: WorkUnit) -> List[Dict]:
+        db_name, table_name = unit
+        if not self.schema_cache:
+            return await self._query(self.db.list_columns(db_name, table_name))
+        fingerprint = self._fingerprints.get(db_name, {}).get(table_name)
+        columns = self.schema_cache.get(db_name, table_name, fingerprint)
+        if columns is None:
+            columns = await self._query(self.db.list_columns(db_name, table_name))
+            self.schema_cache.put(db_name, table_name, fingerprint, columns)
+        return columns
+
+    async def _timed_scan(self, unit: WorkUnit) -> Optional[Dict]:
+        """扫描单个表并把耗时与结果交给熔断器；耗时不含在信号量上排在其他表之后的等待时间
+        （与同步引擎在 throttle.slot() 内计时一致），避免窗口内排队的正常表被记为慢表"""
+        waited = [0.0]
+        # 每个单元在独立任务中运行，设置只影响本任务的上下文
+        _SEMAPHORE_WAIT.set(waited)
+        started = time.monotonic()
+        try:
+            result = await self._scan_unit(unit)
+        except Exception as e:
+            if self.circuit_breaker:
+                self.circuit_breaker.record(unit, time.monotonic() - started - waited[0], str(e))
+            raise
+        if self.circuit_breaker:
+            self.circuit_breaker.record(unit, time.monotonic() - started - waited[0])
+        return result
+
+    async def _scan_unit(self, unit: WorkUnit) -> Optional[Dict]:
+        db_name, table_name = unit
+        columns = await self._load_columns(unit)
+        sensitive_count = sum(1 for col in columns if col["is_sensitive"])
+        if not sensitive_count:
+            logger.info(f"  表 {db_name}.{table_name}：无敏感字段，跳过")
+            return None
+
+        if unit in self._estimated_empty and await self._query(self.db.table_has_rows(db_name, table_name)) is False:
+            logger.info(f"  表 {db_name}.{table_name}：发现 {sensitive_count} 个敏感字段，探测确认为空表，不提取数据")
+            rows = []
+        else:
+            logger.info(f"  表 {db_name}.{table_name}：发现 {sensitive_count} 个敏感字段 → 提取前 {self.db.extract_rows} 行数据")
+            rows = await self._query(self.db.fetch_top_rows(db_name, table_name, columns))
+        if self.content_classifier:
+            # 内容识别为 CPU 计算，放到线程中执行以免阻塞事件循环
+            return await asyncio.to_thread(build_table_result, self.db_type, db_name, table_name, columns, rows,
+                                           self.content_classifier)
+        return build_table_result(self.db_type, db_name, table_name, columns, rows)
+
+    async def run(self, on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """执行扫描，语义与 ScanEngine.run 相同"""
+        # 信号量随扫描器创建于当前事件循环，扫描结束即释放
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        units = skip_done_units(await self.enumerate_units(), self.journal)
+        if self.planner:
+            # 异步后端不预先加载字段目录，敏感字段数按未知估算
+            round_trip = sum(self._stats_seconds) / len(self._stats_seconds) if self._stats_seconds else None
+            planned, empty = self.planner.plan(units, self._stats, round_trip=round_trip)
+            ScanPlanner.log_plan(planned, empty, self.concurrency)
+            self._estimated_empty = {item.unit for item in empty}
+            units = [item.unit for item in planned + empty]
+        logger.info(f"共 {len(units)} 个待扫描表，异步并发数：{self.concurrency}")
+
+        scan_run = ScanRun(units, on_result, self.journal, self.max_retries, self.circuit_breaker,
+                           self._budget_exhausted)
+        self.failed_units = scan_run.failed_units
+        for pass_units in scan_run.passes():
+            await self._run_pass(pass_units, scan_run.complete)
+        collected = scan_run.finish()
+        self.budget_skipped = scan_run.budget_skipped
+        return collected
+
+    async def _run_pass(self, units: List[WorkUnit], complete: Callable) -> None:
+        """滑动窗口调度：窗口内的任务并发执行，按顺序等待队首任务完成后输出，内存以窗口大小为上限"""
+        window: Deque[Tuple[WorkUnit, asyncio.Task]] = deque()
+        unit_iter = iter(units)
+        window_size = self.concurrency * 4
+
+        def fill() -> None:
+            while len(window) < window_size:
+                if self._budget_exhausted():
+                    return
+                unit = next(unit_iter, None)
+                if unit is None:
+                    return
+                window.append((unit, asyncio.ensure_future(self._timed_scan(unit))))
+
+        fill()
+        try:
+            while window:
+                unit, task = window.popleft()
+                try:
+                    result = await task
+                except Exception as e:
+                    complete(unit, None, str(e))
+                else:
+                    complete(unit, result, None)
+                fill()
+        finally:
+            for _, task in window:
+                task.cancel()
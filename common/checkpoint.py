@@ -0,0 +1,84 @@
+import os
+import re
+import json
+from typing import Dict, Optional, Set, Tuple
+from common.logger import logger
+
+# 工作单元：(数据库名, 表名)
+UnitKey = Tuple[str, str]
+
+
+class CheckpointJournal:
+    """扫描检查点日志（JSON Lines）：记录已完成 / 失败的 (库, 表) 工作单元，支持中断后续扫
+
+    首行记录本次任务的导出时间戳，续扫时沿用以追加到同一组结果文件
+    """
+
+    def __init__(self, output_dir: str, db_type: str, host: str, port: int):
+        os.makedirs(output_dir, exist_ok=True)
+        target = re.sub(r"[^\w.-]", "_", f"{db_type}_{host}_{port}")
+        self.path = os.path.join(output_dir, f"checkpoint_{target}.jsonl")
+        self.run_timestamp: Optional[str] = None
+        self.done_units: Set[UnitKey] = set()
+        self.failed_units: Dict[UnitKey, Dict] = {}
+        self._file = None
+
+    def load(self) -> bool:
+        """读取已有检查点，返回是否存在可续扫的记录"""
+        if not os.path.exists(self.path):
+            logger.warning(f"未找到检查点文件 {self.path}，将重新开始扫描")
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时可能留下不完整的最后一行
+                    continue
+                if record.get("type") == "run":
+                    self.run_timestamp = record["timestamp"]
+                    continue
+                unit = (record["db"], record["table"])
+                if record["status"] == "done":
+                    self.done_units.add(unit)
+                    self.failed_units.pop(unit, None)
+                else:
+                    self.failed_units[unit] = record
+
+        if not self.run_timestamp:
+            return False
+        logger.info(f"已加载检查点：{self.path}，已完成 {len(self.done_units)} 个表，失败待重试 {len(self.failed_units)} 个表")
+        return True
+
+    def start(self, timestamp: str, append: bool = False) -> None:
+        """打开检查点文件；新任务时写入时间戳头记录"""
+        self.run_timestamp = timestamp
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+        if not append:
+            self._write({"type": "run", "timestamp": timestamp})
+
+    def _write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def is_done(self, unit: UnitKey) -> bool:
+        return unit in self.done_units
+
+    def record_done(self, unit: UnitKey, sensitive: bool) -> None:
+        """记录单元已完成（须在该单元结果写入导出文件之后调用）"""
+        self.done_units.add(unit)
+        self.failed_units.pop(unit, None)
+        self._write({"type": "unit", "db": unit[0], "table": unit[1], "status": "done", "sensitive": sensitive})
+
+    def record_failed(self, unit: UnitKey, error: str, attempts: int) -> None:
+        """记录单元失败原因与累计尝试次数"""
+        record = {"type": "unit", "db": unit[0], "table": unit[1], "status": "failed",
+                  "error": error, "attempts": attempts}
+        self.failed_units[unit] = record
+        self._write(record)
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,78 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+from common.logger import logger
+
+# 工作单元：(数据库名, 表名)
+UnitKey = Tuple[str, str]
+
+# 各驱动的语句超时 / 锁等待超时错误特征
+TIMEOUT_ERROR_PATTERN = re.compile("|".join([
+    r"\((?:3024|1205|1969),",   # MySQL 执行超时 / 锁等待超时，MariaDB max_statement_time（PyMySQL 错误码）
+    r"timed out",               # PyMySQL 读超时
+    r"DPY-4024|DPI-1067",       # python-oracledb：call timeout exceeded
+    r"ORA-01013",               # Oracle：user requested cancel of current operation
+    r"HYT00",                   # ODBC：Query timeout expired
+    r"\(1222\)",                # SQL Server：Lock request time out period exceeded
+]))
+
+
+def is_timeout_error(error: str) -> bool:
+    """判断错误是否由语句超时或锁等待超时引起"""
+    return bool(TIMEOUT_ERROR_PATTERN.search(error))
+
+
+class TableCircuitBreaker:
+    """单表熔断器：超时的表立即熔断（不再重试，避免同一张慢表反复占满超时时间），
+    耗时超过阈值的表记为慢表；两类表单独汇总报告"""
+
+    def __init__(self, slow_threshold: float = 60.0):
+        self.slow_threshold = slow_threshold
+        # 熔断的表：{单元: {"reason", "error", "elapsed"}}
+        self.tripped: Dict[UnitKey, Dict] = {}
+        # 成功完成但耗时超过阈值的表：{单元: 耗时}
+        self.slow: Dict[UnitKey, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, unit: UnitKey, elapsed: float, error: Optional[str] = None) -> None:
+        """记录单表扫描耗时与结果（并发扫描时由各工作线程调用）"""
+        with self._lock:
+            if error is None:
+                self.tripped.pop(unit, None)
+                if self.slow_threshold and elapsed >= self.slow_threshold:
+                    self.slow[unit] = round(elapsed, 3)
+                    logger.warning(f"  表 {unit[0]}.{unit[1]}：扫描耗时 {elapsed:.1f} 秒，记为慢表")
+            elif is_timeout_error(error):
+                self.tripped[unit] = {"reason": "timeout", "error": error, "elapsed": round(elapsed, 3)}
+                logger.warning(f"  表 {unit[0]}.{unit[1]}：查询超时，已熔断（不再重试）")
+
+    def is_open(self, unit: UnitKey) -> bool:
+        """熔断的表不再重试"""
+        with self._lock:
+            return unit in self.tripped
+
+    def report(self) -> List[Dict]:
+        """汇总熔断表与慢表"""
+        entries = [
+            {"数据库名": unit[0], "表名": unit[1], "状态": "熔断", "原因": info["reason"],
+             "耗时": info["elapsed"], "错误": info["error"]}
+            for unit, info in self.tripped.items()
+        ]
+        entries.extend(
+            {"数据库名": unit[0], "表名": unit[1], "状态": "慢表", "耗时": elapsed}
+            for unit, elapsed in self.slow.items()
+        )
+        return entries
+
+    def write_report(self, output_dir: str, timestamp: str) -> Optional[str]:
+        """写出慢表/熔断表报告，无记录时不生成文件"""
+        entries = self.report()
+        if not entries:
+            return None
+        path = os.path.join(output_dir, f"slow_tables_{timestamp}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        logger.warning(f"熔断 {len(self.tripped)} 个表、慢表 {len(self.slow)} 个，详见：{path}")
+        return path
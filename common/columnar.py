@@ -0,0 +1,142 @@
+import os
+import json
+from typing import Any, Callable, Dict, List, Optional
+from common.logger import logger
+from common.exception_handler import ExportError
+
+# 列式导出格式：parquet（Parquet 文件）/ arrow（Arrow IPC 文件）
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+# 缓冲的样本单元格数达到该值时写出一个批次（Parquet 行组 / Arrow 记录批）
+DEFAULT_BATCH_ROWS = 65536
+
+# 三张表的字段定义：(字段名, 类型)，以 (target, database, table) 关联
+TABLE_FIELDS = {
+    # 每个含敏感字段的表一行
+    "findings": [("target", "string"), ("db_type", "string"), ("database", "string"), ("table", "string"),
+                 ("sensitive_column_count", "int32"), ("sensitive_columns", "list<string>"),
+                 ("extracted_rows", "int64"), ("extracted_at", "string")],
+    # 每个字段一行（字段详情与内容识别结果）
+    "columns": [("target", "string"), ("database", "string"), ("table", "string"), ("ordinal", "int32"),
+                ("column_name", "string"), ("column_type", "string"), ("is_nullable", "bool"),
+                ("column_comment", "string"), ("is_sensitive", "bool"), ("sensitive_type", "string"),
+                ("sensitive_types", "list<string>"), ("detected_type", "string"), ("hit_ratios", "string"),
+                ("sample_count", "int64")],
+    # 每个样本单元格一行（长表，各表字段不同也共用同一结构）
+    "samples": [("target", "string"), ("database", "string"), ("table", "string"), ("row_index", "int32"),
+                ("column_name", "string"), ("value", "string")],
+}
+
+
+def _import_pyarrow(export_format: str):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ExportError(export_format, "列式导出需要安装 pyarrow：pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_schema(pa, fields: List) -> Any:
+    types = {"string": pa.string(), "int32": pa.int32(), "int64": pa.int64(), "bool": pa.bool_(),
+             "list<string>": pa.list_(pa.string())}
+    return pa.schema([(name, types[type_name]) for name, type_name in fields])
+
+
+class ColumnarWriter:
+    """列式导出：扫描结果拆分为 findings / columns / samples 三张表，分别写入
+    sensitive_data_<时间戳>_<表>.parquet（或 .arrow），逐表追加到内存缓冲，按批次写出，
+    字段详情不再随每行样本重复，文件体积与写出耗时随结果规模线性增长"""
+
+    def __init__(self, output_dir: str, timestamp: str, export_format: str = "parquet",
+                 serialize: Optional[Callable[[Any], Any]] = None, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.export_format = export_format
+        self._pa = _import_pyarrow(export_format)
+        self._serialize = serialize or str
+        self.batch_rows = max(1, batch_rows)
+        self.paths = {name: os.path.join(output_dir, f"sensitive_data_{timestamp}_{name}{COLUMNAR_FORMATS[export_format]}")
+                      for name in TABLE_FIELDS}
+        self._schemas = {name: _arrow_schema(self._pa, fields) for name, fields in TABLE_FIELDS.items()}
+        self._buffers: Dict[str, Dict[str, List]] = {
+            name: {field: [] for field, _ in fields} for name, fields in TABLE_FIELDS.items()
+        }
+        self._writers: Dict[str, Any] = {}
+
+    def _text(self, value: Any) -> Optional[str]:
+        """样本值统一转为字符串列：非字符串值按 JSON 导出的序列化规则转换后再编码"""
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        value = self._serialize(value)
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    def write(self, item: Dict) -> None:
+        """写入单个表的结果（缓冲达到批次大小时写出）"""
+        key = (item.get("目标"), item["数据库名"], item["表名"])
+        self._append("findings", key[0], item["数据库类型"], key[1], key[2], item["敏感字段数"], item["敏感字段列表"],
+                     item["提取数据行数"], item.get("提取时间"))
+
+        detection = item.get("内容识别", {})
+        for ordinal, col in enumerate(item["敏感字段详情"], 1):
+            detected = detection.get(col["column_name"], {})
+            self._append("columns", *key, ordinal, col["column_name"], col.get("column_type"), col.get("is_nullable"),
+                         col.get("column_comment"), col["is_sensitive"], col.get("sensitive_type"),
+                         col.get("sensitive_types", []), detected.get("detected_type"),
+                         json.dumps(detected["hit_ratios"], ensure_ascii=False) if detected else None,
+                         detected.get("sample_count"))
+
+        # 样本按行整列追加（逐单元格调用开销过大）
+        samples = self._buffers["samples"]
+        for row_index, row in enumerate(item["rows"]):
+            width = len(row)
+            for field, value in zip(("target", "database", "table", "row_index"), (*key, row_index)):
+                samples[field].extend([value] * width)
+            samples["column_name"].extend(row.keys())
+            samples["value"].extend(map(self._text, row.values()))
+            if len(samples["value"]) >= self.batch_rows:
+                self.flush()
+        if len(self._buffers["columns"]["column_name"]) >= self.batch_rows:
+            self.flush()
+
+    def _append(self, table: str, *values) -> None:
+        for column, value in zip(self._buffers[table].values(), values):
+            column.append(value)
+
+    def _open_writer(self, table: str) -> Any:
+        pa, schema = self._pa, self._schemas[table]
+        if self.export_format == "parquet":
+            return pa.parquet.ParquetWriter(self.paths[table], schema, compression="zstd")
+        return pa.ipc.new_file(self.paths[table], schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    def flush(self) -> None:
+        """把缓冲写出为一个批次"""
+        try:
+            for table, buffer in self._buffers.items():
+                if not next(iter(buffer.values())):
+                    continue
+                batch = self._pa.record_batch(list(buffer.values()), schema=self._schemas[table])
+                if table not in self._writers:
+                    self._writers[table] = self._open_writer(table)
+                writer = self._writers[table]
+                if self.export_format == "parquet":
+                    writer.write_table(self._pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+                for column in buffer.values():
+                    column.clear()
+        except Exception as e:
+            raise ExportError(self.export_format, str(e)) from e
+
+    def close(self) -> None:
+        """写出剩余缓冲并关闭文件（无数据的表也写出空文件，三张表始终齐全）"""
+        self.flush()
+        try:
+            for table in TABLE_FIELDS:
+                writer = self._writers.pop(table, None) or self._open_writer(table)
+                writer.close()
+        except Exception as e:
+            raise ExportError(self.export_format, str(e)) from e
+        logger.info(f"{self.export_format.capitalize()} 结果已保存：{'、'.join(self.paths.values())}")
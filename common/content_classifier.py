@@ -0,0 +1,194 @@
+import re
+import threading
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from config.sensitive_keywords import SENSITIVE_DATA_PATTERNS
+from common.logger import logger
+
+# 正则以多行模式预编译：整列取值按行拼接后一次扫描，^/$ 锚定到每个单元格
+COMPILED_DATA_PATTERNS = {
+    data_type: re.compile(pattern, re.MULTILINE) for data_type, pattern in SENSITIVE_DATA_PATTERNS.items()
+}
+
+# GB11643 身份证校验码：前 17 位加权求和后对 11 取模
+ID_CARD_WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+ID_CARD_CHECK_CODES = "10X98765432"
+
+
+def luhn_valid(value: str) -> bool:
+    """Luhn 校验（银行卡号）"""
+    total = 0
+    for idx, char in enumerate(reversed(value)):
+        digit = ord(char) - 48
+        if idx % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def id_card_valid(value: str) -> bool:
+    """GB11643 校验位（18 位身份证）；15 位旧证号无校验位，直接通过"""
+    if len(value) == 15:
+        return True
+    total = sum((ord(char) - 48) * weight for char, weight in zip(value, ID_CARD_WEIGHTS))
+    return ID_CARD_CHECK_CODES[total % 11] == value[17].upper()
+
+
+def access_key_valid(value: str) -> bool:
+    """访问密钥需同时包含字母和数字，排除纯数字编号与普通单词"""
+    return not value.isdigit() and not value.isalpha()
+
+
+# 正则命中后的二次校验（未配置的类型只做正则匹配）
+DATA_VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "id_card": id_card_valid,
+    "bank_card": luhn_valid,
+    "access_key": access_key_valid,
+}
+
+
+def _to_text(value) -> Optional[str]:
+    """单元格转为待匹配文本，空值与无法解码的二进制返回 None"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        try:
+            value = value.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    text = str(value).strip()
+    # 含换行的值不可能整体匹配锚定正则，置空以免破坏按行拼接
+    if "\n" in text or "\r" in text:
+        return ""
+    return text
+
+
+def count_column_hits(values: List[str]) -> Dict[str, int]:
+    """统计单列取值向量中各类型的命中次数（按配置顺序）"""
+    column_text = "\n".join(values)
+    hits_by_type = {}
+    for data_type, pattern in COMPILED_DATA_PATTERNS.items():
+        validator = DATA_VALIDATORS.get(data_type)
+        hits = 0
+        for match in pattern.finditer(column_text):
+            if validator is None or validator(match.group()):
+                hits += 1
+        if hits:
+            hits_by_type[data_type] = hits
+    return hits_by_type
+
+
+def summarize_column_hits(hits_by_type: Dict[str, int], sample_count: int, hit_threshold: float) -> Dict:
+    """由命中次数计算各类型命中率及识别出的类型"""
+    if not sample_count:
+        return {"detected_type": "", "hit_ratios": {}, "sample_count": 0}
+
+    hit_ratios = {data_type: round(hits / sample_count, 4) for data_type, hits in hits_by_type.items()}
+    detected_type = ""
+    if hit_ratios:
+        # 命中率相同时按配置顺序优先
+        best_type = max(hit_ratios, key=hit_ratios.get)
+        if hit_ratios[best_type] >= hit_threshold:
+            detected_type = best_type
+    return {"detected_type": detected_type, "hit_ratios": hit_ratios, "sample_count": sample_count}
+
+
+def classify_column_values(values: List[str], hit_threshold: float) -> Dict:
+    """对单列取值向量做内容识别，返回各类型命中率及识别出的类型"""
+    if not values:
+        return summarize_column_hits({}, 0, hit_threshold)
+    return summarize_column_hits(count_column_hits(values), len(values), hit_threshold)
+
+
+class ContentClassifier:
+    """基于 SENSITIVE_DATA_PATTERNS 的字段值内容识别器，按列批量匹配，样本量大时分发到进程池"""
+
+    # 流式识别时每批处理的行数
+    STREAM_BATCH_ROWS = 5000
+
+    def __init__(self, hit_threshold: float = 0.6, pool_threshold: int = 50000, pool_workers: Optional[int] = None):
+        self.hit_threshold = hit_threshold
+        self.pool_threshold = pool_threshold
+        self.pool_workers = pool_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """按需创建进程池（可能在扫描工作线程中首次调用）
+
+        子进程不能以 fork 方式创建：fork 会复制持有数据库连接与锁的扫描线程状态，
+        因此使用 forkserver（不支持时为 spawn），子进程只导入识别函数所在模块
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.pool_workers,
+                                                 mp_context=multiprocessing.get_context(method))
+            return self._pool
+
+    @staticmethod
+    def _column_vectors(rows: Iterable[Dict]) -> Dict[str, List[str]]:
+        """行数据转为按列组织的取值向量（跳过空值）"""
+        vectors: Dict[str, List[str]] = {}
+        for row in rows:
+            for column_name, value in row.items():
+                vector = vectors.setdefault(column_name, [])
+                text = _to_text(value)
+                if text is not None:
+                    vector.append(text)
+        return vectors
+
+    def classify_rows(self, rows: Iterable[Dict]) -> Dict[str, Dict]:
+        """对查询结果逐列做内容识别，返回 {字段名: 识别结果}（非列表的行迭代器按批流式识别）"""
+        if not isinstance(rows, list):
+            return self._classify_stream(rows)
+        vectors = self._column_vectors(rows)
+        total_cells = sum(len(values) for values in vectors.values())
+
+        if total_cells >= self.pool_threshold and len(vectors) > 1:
+            try:
+                pool = self._get_pool()
+                futures = {
+                    column_name: pool.submit(classify_column_values, values, self.hit_threshold)
+                    for column_name, values in vectors.items()
+                }
+                return {column_name: future.result() for column_name, future in futures.items()}
+            except Exception as e:
+                logger.warning(f"内容识别进程池不可用，改为当前进程执行：{str(e)}")
+
+        return {
+            column_name: classify_column_values(values, self.hit_threshold)
+            for column_name, values in vectors.items()
+        }
+
+    def _classify_stream(self, rows: Iterable[Dict]) -> Dict[str, Dict]:
+        """逐批累加各列命中次数与样本数，内存占用以 STREAM_BATCH_ROWS 行为上限"""
+        hits: Dict[str, Dict[str, int]] = {}
+        counts: Dict[str, int] = {}
+        row_iter = iter(rows)
+        while True:
+            batch = list(islice(row_iter, self.STREAM_BATCH_ROWS))
+            if not batch:
+                break
+            for column_name, values in self._column_vectors(batch).items():
+                column_hits = hits.setdefault(column_name, {})
+                counts[column_name] = counts.get(column_name, 0) + len(values)
+                for data_type, count in count_column_hits(values).items():
+                    column_hits[data_type] = column_hits.get(data_type, 0) + count
+
+        results = {}
+        for column_name, column_hits in hits.items():
+            # 按配置顺序排列，与整列一次识别的结果一致
+            ordered = {data_type: column_hits[data_type] for data_type in COMPILED_DATA_PATTERNS if data_type in column_hits}
+            results[column_name] = summarize_column_hits(ordered, counts[column_name], self.hit_threshold)
+        return results
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -1,20 +1,130 @@
+import io
 import os
 import json
 import csv
+import gzip
+import base64
 import decimal
-from datetime import datetime
-from typing import List, Dict
+from datetime import date, datetime
+from typing import IO, Any, Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from common.logger import logger
 from common.exception_handler import ExportError
+from common.row_spool import RowSpool
+from common.columnar import COLUMNAR_FORMATS, ColumnarWriter
+from common.shard_index import ShardWriter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON Lines 压缩方式对应的文件扩展名
+JSONL_SUFFIXES = {"none": ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+# CSV 单元格最大长度（超出截断，避免 Excel 等软件无法正常打开）
+CSV_CELL_LIMIT = 3000
+# base64 前 50 个字符只依赖前 39 个字节（39 字节恰好编码为 52 个字符）
+BINARY_PREVIEW_BYTES = 39
+
+
+def json_loads(text: str) -> Any:
+    """解析 JSON 文本：安装 orjson 时优先使用，orjson 不支持的输入（超出 64 位的整数、NaN 等）回退标准库，
+    两者解析结果一致"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def _binary_to_text(value: bytes) -> str:
+    """二进制值尝试 UTF-8 解码，失败则返回 base64 编码前缀"""
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return f"[BINARY] {base64.b64encode(value[:BINARY_PREVIEW_BYTES]).decode('utf-8')[:50]}..."
+
+
+def _truncate_csv(text: str) -> str:
+    return text if len(text) <= CSV_CELL_LIMIT else text[:CSV_CELL_LIMIT] + "..."
+
+
+# 按精确类型分派的转换函数（与 isinstance 判断链的结果一致；子类与未列出的类型走完整判断链）
+JSON_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: lambda value: value.strftime("%Y-%m-%d %H:%M:%S"),
+    date: lambda value: value.strftime("%Y-%m-%d"),
+    decimal.Decimal: str,
+    bytes: _binary_to_text,
+}
+CSV_CONVERTERS: Dict[type, Callable[[Any], str]] = {
+    str: _truncate_csv,
+    int: lambda value: _truncate_csv(str(value)),
+    float: lambda value: _truncate_csv(str(value)),
+    bool: str,
+    **JSON_CONVERTERS,
+}
+
+
+def first_value_types(rows: Iterable[Dict], columns: List[str]) -> Dict[str, type]:
+    """按各字段首个非空值确定取值类型（全部字段确定后即停止遍历）"""
+    types: Dict[str, type] = {}
+    pending = set(columns)
+    for row in rows:
+        for column in list(pending):
+            value = row.get(column)
+            if value is not None:
+                types[column] = type(value)
+                pending.discard(column)
+        if not pending:
+            break
+    return types
+
+
+def open_jsonl(path: str, mode: str = "r") -> IO[str]:
+    """按扩展名以文本模式（UTF-8）打开 JSON Lines 文件，.gz / .zst 透明压缩解压；mode 为 r / w / a
+    （追加写入时压缩文件新增一个 gzip 成员 / zstd 帧，读取时按顺序连续解压）"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ExportError("jsonl", "zstd 压缩需要安装 zstandard：pip install zstandard") from e
+        raw = open(path, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_jsonl_lines(path: str) -> Iterator[str]:
+    """逐行读取 JSON Lines 文件；压缩文件尾部残缺（任务中断时未写完）时读到可解压的部分为止"""
+    with open_jsonl(path, "r") as f:
+        try:
+            for line in f:
+                yield line
+        except Exception as e:
+            if not path.endswith((".gz", ".zst")):
+                raise
+            logger.warning(f"压缩文件 {path} 尾部不完整，已忽略残缺部分：{str(e)}")
 
 class ResultExporter:
     def __init__(self, output_dir: str = "./output"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 复用同一编码器（json.dumps 传入参数时每次调用都会新建编码器，逐行序列化时开销明显）
+        self._dumps = json.JSONEncoder(ensure_ascii=False, default=self._serialize_datetime).encode
 
     def _serialize_datetime(self, obj):
         """序列化各种数据库常见类型（JSON 导出用）"""
+        # 常见类型按精确类型直接转换
+        converter = JSON_CONVERTERS.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+
         # None值处理
         if obj is None:
             return None
@@ -35,11 +145,7 @@ class ResultExporter:
         # 二进制类型
         elif isinstance(obj, bytes):
             # 将bytes转换为字符串，尝试UTF-8解码，失败则返回base64编码
-            try:
-                return obj.decode('utf-8')
-            except UnicodeDecodeError:
-                import base64
-                return f"[BINARY] {base64.b64encode(obj).decode('utf-8')[:50]}..."
+            return _binary_to_text(obj)
         
         # 容器类型
         elif isinstance(obj, (list, tuple)):
@@ -59,6 +165,19 @@ class ResultExporter:
             # 如果无法转换为字符串，则返回类型信息
             return f"[OBJECT] {type(obj).__name__}"
 
+    def encode_chunks(self, item: Dict) -> Iterator[str]:
+        """按片段产出单个表结果的紧凑 JSON（不含换行）；行数据已转存到 RowSpool 时逐行序列化
+        （rows 为最后一个键），拼接结果与整体 json.dumps 完全一致；流式导出、分片写出与分布式工作端共用此编码"""
+        if not isinstance(item.get("rows"), RowSpool):
+            yield self._dumps(item)
+            return
+        head = self._dumps({key: value for key, value in item.items() if key != "rows"})
+        yield head[:-1] + ', "rows": ['
+        dumps = self._dumps
+        for idx, row in enumerate(item["rows"]):
+            yield (", " if idx else "") + dumps(row)
+        yield "]}"
+
     def export_json(self, data: List[Dict]) -> None:
         """导出 JSON 格式"""
         file_path = os.path.join(self.output_dir, f"sensitive_data_{self.timestamp}.json")
@@ -76,11 +195,7 @@ class ResultExporter:
         
         # 处理二进制数据
         if isinstance(value, bytes):
-            try:
-                return value.decode('utf-8')
-            except UnicodeDecodeError:
-                import base64
-                return f"[BINARY] {base64.b64encode(value).decode('utf-8')[:50]}..."
+            return _binary_to_text(value)
         
         # 处理日期时间
         elif isinstance(value, datetime):
@@ -102,12 +217,50 @@ class ResultExporter:
         try:
             result = str(value)
             # 限制CSV中单个字段的长度，避免Excel等软件无法正常打开
-            if len(result) > 3000:
-                return result[:3000] + "..."  # 截断过长的文本
-            return result
+            return _truncate_csv(result)  # 截断过长的文本
         except Exception:
             return f"[OBJECT] {type(value).__name__}"
 
+    def _csv_converters(self, rows: Iterable[Dict], columns: List[str]) -> List[Callable[[Any], str]]:
+        """按各字段首个非空值的类型预先选定转换函数：取值类型一致时直接转换，
+        类型不符（或无法确定）时回退完整的 _convert_to_csv_safe，结果与逐值判断一致"""
+        types = first_value_types(rows, columns)
+        convert_safe = self._convert_to_csv_safe
+        converters = []
+        for column in columns:
+            value_type = types.get(column)
+            fast = CSV_CONVERTERS.get(value_type)
+            if fast is None:
+                converters.append(convert_safe)
+            else:
+                converters.append(lambda value, value_type=value_type, fast=fast:
+                                  fast(value) if type(value) is value_type else convert_safe(value))
+        return converters
+
+    def _write_csv_item(self, writer, item: Dict, current_db: str) -> str:
+        """写入单个表的 CSV 块，返回写入后的当前库名"""
+        db_name = item["数据库名"]
+        table_name = item["表名"]
+        columns = [col["column_name"] for col in item["敏感字段详情"]]  # 所有字段
+        rows = item["rows"]
+
+        # 数据库名（切换时写入）
+        if db_name != current_db:
+            current_db = db_name
+            writer.writerow([f"📊 数据库：{db_name}"])
+            writer.writerow([])  # 空行分隔
+
+        # 表名 + 字段名 + 数据
+        writer.writerow([f"🗂️  表名：{table_name}"])
+        writer.writerow(columns)  # 字段行
+        converters = list(zip(columns, self._csv_converters(rows, columns)))
+        for row in rows:
+            # 按字段顺序提取数据，确保对齐，并进行安全转换
+            data_row = [convert(row.get(col, "")) for col, convert in converters]
+            writer.writerow(data_row)
+        writer.writerow([])  # 表之间空行分隔
+        return current_db
+
     def export_csv(self, data: List[Dict]) -> None:
         """导出 CSV 格式（按「库名→表名→字段→数据」层级）"""
         file_path = os.path.join(self.output_dir, f"sensitive_data_{self.timestamp}.csv")
@@ -121,34 +274,188 @@ class ResultExporter:
                 current_db = ""
 
                 for item in data:
-                    db_name = item["数据库名"]
-                    table_name = item["表名"]
-                    columns = [col["column_name"] for col in item["敏感字段详情"]]  # 所有字段
-                    rows = item["rows"]
-
-                    # 数据库名（切换时写入）
-                    if db_name != current_db:
-                        current_db = db_name
-                        writer.writerow([f"📊 数据库：{db_name}"])
-                        writer.writerow([])  # 空行分隔
-
-                    # 表名 + 字段名 + 数据
-                    writer.writerow([f"🗂️  表名：{table_name}"])
-                    writer.writerow(columns)  # 字段行
-                    for row in rows:
-                        # 按字段顺序提取数据，确保对齐，并进行安全转换
-                        data_row = [self._convert_to_csv_safe(row.get(col, "")) for col in columns]
-                        writer.writerow(data_row)
-                    writer.writerow([])  # 表之间空行分隔
+                    current_db = self._write_csv_item(writer, item, current_db)
 
             logger.info(f"CSV 结果已保存：{file_path}")
             logger.info("提示：CSV 文件可直接用 Excel 打开，层级结构清晰")
         except Exception as e:
             raise ExportError("csv", str(e)) from e
 
-    def export(self, data: List[Dict], export_type: str = "all") -> None:
-        """统一导出入口"""
+    def export_columnar(self, data: List[Dict], export_format: str = "parquet") -> None:
+        """导出列式格式（findings / columns / samples 三张表，Parquet 或 Arrow IPC）"""
+        writer = ColumnarWriter(self.output_dir, self.timestamp, export_format, self._serialize_datetime)
+        for item in data:
+            writer.write(item)
+        writer.close()
+
+    def export_shards(self, data: List[Dict], shard_by: str = "database") -> None:
+        """导出分片结果与索引（供查看器按需加载）"""
+        writer = ShardWriter(self.output_dir, self.timestamp, shard_by, self.encode_chunks)
+        for item in data:
+            writer.write(item)
+        writer.close()
+
+    def export(self, data: List[Dict], export_type: str = "all", shard_by: Optional[str] = None) -> None:
+        """统一导出入口（shard_by 为 database / table 时另外导出分片结果与索引）"""
         if export_type == "json" or export_type == "all":
             self.export_json(data)
         if export_type == "csv" or export_type == "all":
             self.export_csv(data)
+        if export_type in COLUMNAR_FORMATS:
+            self.export_columnar(data, export_type)
+        if shard_by:
+            self.export_shards(data, shard_by)
+
+
+class StreamingExporter(ResultExporter):
+    """流式导出：每个表的结果产生后立即追加写入 JSON Lines（可 gzip/zstd 压缩）、CSV 与列式文件，内存占用以单表为上限；
+    结束时由 JSON Lines 合并生成与 export_json 相同布局的 JSON 文件"""
+
+    def __init__(self, output_dir: str = "./output", export_type: str = "all", timestamp: Optional[str] = None,
+                 jsonl_compression: str = "none", shard_by: Optional[str] = None):
+        super().__init__(output_dir)
+        # 续扫时沿用上次任务的时间戳，追加到同一组结果文件
+        if timestamp:
+            self.timestamp = timestamp
+        self.export_type = export_type
+        self.shard_by = shard_by
+        self.jsonl_path = os.path.join(output_dir, f"sensitive_data_{self.timestamp}{JSONL_SUFFIXES[jsonl_compression]}")
+        self.json_path = os.path.join(output_dir, f"sensitive_data_{self.timestamp}.json")
+        self.csv_path = os.path.join(output_dir, f"sensitive_data_{self.timestamp}.csv")
+        self.count = 0
+        self._jsonl_file = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._columnar: Optional[ColumnarWriter] = None
+        self._shards: Optional[ShardWriter] = None
+        self._current_db = ""
+        self._closed = False
+
+    @property
+    def _csv_enabled(self) -> bool:
+        return self.export_type in ("csv", "all")
+
+    @property
+    def _json_enabled(self) -> bool:
+        return self.export_type in ("json", "all")
+
+    @property
+    def _columnar_enabled(self) -> bool:
+        return self.export_type in COLUMNAR_FORMATS
+
+    def resume(self, done_units: Set[Tuple[str, str]]) -> None:
+        """续扫：只保留 JSON Lines 中检查点已确认完成的表结果（去重、丢弃中断时的残缺行），
+        据此重建 CSV，之后的结果继续追加写入"""
+        if not os.path.exists(self.jsonl_path):
+            return
+        # 临时文件保留压缩扩展名，按相同方式压缩
+        base, ext = self.jsonl_path.split(".jsonl", 1)
+        tmp_path = f"{base}.tmp.jsonl{ext}"
+        seen = set()
+        try:
+            with open_jsonl(tmp_path, "w") as dst:
+                for line in read_jsonl_lines(self.jsonl_path):
+                    try:
+                        record = json_loads(line)
+                    except ValueError:
+                        continue
+                    unit = (record["数据库名"], record["表名"])
+                    if unit not in done_units or unit in seen:
+                        continue
+                    seen.add(unit)
+                    dst.write(line if line.endswith("\n") else line + "\n")
+                    if self._csv_enabled:
+                        self._write_csv_record(record)
+                    if self._columnar_enabled:
+                        self._write_columnar_record(record)
+                    if self.shard_by:
+                        self._write_shard_record(record)
+                    self.count += 1
+            os.replace(tmp_path, self.jsonl_path)
+            logger.info(f"续扫：已恢复 {self.count} 个表的导出结果")
+        except Exception as e:
+            raise ExportError("jsonl", f"恢复续扫结果失败：{str(e)}") from e
+
+    def _write_csv_record(self, item: Dict) -> None:
+        if self._csv_file is None:
+            self._csv_file = open(self.csv_path, "w", encoding="utf-8-sig", newline="")
+            self._csv_writer = csv.writer(self._csv_file)
+        self._current_db = self._write_csv_item(self._csv_writer, item, self._current_db)
+        self._csv_file.flush()
+
+    def _write_columnar_record(self, item: Dict) -> None:
+        if self._columnar is None:
+            self._columnar = ColumnarWriter(self.output_dir, self.timestamp, self.export_type, self._serialize_datetime)
+        self._columnar.write(item)
+
+    def _write_shard_record(self, item: Dict) -> None:
+        if self._shards is None:
+            self._shards = ShardWriter(self.output_dir, self.timestamp, self.shard_by, self.encode_chunks)
+        self._shards.write(item)
+
+    def write(self, item: Dict) -> None:
+        """写入单个表的结果并立即刷盘（压缩时刷出当前压缩块，已写入的表在中断后仍可解压）"""
+        try:
+            if self._jsonl_file is None:
+                self._jsonl_file = open_jsonl(self.jsonl_path, "a")
+            for chunk in self.encode_chunks(item):
+                self._jsonl_file.write(chunk)
+            self._jsonl_file.write("\n")
+            self._jsonl_file.flush()
+        except Exception as e:
+            raise ExportError("jsonl", str(e)) from e
+
+        if self._csv_enabled:
+            try:
+                self._write_csv_record(item)
+            except Exception as e:
+                raise ExportError("csv", str(e)) from e
+        if self._columnar_enabled:
+            self._write_columnar_record(item)
+        if self.shard_by:
+            self._write_shard_record(item)
+        self.count += 1
+
+    def merge_json(self) -> None:
+        """逐条读取 JSON Lines 合并为 JSON 数组（与 json.dump(indent=2) 输出一致），内存占用为单条记录"""
+        try:
+            with open(self.json_path, "w", encoding="utf-8") as dst:
+                dst.write("[")
+                first = True
+                for line in read_jsonl_lines(self.jsonl_path):
+                    if not line.strip():
+                        continue
+                    record = json_loads(line)
+                    dst.write("\n" if first else ",\n")
+                    # 缩进输出不含空行，整体替换换行即可逐行缩进
+                    dst.write("  " + json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                    first = False
+                dst.write("]" if first else "\n]")
+            logger.info(f"JSON 结果已保存：{self.json_path}")
+        except Exception as e:
+            raise ExportError("json", str(e)) from e
+
+    def close(self) -> None:
+        """关闭流式文件，并合并生成最终 JSON（重复调用无副作用）"""
+        if self._closed:
+            return
+        self._closed = True
+        for handle in (self._jsonl_file, self._csv_file):
+            if handle:
+                handle.close()
+        self._jsonl_file = self._csv_file = self._csv_writer = None
+        if self._columnar:
+            self._columnar.close()
+            self._columnar = None
+        if self._shards:
+            self._shards.close()
+            self._shards = None
+
+        if not self.count:
+            return
+        logger.info(f"JSON Lines 结果已保存：{self.jsonl_path}")
+        if self._csv_enabled:
+            logger.info(f"CSV 结果已保存：{self.csv_path}")
+            logger.info("提示：CSV 文件可直接用 Excel 打开，层级结构清晰")
+        if self._json_enabled:
+            self.merge_json()
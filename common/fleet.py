@@ -0,0 +1,206 @@
+import os
+import re
+import csv
+import json
+import threading
+from itertools import zip_longest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from config.default_config import DB_DEFAULT_CONFIG
+from common.logger import logger
+from common.exporter import StreamingExporter, json_loads, read_jsonl_lines
+from common.exception_handler import BaseExtractorError
+
+# 资产清单中每个目标可单独覆盖的扫描参数及其类型（CSV 中均为字符串，加载清单时按类型转换）
+TARGET_OVERRIDABLE_KEYS = {
+    "timeout": int, "extract_rows": int, "workers": int, "catalog_mode": str, "sample_mode": str,
+    "projection": bool, "lob_limit": int, "query_timeout": int, "retries": int, "content_scan": bool,
+    "throttle": bool, "throttle_max_load": float,
+}
+BOOL_VALUES = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+
+
+def coerce_target_value(key: str, value):
+    """按 TARGET_OVERRIDABLE_KEYS 的类型转换清单中的参数值，无法转换时抛出 ValueError"""
+    value_type = TARGET_OVERRIDABLE_KEYS[key]
+    if value_type is bool:
+        if isinstance(value, bool):
+            return value
+        if str(value).strip().lower() not in BOOL_VALUES:
+            raise ValueError(f"应为布尔值（true/false）：{value!r}")
+        return BOOL_VALUES[str(value).strip().lower()]
+    if isinstance(value, bool) or (value_type is int and isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"类型不符：{value!r}")
+    return value_type(value.strip() if isinstance(value, str) else value)
+
+
+def load_inventory(path: str) -> List[Dict]:
+    """读取资产清单（YAML/CSV/JSON），返回目标列表
+
+    每个目标至少包含 db_type 与 host，可选 name/port/user/password/password_env/service_name/charset
+    以及 TARGET_OVERRIDABLE_KEYS 中的扫描参数
+    """
+    if not os.path.exists(path):
+        raise BaseExtractorError(f"资产清单文件不存在：{path}")
+
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            if ext in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise BaseExtractorError("读取 YAML 资产清单需要安装 PyYAML：pip install pyyaml") from e
+                data = yaml.safe_load(f)
+            elif ext == ".json":
+                data = json.load(f)
+            elif ext == ".csv":
+                # 空单元格视为未配置
+                data = [{key: value for key, value in row.items() if value not in (None, "")}
+                        for row in csv.DictReader(f)]
+            else:
+                raise BaseExtractorError(f"不支持的资产清单格式：{ext}（支持 .yaml/.yml/.csv/.json）")
+    except BaseExtractorError:
+        raise
+    except Exception as e:
+        raise BaseExtractorError(f"解析资产清单失败：{str(e)}") from e
+
+    if isinstance(data, dict):
+        data = data.get("targets", [])
+    if not isinstance(data, list):
+        raise BaseExtractorError("资产清单格式错误：应为目标列表或包含 targets 列表的对象")
+
+    targets = []
+    for idx, target in enumerate(data, 1):
+        db_type = str(target.get("db_type", "")).lower()
+        if db_type not in DB_DEFAULT_CONFIG:
+            raise BaseExtractorError(f"资产清单第 {idx} 个目标的 db_type 无效：{target.get('db_type')}")
+        if not target.get("host"):
+            raise BaseExtractorError(f"资产清单第 {idx} 个目标缺少 host")
+        target = dict(target, db_type=db_type)
+        for key in TARGET_OVERRIDABLE_KEYS:
+            if key in target:
+                try:
+                    target[key] = coerce_target_value(key, target[key])
+                except (TypeError, ValueError) as e:
+                    raise BaseExtractorError(f"资产清单第 {idx} 个目标的 {key} 无效：{str(e)}") from e
+        targets.append(target)
+    logger.info(f"已加载资产清单：{path}，共 {len(targets)} 个目标")
+    return targets
+
+
+def build_target_config(base_config: Dict, target: Dict, fleet_dir: str) -> Dict:
+    """基于全局配置与清单条目生成单个目标的扫描配置，结果输出到独立子目录"""
+    db_type = target["db_type"]
+    defaults = DB_DEFAULT_CONFIG[db_type]
+    port = int(target.get("port") or defaults["port"])
+    name = target.get("name") or f"{db_type}_{target['host']}_{port}"
+
+    password = target.get("password")
+    if password is None and target.get("password_env"):
+        password = os.getenv(target["password_env"], "")
+
+    config = dict(base_config)
+    config.update({
+        "name": name,
+        "db_type": db_type,
+        "host": target["host"],
+        "port": port,
+        "user": target.get("user") or defaults["user"],
+        "password": password if password is not None else defaults["password"],
+        "output_dir": os.path.join(fleet_dir, re.sub(r"[^\w.-]", "_", str(name))),
+    })
+    if db_type == "oracle":
+        config["service_name"] = target.get("service_name") or "ORCL"
+    if db_type == "mysql":
+        config["charset"] = target.get("charset") or defaults["charset"]
+
+    # 参数值已在 load_inventory 中按类型转换
+    for key in TARGET_OVERRIDABLE_KEYS:
+        if key in target:
+            config[key] = target[key]
+    return config
+
+
+class FleetRunner:
+    """资产清单模式：在同一进程内并发扫描多个数据库目标，受全局并发与单主机并发上限约束；
+    单个目标失败不影响其他目标，结束后汇总生成合并结果"""
+
+    def __init__(self, base_config: Dict, targets: List[Dict], scan_func: Callable[[Dict], Dict],
+                 max_concurrency: int = 8, per_host_concurrency: int = 1):
+        self.base_config = base_config
+        self.targets = targets
+        self.scan_func = scan_func
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.fleet_dir = os.path.join(base_config["output_dir"], f"fleet_{self.timestamp}")
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._host_semaphores[host]
+
+    def _scan_target(self, config: Dict) -> Dict:
+        outcome = {"name": config["name"], "db_type": config["db_type"], "host": config["host"],
+                   "port": config["port"], "output_dir": config["output_dir"]}
+        with self._host_semaphore(config["host"]):
+            logger.info(f"\n>>> 开始扫描目标：{config['name']}（{config['db_type']}://{config['host']}:{config['port']}）")
+            try:
+                outcome.update(self.scan_func(config))
+                outcome["status"] = "success"
+            except Exception as e:
+                # 单个目标不可达或扫描失败不影响其他目标
+                logger.error(f"目标 {config['name']} 扫描失败：{str(e)}")
+                outcome.update({"status": "failed", "error": str(e)})
+        return outcome
+
+    def run(self) -> List[Dict]:
+        """并发扫描全部目标，返回各目标的执行结果（顺序与清单一致）"""
+        configs = [build_target_config(self.base_config, target, self.fleet_dir) for target in self.targets]
+        os.makedirs(self.fleet_dir, exist_ok=True)
+        logger.info(f"资产清单模式：{len(configs)} 个目标，全局并发 {self.max_concurrency}，单主机并发 {self.per_host_concurrency}")
+
+        # 按主机轮转排列提交顺序，避免同一主机的目标排队等待时占满全局并发槽位
+        by_host: Dict[str, List[int]] = {}
+        for idx, config in enumerate(configs):
+            by_host.setdefault(config["host"], []).append(idx)
+        order = [idx for group in zip_longest(*by_host.values()) for idx in group if idx is not None]
+
+        outcomes: List[Dict] = [{}] * len(configs)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="fleet") as executor:
+            futures = {idx: executor.submit(self._scan_target, configs[idx]) for idx in order}
+            for idx, future in futures.items():
+                outcomes[idx] = future.result()
+
+        self._write_consolidated(outcomes)
+        return outcomes
+
+    def _write_consolidated(self, outcomes: List[Dict]) -> None:
+        """按清单顺序逐条合并各目标的 JSON Lines 结果，并写出目标执行汇总"""
+        exporter = StreamingExporter(self.fleet_dir, self.base_config["export_type"], self.timestamp,
+                                     self.base_config["jsonl_compression"], self.base_config["shard_by"])
+        for outcome in outcomes:
+            jsonl_path = outcome.get("jsonl_path")
+            if not jsonl_path or not os.path.exists(jsonl_path):
+                continue
+            for line in read_jsonl_lines(jsonl_path):
+                if line.strip():
+                    exporter.write(dict({"目标": outcome["name"]}, **json_loads(line)))
+        exporter.close()
+
+        summary_path = os.path.join(self.fleet_dir, f"fleet_summary_{self.timestamp}.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(outcomes, f, ensure_ascii=False, indent=2)
+
+        failed = [outcome for outcome in outcomes if outcome["status"] != "success"]
+        logger.info("\n" + "=" * 50)
+        logger.info(f"资产清单扫描完成：成功 {len(outcomes) - len(failed)} 个目标，失败 {len(failed)} 个目标")
+        for outcome in failed:
+            logger.warning(f"  {outcome['name']}：{outcome['error']}")
+        logger.info(f"合并结果共 {exporter.count} 个含敏感数据的表，目标汇总：{summary_path}")
+        logger.info("=" * 50)
@@ -0,0 +1,84 @@
+from functools import lru_cache
+from collections import deque
+from typing import Dict, List, NamedTuple, Tuple
+from config.sensitive_keywords import SENSITIVE_FIELD_KEYWORDS
+
+
+class KeywordMatch(NamedTuple):
+    """单个关键词命中（start/end 为在小写化的「字段名 注释」文本中的位置）"""
+    sensitive_type: str
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """基于 Aho-Corasick 自动机的多关键词匹配器：启动时编译一次，单次扫描文本即可找出全部命中"""
+
+    def __init__(self, keyword_groups: Dict[str, List[str]], cache_size: int = 65536):
+        # 敏感类型优先级与配置顺序一致（首个命中类型作为主类型）
+        self.type_priority = {sensitive_type: idx for idx, sensitive_type in enumerate(keyword_groups)}
+        self._transitions: List[Dict[str, int]] = []
+        self._outputs: List[Tuple[Tuple[str, str, int], ...]] = []
+        self._build(keyword_groups)
+        # 宽表中同名字段大量重复，按 (字段名, 注释) 做有界缓存
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _build(self, keyword_groups: Dict[str, List[str]]) -> None:
+        """构建字典树、失败指针，并展开为完整的状态转移表（匹配时无需回溯失败指针）"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, str, int]]] = [[]]
+        for sensitive_type, keywords in keyword_groups.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                if (sensitive_type, keyword, len(keyword)) not in outputs[state]:
+                    outputs[state].append((sensitive_type, keyword, len(keyword)))
+
+        # 广度优先计算失败指针，同时把失败状态的转移与输出合并进当前状态
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions[state] = dict(transitions[fail[state]])
+            transitions[state].update(goto[state])
+            outputs[state] = outputs[state] + [out for out in outputs[fail[state]] if out not in outputs[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+
+        self._transitions = transitions
+        self._outputs = [tuple(output) for output in outputs]
+
+    def find_all(self, text: str) -> Tuple[KeywordMatch, ...]:
+        """返回文本中全部关键词命中（含重叠命中），按结束位置排序"""
+        transitions, outputs = self._transitions, self._outputs
+        state = 0
+        matches = []
+        for pos, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for sensitive_type, keyword, length in outputs[state]:
+                    matches.append(KeywordMatch(sensitive_type, keyword, pos - length + 1, pos + 1))
+        return tuple(matches)
+
+    def _match(self, column_name: str, column_comment: str = "") -> Tuple[KeywordMatch, ...]:
+        return self.find_all((column_name + " " + (column_comment or "")).lower())
+
+    def matched_types(self, matches: Tuple[KeywordMatch, ...]) -> List[str]:
+        """命中的全部敏感类型（去重，按配置优先级排序）"""
+        return sorted({match.sensitive_type for match in matches}, key=self.type_priority.__getitem__)
+
+
+# 全局匹配器（进程启动时按敏感关键词配置编译一次）
+SENSITIVE_MATCHER = KeywordMatcher(SENSITIVE_FIELD_KEYWORDS)
@@ -0,0 +1,309 @@
+import os
+import time
+import json
+import bisect
+import asyncio
+import threading
+import functools
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from common.logger import logger
+from common.row_spool import RowSpool
+
+# 耗时直方图桶上限（秒），与 Prometheus 默认桶相近并扩展到长查询
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+# 埋点的适配器方法；同步与异步适配器同名。扫描经 fetch_top_rows 取数（内部调用 query_top_rows / iter_top_rows），
+# 只统计外层以免重复计数
+ADAPTER_PHASES = ("connect", "list_databases", "list_tables", "list_columns", "load_catalog", "fetch_top_rows",
+                  "get_table_stats", "get_table_fingerprints")
+# 不带库名参数的方法，按实例级统计
+INSTANCE_PHASES = ("connect", "list_databases")
+# 无库名时的统计维度
+NO_DATABASE = "-"
+
+
+def estimate_rows_bytes(rows: Any) -> Tuple[int, int]:
+    """估算结果集的 (行数, 字节数)：字符串按字符数、二进制按字节数、其他值按 8 字节计；落盘结果取临时文件大小"""
+    if isinstance(rows, RowSpool):
+        return len(rows), rows.size_bytes
+    if not isinstance(rows, list):
+        return 0, 0
+    total = 0
+    for row in rows:
+        if isinstance(row, dict):
+            for value in row.values():
+                total += len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+    return len(rows), total
+
+
+class PhaseStats:
+    """单个 (阶段, 库) 的调用次数、错误数、往返次数、行数、字节数与耗时直方图"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # 最后一个桶为 +Inf
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, seconds: float, round_trips: int, rows: int, size_bytes: int, error: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.round_trips += round_trips
+        self.rows += rows
+        self.bytes += size_bytes
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按直方图估算分位数（返回所在桶的上限，落在 +Inf 桶时返回最大值）"""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for idx, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return LATENCY_BUCKETS[idx] if idx < len(LATENCY_BUCKETS) else round(self.max_seconds, 6)
+        return round(self.max_seconds, 6)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "round_trips": self.round_trips,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 6),
+            "mean_seconds": round(self.seconds / self.count, 6) if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "max_seconds": round(self.max_seconds, 6),
+            "histogram": {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "+Inf": self.buckets[-1],
+            },
+        }
+
+
+class ScanProfiler:
+    """扫描埋点：按阶段与库统计适配器调用、内容识别与导出的次数、往返、字节数与耗时分布
+
+    适配器调用的往返次数：同步实例取会话层实际发送的语句数（BaseDatabase.round_trips 的增量），
+    异步实例（并发调用无法按次归属）按语句估算，每次调用 1 次、批量字段目录模式下命中内存目录的
+    list_columns 不计；流式读取另按 fetch_batch 每批计 1 次
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._stats: Dict[Tuple[str, str], PhaseStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, db_name: str, seconds: float, round_trips: int = 0, rows: int = 0,
+               size_bytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.get((phase, db_name))
+            if stats is None:
+                stats = self._stats[(phase, db_name)] = PhaseStats()
+            stats.add(seconds, round_trips, rows, size_bytes, error)
+
+    # ---------- 埋点 ----------
+
+    def _round_trips(self, instance: Any, phase: str, rows: int, statements: Optional[int]) -> int:
+        fetches = rows // max(1, getattr(instance, "fetch_batch", 1000) or 1000) if phase == "fetch_top_rows" else 0
+        if statements is not None:
+            return statements + fetches
+        if phase == "list_columns" and getattr(instance, "catalog_mode", "table") != "table":
+            return 0
+        return 1 + fetches
+
+    def _observe(self, instance: Any, phase: str, args: tuple, started: float, result: Any, error: bool,
+                 statements: Optional[int] = None) -> None:
+        seconds = time.perf_counter() - started
+        db_name = NO_DATABASE if phase in INSTANCE_PHASES or not args else str(args[0] or NO_DATABASE)
+        rows, size_bytes = 0, 0
+        if phase == "fetch_top_rows" and not error:
+            rows, size_bytes = estimate_rows_bytes(result)
+        elif phase in ("list_databases", "list_tables", "list_columns") and isinstance(result, list):
+            rows = len(result)
+        self.record(phase, db_name, seconds, 0 if error else self._round_trips(instance, phase, rows, statements),
+                    rows, size_bytes, error)
+
+    def _wrap(self, instance: Any, phase: str, method: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await method(*args, **kwargs)
+                except Exception:
+                    self._observe(instance, phase, args, started, None, True)
+                    raise
+                self._observe(instance, phase, args, started, result, False)
+                return result
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            sent = getattr(instance, "round_trips", None)
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self._observe(instance, phase, args, started, None, True)
+                raise
+            statements = instance.round_trips - sent if isinstance(sent, int) else None
+            self._observe(instance, phase, args, started, result, False, statements)
+            return result
+        return wrapper
+
+    def instrument(self, instance: Any) -> Any:
+        """为（同步或异步）数据库实例的适配器方法加埋点，返回原实例；实例为空时原样返回"""
+        if instance is None:
+            return None
+        for phase in ADAPTER_PHASES:
+            method = getattr(instance, phase, None)
+            if method is not None:
+                setattr(instance, phase, self._wrap(instance, phase, method))
+        return instance
+
+    def instrument_classifier(self, classifier: Any) -> Any:
+        """内容识别埋点（按调用统计行数与耗时，不区分库）"""
+        if classifier is None:
+            return None
+        classify_rows = classifier.classify_rows
+
+        @functools.wraps(classify_rows)
+        def wrapper(rows: Iterable[Dict]):
+            started = time.perf_counter()
+            try:
+                result = classify_rows(rows)
+            except Exception:
+                self.record("classify", NO_DATABASE, time.perf_counter() - started, error=True)
+                raise
+            self.record("classify", NO_DATABASE, time.perf_counter() - started,
+                        rows=len(rows) if isinstance(rows, (list, RowSpool)) else 0)
+            return result
+
+        classifier.classify_rows = wrapper
+        return classifier
+
+    def instrument_exporter(self, exporter: Any) -> Any:
+        """导出埋点：逐表写出按库统计（字节数为 JSON Lines 文件增量），关闭与合并 JSON 单独统计"""
+        write, close = exporter.write, exporter.close
+
+        def jsonl_size() -> int:
+            return os.path.getsize(exporter.jsonl_path) if os.path.exists(exporter.jsonl_path) else 0
+
+        @functools.wraps(write)
+        def write_wrapper(item: Dict) -> None:
+            started, size_before = time.perf_counter(), jsonl_size()
+            try:
+                write(item)
+            except Exception:
+                self.record("export_write", item.get("数据库名", NO_DATABASE), time.perf_counter() - started,
+                            error=True)
+                raise
+            self.record("export_write", item.get("数据库名", NO_DATABASE), time.perf_counter() - started,
+                        rows=item.get("提取数据行数", 0), size_bytes=jsonl_size() - size_before)
+
+        @functools.wraps(close)
+        def close_wrapper() -> None:
+            if getattr(exporter, "_closed", False):
+                return close()
+            started = time.perf_counter()
+            try:
+                close()
+            finally:
+                self.record("export_close", NO_DATABASE, time.perf_counter() - started)
+
+        exporter.write, exporter.close = write_wrapper, close_wrapper
+        return exporter
+
+    # ---------- 报告 ----------
+
+    def report(self) -> Dict:
+        with self._lock:
+            items = sorted(self._stats.items())
+        phases: Dict[str, PhaseStats] = {}
+        for (phase, _), stats in items:
+            total = phases.setdefault(phase, PhaseStats())
+            total.count += stats.count
+            total.errors += stats.errors
+            total.round_trips += stats.round_trips
+            total.rows += stats.rows
+            total.bytes += stats.bytes
+            total.seconds += stats.seconds
+            total.max_seconds = max(total.max_seconds, stats.max_seconds)
+            total.buckets = [a + b for a, b in zip(total.buckets, stats.buckets)]
+        databases: Dict[str, Dict] = {}
+        for (phase, db_name), stats in items:
+            databases.setdefault(db_name, {})[phase] = stats.to_dict()
+        return {
+            "target": self.target,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_seconds": round(time.perf_counter() - self._started, 3),
+            "phases": {phase: stats.to_dict() for phase, stats in phases.items()},
+            "databases": databases,
+        }
+
+    def prometheus_text(self) -> str:
+        """Prometheus 文本格式（可放入 node_exporter textfile 目录或推送到 Pushgateway）"""
+        with self._lock:
+            items = sorted(self._stats.items())
+
+        def labels(phase: str, db_name: str, **extra) -> str:
+            pairs = {"target": self.target, "phase": phase, "database": db_name, **extra}
+            escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+                       for key, value in pairs.items())
+            return "{" + ",".join(escaped) + "}"
+
+        lines = ["# HELP sensitive_scan_phase_seconds 各阶段单次调用耗时（秒）",
+                 "# TYPE sensitive_scan_phase_seconds histogram"]
+        for (phase, db_name), stats in items:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f"sensitive_scan_phase_seconds_bucket{labels(phase, db_name, le=bound)} {cumulative}")
+            lines.append(f"sensitive_scan_phase_seconds_bucket{labels(phase, db_name, le='+Inf')} {stats.count}")
+            lines.append(f"sensitive_scan_phase_seconds_sum{labels(phase, db_name)} {stats.seconds:.6f}")
+            lines.append(f"sensitive_scan_phase_seconds_count{labels(phase, db_name)} {stats.count}")
+        for metric, attr, help_text in (
+            ("sensitive_scan_phase_errors_total", "errors", "各阶段失败次数"),
+            ("sensitive_scan_phase_round_trips_total", "round_trips", "各阶段估算的数据库往返次数"),
+            ("sensitive_scan_phase_rows_total", "rows", "各阶段返回的行数（库表枚举为条目数）"),
+            ("sensitive_scan_phase_bytes_total", "bytes", "各阶段传输或写出的字节数（估算）"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{labels(phase, db_name)} {getattr(stats, attr)}" for (phase, db_name), stats in items)
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self) -> None:
+        phases = self.report()["phases"]
+        total = sum(stats["seconds"] for stats in phases.values()) or 1.0
+        logger.info("\n各阶段耗时（多线程/异步时为各调用耗时之和）：")
+        for phase, stats in sorted(phases.items(), key=lambda item: -item[1]["seconds"]):
+            logger.info(f"  {phase:<24} 调用 {stats['count']:>8} 次  耗时 {stats['seconds']:>10.2f} 秒"
+                        f"（{stats['seconds'] / total:>6.1%}）  p95 {stats['p95_seconds']} 秒  "
+                        f"往返 {stats['round_trips']} 次  {stats['bytes']} 字节  失败 {stats['errors']} 次")
+
+    def write_reports(self, output_dir: str, timestamp: str) -> List[str]:
+        """写出 profile_<时间戳>.json 与 profile_<时间戳>.prom，返回文件路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, f"profile_{timestamp}.json")
+        prom_path = os.path.join(output_dir, f"profile_{timestamp}.prom")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        self.log_summary()
+        logger.info(f"性能分析报告已保存：{json_path}、{prom_path}")
+        return [json_path, prom_path]
@@ -0,0 +1,52 @@
+import pickle
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Union
+
+
+class RowSpool:
+    """行数据落盘缓冲：逐行 pickle 追加到临时文件（保留原始类型），可多次顺序迭代，内存占用与行数无关"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._count = 0
+
+    def append(self, row: Dict) -> None:
+        pickle.dump(row, self._file, pickle.HIGHEST_PROTOCOL)
+        self._count += 1
+
+    def extend(self, rows: Iterable[Dict]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        """临时文件已写入的字节数（pickle 序列化后的大小）"""
+        self._file.flush()
+        return self._file.seek(0, 2)
+
+    def __iter__(self) -> Iterator[Dict]:
+        self._file.flush()
+        self._file.seek(0)
+        for _ in range(self._count):
+            yield pickle.load(self._file)
+        self._file.seek(0, 2)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def collect_rows(row_iter: Iterable[Dict], memory_rows: int) -> Union[List[Dict], RowSpool]:
+    """收集查询结果：不超过 memory_rows 行时返回列表，超出后整体转存到 RowSpool"""
+    rows: List[Dict] = []
+    row_iter = iter(row_iter)
+    for row in row_iter:
+        rows.append(row)
+        if len(rows) > memory_rows:
+            spool = RowSpool()
+            spool.extend(rows)
+            spool.extend(row_iter)
+            return spool
+    return rows
@@ -0,0 +1,399 @@
+import time
+import threading
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from db.base_db import BaseDatabase
+from common.logger import logger
+from common.exception_handler import BaseExtractorError
+from common.content_classifier import ContentClassifier
+from common.checkpoint import CheckpointJournal
+from common.schema_cache import SchemaCache
+from common.scan_planner import PlannedUnit, ScanPlanner
+from common.circuit_breaker import TableCircuitBreaker
+from common.throttle import AdaptiveThrottle
+from common.row_spool import RowSpool
+
+# 工作单元：(数据库名, 表名)
+WorkUnit = Tuple[str, str]
+
+
+def build_table_result(db_type: str, db_name: str, table_name: str, columns: List[Dict], rows: List[Dict],
+                       content_classifier: Optional[ContentClassifier] = None) -> Dict:
+    """组装单个表的扫描结果（同步与异步扫描共用）"""
+    sensitive_cols = [col for col in columns if col["is_sensitive"]]
+    result = {
+        "数据库类型": db_type,
+        "数据库名": db_name,
+        "表名": table_name,
+        "敏感字段数": len(sensitive_cols),
+        "敏感字段列表": [col["column_name"] for col in sensitive_cols],
+        "敏感字段详情": columns,
+        "提取数据行数": len(rows),
+    }
+    if content_classifier:
+        # 按字段值内容识别：各类型命中率 + 识别类型
+        result["内容识别"] = content_classifier.classify_rows(rows)
+    result["提取时间"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    result["rows"] = rows
+    return result
+
+
+def scan_table(db_instance: BaseDatabase, db_type: str, db_name: str, table_name: str,
+               content_classifier: Optional[ContentClassifier] = None,
+               columns: Optional[List[Dict]] = None, probe_empty: bool = False) -> Optional[Dict]:
+    """扫描单个表：识别敏感字段并提取样本数据，无敏感字段时返回 None（columns 为已知字段信息时不再查询目录）；
+    probe_empty 为 True（统计为空的表）时先探测是否确有数据，确认为空则不发起取数查询，结果行数为 0"""
+    if columns is None:
+        columns = db_instance.list_columns(db_name, table_name)
+    sensitive_count = sum(1 for col in columns if col["is_sensitive"])
+    if not sensitive_count:
+        logger.info(f"  表 {db_name}.{table_name}：无敏感字段，跳过")
+        return None
+
+    if probe_empty and db_instance.table_has_rows(db_name, table_name) is False:
+        logger.info(f"  表 {db_name}.{table_name}：发现 {sensitive_count} 个敏感字段，探测确认为空表，不提取数据")
+        return build_table_result(db_type, db_name, table_name, columns, [], content_classifier)
+
+    logger.info(f"  表 {db_name}.{table_name}：发现 {sensitive_count} 个敏感字段 → 提取前 {db_instance.extract_rows} 行数据")
+    rows = db_instance.fetch_top_rows(db_name, table_name, columns)
+    return build_table_result(db_type, db_name, table_name, columns, rows, content_classifier)
+
+
+def summarize_result(result: Dict) -> Dict:
+    """提取结果摘要（不含字段详情与行数据），供流式导出后打印汇总"""
+    return {key: value for key, value in result.items() if key not in ("敏感字段详情", "rows")}
+
+
+def skip_done_units(units: List[WorkUnit], journal: Optional[CheckpointJournal]) -> List[WorkUnit]:
+    """续扫时跳过检查点中已完成的单元"""
+    if not journal:
+        return units
+    remaining = [unit for unit in units if not journal.is_done(unit)]
+    if len(remaining) < len(units):
+        logger.info(f"续扫：跳过已完成的 {len(units) - len(remaining)} 个表")
+    return remaining
+
+
+class ScanRun:
+    """一次扫描的调度无关部分（ScanEngine 与 AsyncScanner 共用）：按枚举顺序收集结果、记录检查点与失败次数，
+    逐轮产出待扫描单元（首轮全部单元，之后为失败且未熔断的单元），结束时汇总失败与预算跳过的单元"""
+
+    def __init__(self, units: List[WorkUnit], on_result: Optional[Callable[[Dict], None]],
+                 journal: Optional[CheckpointJournal], max_retries: int,
+                 circuit_breaker: Optional[TableCircuitBreaker], budget_exhausted: Callable[[], bool]):
+        self.units = units
+        self.on_result = on_result
+        self.journal = journal
+        self.max_retries = max_retries
+        self.circuit_breaker = circuit_breaker
+        self.budget_exhausted = budget_exhausted
+        self.collected: List[Dict] = []
+        self.finished = set()
+        # 重试后仍失败的单元及原因
+        self.failed_units: Dict[WorkUnit, str] = {}
+        # 因时间预算用尽未扫描的单元
+        self.budget_skipped: List[WorkUnit] = []
+        self.attempts: Dict[WorkUnit, int] = {}
+        if journal:
+            self.attempts = {unit: record.get("attempts", 0) for unit, record in journal.failed_units.items()}
+
+    def passes(self) -> Iterator[List[WorkUnit]]:
+        """逐轮产出待扫描单元，调用方在取下一轮前完成本轮全部单元"""
+        units = self.units
+        for retry in range(self.max_retries + 1):
+            if self.budget_exhausted():
+                return
+            if retry:
+                # 熔断的表（查询超时）不再重试
+                units = [unit for unit in units if unit in self.failed_units
+                         and not (self.circuit_breaker and self.circuit_breaker.is_open(unit))]
+                if not units:
+                    return
+                logger.info(f"\n第 {retry} 次重试：{len(units)} 个失败表")
+            yield units
+
+    def complete(self, unit: WorkUnit, result: Optional[Dict], error: Optional[str]) -> None:
+        """按枚举顺序处理单个单元的结果（成功结果交给 on_result 后记录检查点）"""
+        self.finished.add(unit)
+        if error is not None:
+            attempts = self.attempts[unit] = self.attempts.get(unit, 0) + 1
+            self.failed_units[unit] = error
+            logger.warning(f"  表 {unit[0]}.{unit[1]}：扫描失败（累计 {attempts} 次）：{error}")
+            if self.journal:
+                self.journal.record_failed(unit, error, attempts)
+            return
+
+        self.failed_units.pop(unit, None)
+        if result:
+            if self.on_result is None:
+                self.collected.append(result)
+            else:
+                try:
+                    self.on_result(result)
+                finally:
+                    # 转存到临时文件的样本行在交给 on_result 后即可释放，不等待垃圾回收
+                    if isinstance(result["rows"], RowSpool):
+                        result["rows"].close()
+                self.collected.append(summarize_result(result))
+        # 结果落盘后再记录检查点，保证续扫时不丢结果
+        if self.journal:
+            self.journal.record_done(unit, bool(result))
+
+    def finish(self) -> List[Dict]:
+        """汇总重试后仍失败与因时间预算未扫描的单元，返回收集的结果（或摘要）"""
+        if self.failed_units:
+            logger.warning(f"共 {len(self.failed_units)} 个表重试后仍失败，可使用 --resume 续扫")
+        self.budget_skipped = [unit for unit in self.units if unit not in self.finished]
+        if self.budget_skipped:
+            logger.warning(f"时间预算已用尽：{len(self.budget_skipped)} 个表未扫描，可使用 --resume 继续")
+        return self.collected
+
+
+class ScanEngine:
+    """并发扫描引擎：主连接负责枚举库表，(库, 表) 工作单元分发给线程池，每个工作线程持有独立连接"""
+
+    def __init__(self, db_instance: BaseDatabase, instance_factory: Callable[[], Optional[BaseDatabase]],
+                 db_type: str, workers: int = 1, content_classifier: Optional[ContentClassifier] = None,
+                 journal: Optional[CheckpointJournal] = None, max_retries: int = 0,
+                 schema_cache: Optional[SchemaCache] = None, planner: Optional[ScanPlanner] = None,
+                 time_budget: Optional[float] = None, circuit_breaker: Optional[TableCircuitBreaker] = None,
+                 throttle: Optional[AdaptiveThrottle] = None):
+        self.db_instance = db_instance
+        self.instance_factory = instance_factory
+        self.db_type = db_type
+        self.workers = max(1, workers)
+        self.content_classifier = content_classifier
+        self.journal = journal
+        self.max_retries = max(0, max_retries)
+        self.schema_cache = schema_cache
+        self.planner = planner
+        # 时间预算（秒）：到期后不再开始新的表，已开始的表正常完成
+        self.time_budget = time_budget
+        self._deadline: Optional[float] = None
+        self.circuit_breaker = circuit_breaker
+        # 负载自适应限速：按服务端负载动态限制在途扫描数与表间间隔（上限为 workers）
+        self.throttle = throttle
+        # 各库的表变更指纹（启用字段元数据缓存时在枚举阶段批量获取）
+        self._fingerprints: Dict[str, Dict[str, str]] = {}
+        # 各库的表统计信息及查询耗时（启用扫描规划时在枚举阶段批量获取）
+        self._stats: Dict[str, Dict[str, Dict]] = {}
+        self._stats_seconds: List[float] = []
+        # 统计为空的单元（扫描时先探测是否确有数据）
+        self._estimated_empty = set()
+        # 重试后仍失败的单元及原因
+        self.failed_units: Dict[WorkUnit, str] = {}
+        # 因时间预算用尽未扫描的单元
+        self.budget_skipped: List[WorkUnit] = []
+        self._local = threading.local()
+        self._worker_instances: List[BaseDatabase] = []
+        self._lock = threading.Lock()
+
+    def enumerate_units(self) -> List[WorkUnit]:
+        """通过主连接枚举所有 (库, 表) 工作单元，顺序与目录顺序一致"""
+        units = []
+        databases = self.db_instance.list_databases()
+        logger.info(f"\n共发现 {len(databases)} 个非系统数据库")
+
+        for db_name in databases:
+            logger.info(f"\n--- 开始处理数据库：{db_name} ---")
+            tables = self.db_instance.list_tables(db_name)
+            logger.info(f"数据库 {db_name} 包含 {len(tables)} 个表")
+            if self.schema_cache:
+                self._fingerprints[db_name] = self.db_instance.get_table_fingerprints(db_name)
+            if self.planner:
+                self._load_stats(db_name)
+            units.extend((db_name, table_name) for table_name in tables)
+        return units
+
+    def _load_stats(self, db_name: str) -> None:
+        """获取库内表统计信息并记录查询耗时（作为单次往返耗时的估计）；无权限等失败时按未知统计处理"""
+        started = time.monotonic()
+        try:
+            self._stats[db_name] = self.db_instance.get_table_stats(db_name)
+        except Exception as e:
+            logger.warning(f"获取数据库 {db_name} 的表统计信息失败，按未知统计规划：{str(e)}")
+            return
+        self._stats_seconds.append(time.monotonic() - started)
+
+    def plan(self, units: List[WorkUnit]) -> Tuple[List[PlannedUnit], List[PlannedUnit]]:
+        """按目录统计信息规划扫描顺序，返回 (待扫描单元, 统计为空的单元)"""
+        sensitive_counts: Dict[WorkUnit, int] = {}
+        for db_name in dict.fromkeys(unit[0] for unit in units):
+            # 批量目录模式下敏感字段数在扫描前已知
+            catalog = self.db_instance.get_catalog(db_name)
+            for table_name, columns in (catalog or {}).items():
+                sensitive_counts[(db_name, table_name)] = sum(1 for col in columns if col["is_sensitive"])
+        round_trip = sum(self._stats_seconds) / len(self._stats_seconds) if self._stats_seconds else None
+        return self.planner.plan(units, self._stats, sensitive_counts, round_trip)
+
+    def _budget_exhausted(self) -> bool:
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def _get_worker_instance(self) -> BaseDatabase:
+        """获取当前线程的数据库连接（首次使用时创建）"""
+        instance = getattr(self._local, "db_instance", None)
+        if instance is None:
+            instance = self.instance_factory()
+            if not instance or not instance.connect():
+                raise BaseExtractorError("工作线程数据库连接失败")
+            # 主连接枚举时已加载批量字段目录，工作连接直接复用
+            instance.share_catalog(self.db_instance)
+            if self.throttle:
+                instance.statement_observer = self.throttle.record_latency
+            self._local.db_instance = instance
+            with self._lock:
+                self._worker_instances.append(instance)
+        return instance
+
+    def _reset_worker_instance(self) -> None:
+        """断开并丢弃当前线程的连接（连接可能已失效），下一个单元会重新建立连接"""
+        instance = getattr(self._local, "db_instance", None)
+        if instance is None:
+            return
+        self._local.db_instance = None
+        with self._lock:
+            if instance in self._worker_instances:
+                self._worker_instances.remove(instance)
+        instance.disconnect()
+
+    def _load_columns(self, instance: BaseDatabase, unit: WorkUnit) -> List[Dict]:
+        """获取表字段信息：结构指纹未变时复用持久化缓存，否则查询目录并回写缓存"""
+        db_name, table_name = unit
+        if not self.schema_cache:
+            return instance.list_columns(db_name, table_name)
+        fingerprint = self._fingerprints.get(db_name, {}).get(table_name)
+        columns = self.schema_cache.get(db_name, table_name, fingerprint)
+        if columns is None:
+            columns = instance.list_columns(db_name, table_name)
+            self.schema_cache.put(db_name, table_name, fingerprint, columns)
+        return columns
+
+    def _timed_scan(self, instance: BaseDatabase, unit: WorkUnit) -> Optional[Dict]:
+        """扫描单个表（启用限速时先占用扫描名额）并把耗时与结果交给熔断器"""
+        db_name, table_name = unit
+        with self.throttle.slot() if self.throttle else nullcontext():
+            started = time.monotonic()
+            try:
+                result = scan_table(instance, self.db_type, db_name, table_name, self.content_classifier,
+                                    self._load_columns(instance, unit), unit in self._estimated_empty)
+            except Exception as e:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record(unit, time.monotonic() - started, str(e))
+                raise
+        if self.circuit_breaker:
+            self.circuit_breaker.record(unit, time.monotonic() - started)
+        return result
+
+    def _scan_unit(self, unit: WorkUnit) -> Optional[Dict]:
+        instance = self._get_worker_instance()
+        try:
+            return self._timed_scan(instance, unit)
+        except Exception:
+            self._reset_worker_instance()
+            raise
+
+    def _scan_unit_serial(self, unit: WorkUnit) -> Optional[Dict]:
+        try:
+            return self._timed_scan(self.db_instance, unit)
+        except Exception:
+            # 单线程复用主连接，失败后尝试重连，后续单元继续扫描
+            try:
+                self.db_instance.reconnect()
+            except Exception as e:
+                logger.error(f"主连接重连失败：{str(e)}")
+            raise
+
+    def run(self, on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """执行扫描，按枚举顺序产出含敏感数据的表结果
+
+        未提供 on_result 时返回完整结果列表；提供时每个结果按顺序交给 on_result（如流式导出），
+        返回值只保留摘要，内存不随扫描规模增长。单表失败不会终止任务：失败单元记入检查点，
+        在本轮扫描结束后重试，重试仍失败的单元保存在 failed_units 中
+        """
+        self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        units = skip_done_units(self.enumerate_units(), self.journal)
+        if self.planner:
+            planned, empty = self.plan(units)
+            ScanPlanner.log_plan(planned, empty, self.workers)
+            self._estimated_empty = {item.unit for item in empty}
+            units = [item.unit for item in planned + empty]
+        logger.info(f"共 {len(units)} 个待扫描表，并发数：{self.workers}")
+
+        scan_run = ScanRun(units, on_result, self.journal, self.max_retries, self.circuit_breaker,
+                           self._budget_exhausted)
+        self.failed_units = scan_run.failed_units
+        if self.throttle:
+            # 扫描语句的执行延迟作为限速器的延迟信号（单线程时扫描复用主连接）
+            self.db_instance.statement_observer = self.throttle.record_latency
+            self.throttle.start()
+        try:
+            for pass_units in scan_run.passes():
+                if self.workers == 1:
+                    self._run_serial(pass_units, scan_run.complete)
+                else:
+                    self._run_parallel(pass_units, scan_run.complete)
+        finally:
+            if self.throttle:
+                self.throttle.stop()
+                self.db_instance.statement_observer = None
+        collected = scan_run.finish()
+        self.budget_skipped = scan_run.budget_skipped
+        return collected
+
+    def _run_serial(self, units: List[WorkUnit], complete: Callable) -> None:
+        """单线程直接复用主连接，行为与逐表扫描一致"""
+        for unit in units:
+            if self._budget_exhausted():
+                return
+            try:
+                result = self._scan_unit_serial(unit)
+            except Exception as e:
+                complete(unit, None, str(e))
+                continue
+            complete(unit, result, None)
+
+    def _run_parallel(self, units: List[WorkUnit], complete: Callable) -> None:
+        """按窗口提交工作单元，已完成但未轮到输出的结果暂存在重排缓冲区中，保证输出顺序确定"""
+        max_pending = self.workers * 4
+        unit_iter = iter(enumerate(units))
+        in_flight: Dict[Future, int] = {}
+        pending: Dict[int, Tuple[Optional[Dict], Optional[str]]] = {}
+        next_idx = 0
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan-worker")
+
+        def submit_more() -> None:
+            while len(in_flight) < self.workers * 2 and len(pending) < max_pending:
+                if self._budget_exhausted():
+                    return
+                item = next(unit_iter, None)
+                if item is None:
+                    return
+                idx, unit = item
+                in_flight[executor.submit(self._scan_unit, unit)] = idx
+
+        try:
+            submit_more()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = in_flight.pop(future)
+                    error = future.exception()
+                    pending[idx] = (None, str(error)) if error else (future.result(), None)
+                while next_idx in pending:
+                    result, error = pending.pop(next_idx)
+                    complete(units[next_idx], result, error)
+                    next_idx += 1
+                submit_more()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self._close_worker_instances()
+
+    def _close_worker_instances(self) -> None:
+        """断开所有工作线程的连接"""
+        with self._lock:
+            instances, self._worker_instances = self._worker_instances, []
+        for instance in instances:
+            instance.disconnect()
@@ -0,0 +1,101 @@
+import math
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from common.logger import logger
+
+# 工作单元：(数据库名, 表名)
+WorkUnit = Tuple[str, str]
+# 目录统计信息：{"rows": 估算行数, "bytes": 数据大小}
+TableStats = Dict[str, Optional[int]]
+
+
+class PlannedUnit(NamedTuple):
+    unit: WorkUnit
+    rows: Optional[int]
+    size_bytes: Optional[int]
+    # 已知的敏感字段数（逐表目录模式下扫描前未知，为 None）
+    sensitive_columns: Optional[int]
+    est_seconds: float
+    score: float
+
+
+def format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "未知"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+class ScanPlanner:
+    """基于目录统计信息的扫描规划器
+
+    按库批量获取的行数/大小估算每个表的扫描成本，按「价值 / 成本」降序排列，使时间预算内优先完成收益最高的表。
+    统计为空的表排在最后：行数统计是估算值（MySQL 8 的 TABLE_ROWS 还会缓存最长 24 小时），
+    不能据此跳过，只作为取数前先探测是否确有数据的提示，字段识别结果照常输出
+    """
+
+    # 单次查询往返耗时的默认估计（未测得实际往返耗时时使用）及下限
+    DEFAULT_ROUND_TRIP = 0.02
+    MIN_ROUND_TRIP = 0.001
+    # 样本数据传输吞吐的估计（字节/秒）
+    THROUGHPUT_BYTES_PER_SECOND = 20 * 1024 * 1024
+    # 缺少统计信息时的平均行大小估计
+    DEFAULT_ROW_BYTES = 512
+
+    def __init__(self, extract_rows: int):
+        self.extract_rows = extract_rows
+
+    def estimate(self, unit: WorkUnit, stats: Optional[TableStats], sensitive_columns: Optional[int],
+                 round_trip: float) -> PlannedUnit:
+        """估算单个表的扫描耗时与价值得分"""
+        rows = stats.get("rows") if stats else None
+        size_bytes = stats.get("bytes") if stats else None
+        row_bytes = size_bytes / rows if rows and size_bytes else self.DEFAULT_ROW_BYTES
+        sample_rows = min(rows, self.extract_rows) if rows is not None else self.extract_rows
+
+        if sensitive_columns == 0:
+            # 字段目录已在内存中且无敏感字段：不会发起任何查询
+            return PlannedUnit(unit, rows, size_bytes, 0, 0.0, 0.0)
+
+        # 字段目录未批量加载时需要额外一次字段查询
+        statements = 1 if sensitive_columns is not None else 2
+        est_seconds = statements * round_trip + sample_rows * row_bytes / self.THROUGHPUT_BYTES_PER_SECOND
+        # 价值：敏感字段越多、数据量越大，泄露面越大（行数按对数计）
+        value = (sensitive_columns or 1) * math.log10((rows if rows is not None else self.extract_rows) + 10)
+        return PlannedUnit(unit, rows, size_bytes, sensitive_columns, est_seconds, value / est_seconds)
+
+    def plan(self, units: List[WorkUnit], stats_by_db: Dict[str, Dict[str, TableStats]],
+             sensitive_counts: Optional[Dict[WorkUnit, int]] = None,
+             round_trip: Optional[float] = None) -> Tuple[List[PlannedUnit], List[PlannedUnit]]:
+        """返回 (按价值/成本降序的待扫描单元, 统计为空的单元)；得分相同时保持目录顺序，
+        调用方在前者之后扫描统计为空的单元，取数前先探测"""
+        round_trip = max(round_trip or self.DEFAULT_ROUND_TRIP, self.MIN_ROUND_TRIP)
+        sensitive_counts = sensitive_counts or {}
+        planned, empty = [], []
+        for unit in units:
+            item = self.estimate(unit, stats_by_db.get(unit[0], {}).get(unit[1]), sensitive_counts.get(unit),
+                                 round_trip)
+            if item.rows == 0:
+                empty.append(item)
+            else:
+                planned.append(item)
+        planned.sort(key=lambda item: -item.score)
+        return planned, empty
+
+    @staticmethod
+    def log_plan(planned: List[PlannedUnit], empty: List[PlannedUnit], workers: int, verbose: bool = False) -> None:
+        """输出规划摘要；verbose 时逐表列出估算值（--plan-only）"""
+        total_seconds = sum(item.est_seconds for item in planned + empty)
+        logger.info(f"\n扫描规划：待扫描 {len(planned)} 个表，统计为空 {len(empty)} 个（排在最后，取数前先探测），"
+                    f"预计耗时约 {total_seconds / max(1, workers):.1f} 秒（并发数 {workers}）")
+        if not verbose:
+            return
+        for idx, item in enumerate(planned, 1):
+            sensitive = "未知" if item.sensitive_columns is None else item.sensitive_columns
+            rows = "未知" if item.rows is None else item.rows
+            logger.info(f"  {idx}. {item.unit[0]}.{item.unit[1]}：行数≈{rows}，大小≈{format_bytes(item.size_bytes)}，"
+                        f"敏感字段 {sensitive}，预计 {item.est_seconds:.3f} 秒，得分 {item.score:.2f}")
+        for item in empty:
+            logger.info(f"  统计为空：{item.unit[0]}.{item.unit[1]}")
@@ -0,0 +1,88 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from config.sensitive_keywords import SENSITIVE_FIELD_KEYWORDS
+from common.logger import logger
+
+# 敏感关键词规则的摘要：规则变更后旧缓存的分类结果自动失效
+RULES_DIGEST = hashlib.sha1(
+    json.dumps(SENSITIVE_FIELD_KEYWORDS, ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+class SchemaCache:
+    """跨任务持久化的字段元数据缓存（SQLite 文件）
+
+    以 目标实例/库/表 为键保存已分类的字段信息，并以服务端的表变更指纹
+    （MySQL 字段定义哈希、Oracle last_ddl_time、SQL Server modify_date）校验有效性，
+    指纹未变的表直接复用缓存，无需再查询字段目录
+    """
+
+    # 累计写入多少条后提交一次，避免逐表提交带来的磁盘同步开销
+    COMMIT_INTERVAL = 200
+
+    def __init__(self, path: str, db_type: str, host: str, port: int):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.target = f"{db_type}://{host}:{port}"
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS column_cache (
+                target TEXT NOT NULL,
+                db_name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                PRIMARY KEY (target, db_name, table_name)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _versioned(fingerprint: str) -> str:
+        return f"{RULES_DIGEST}|{fingerprint}"
+
+    def get(self, db_name: str, table_name: str, fingerprint: Optional[str]) -> Optional[List[Dict]]:
+        """指纹一致时返回缓存的字段信息，否则返回 None"""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, columns FROM column_cache WHERE target = ? AND db_name = ? AND table_name = ?",
+                (self.target, db_name, table_name)
+            ).fetchone()
+            if row and row[0] == self._versioned(fingerprint):
+                self.hits += 1
+                return json.loads(row[1])
+            self.misses += 1
+            return None
+
+    def put(self, db_name: str, table_name: str, fingerprint: Optional[str], columns: List[Dict]) -> None:
+        """写入（覆盖）表的字段信息；无指纹的表不缓存"""
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO column_cache (target, db_name, table_name, fingerprint, columns) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.target, db_name, table_name, self._versioned(fingerprint),
+                 json.dumps(columns, ensure_ascii=False, default=str))
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+        logger.info(f"字段元数据缓存：命中 {self.hits} 个表，未命中 {self.misses} 个表（{self.path}）")
@@ -0,0 +1,98 @@
+import os
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple
+from common.logger import logger
+from common.exception_handler import ExportError
+
+# 分片方式：database=每个库一个分片文件，table=每个表一个分片文件
+SHARD_MODES = ("database", "table")
+INDEX_FILE = "index.json"
+
+
+class ShardWriter:
+    """分片导出：逐表把结果追加到分片 JSON Lines 文件（sensitive_data_<时间戳>_shards/），记录每个表所在分片、
+    字节偏移与长度；结束时写出 index.json（库 → 表 → 敏感字段、样本行数、分片位置），
+    查看器只需加载索引，选中表时按偏移切片读取单行，无需解析全部结果"""
+
+    def __init__(self, output_dir: str, timestamp: str, shard_by: str = "database",
+                 encode: Callable[[Dict], Iterable[str]] = None):
+        self.shard_by = shard_by
+        self.shard_dir = os.path.join(output_dir, f"sensitive_data_{timestamp}_shards")
+        self.index_path = os.path.join(self.shard_dir, INDEX_FILE)
+        # encode 按片段产出单个表的 JSON 文本（与 JSON Lines 中的一行一致，不含换行）
+        self._encode = encode or (lambda item: [json.dumps(item, ensure_ascii=False)])
+        self._databases: Dict[Tuple, Dict] = {}
+        self._shard_sizes: Dict[str, int] = {}
+        self.count = 0
+        try:
+            # 续扫时由 JSON Lines 重建全部分片，先清理上次残留的分片与索引
+            os.makedirs(self.shard_dir, exist_ok=True)
+            for name in os.listdir(self.shard_dir):
+                if name == INDEX_FILE or name.endswith(".jsonl"):
+                    os.remove(os.path.join(self.shard_dir, name))
+        except OSError as e:
+            raise ExportError("shard", str(e)) from e
+
+    def _database_entry(self, item: Dict) -> Dict:
+        key = (item.get("目标"), item["数据库类型"], item["数据库名"])
+        entry = self._databases.get(key)
+        if entry is None:
+            entry = self._databases[key] = {
+                "target": key[0], "db_type": key[1], "database": key[2],
+                "shard": f"db_{len(self._databases) + 1:04d}.jsonl" if self.shard_by == "database" else None,
+                "table_count": 0, "sensitive_column_count": 0, "row_count": 0, "tables": [],
+            }
+        return entry
+
+    def write(self, item: Dict) -> None:
+        """追加单个表的结果并记录其在分片中的位置"""
+        entry = self._database_entry(item)
+        shard = entry["shard"] or f"table_{self.count + 1:06d}.jsonl"
+        offset = self._shard_sizes.get(shard, 0)
+        length = 0
+        try:
+            with open(os.path.join(self.shard_dir, shard), "ab") as f:
+                for chunk in self._encode(item):
+                    data = chunk.encode("utf-8")
+                    f.write(data)
+                    length += len(data)
+                f.write(b"\n")
+        except Exception as e:
+            raise ExportError("shard", str(e)) from e
+        self._shard_sizes[shard] = offset + length + 1
+
+        entry["tables"].append({
+            "table": item["表名"],
+            "sensitive_column_count": item["敏感字段数"],
+            "sensitive_columns": item["敏感字段列表"],
+            "rows": item["提取数据行数"],
+            "shard": shard,
+            "offset": offset,
+            "length": length,
+        })
+        entry["table_count"] += 1
+        entry["sensitive_column_count"] += item["敏感字段数"]
+        entry["row_count"] += item["提取数据行数"]
+        self.count += 1
+
+    def close(self) -> None:
+        """写出索引文件（紧凑 JSON，库按写入顺序、库内表按名称排序）"""
+        databases: List[Dict] = list(self._databases.values())
+        for entry in databases:
+            entry["tables"].sort(key=lambda table: table["table"])
+        index = {
+            "version": 1,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "shard_by": self.shard_by,
+            "database_count": len(databases),
+            "table_count": self.count,
+            "shard_count": len(self._shard_sizes),
+            "databases": databases,
+        }
+        try:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        except Exception as e:
+            raise ExportError("shard", str(e)) from e
+        logger.info(f"分片结果已保存：{self.shard_dir}（{len(self._shard_sizes)} 个分片，索引 {INDEX_FILE}）")
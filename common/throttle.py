@@ -0,0 +1,185 @@
+import time
+import statistics
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from db.base_db import BaseDatabase
+from common.logger import logger
+
+
+class AdaptiveThrottle:
+    """负载自适应限速：后台线程用独立连接定期采样服务端负载（MySQL Threads_running、
+    SQL Server 活动请求数、Oracle 平均活动会话数），并汇总扫描连接上报的语句执行延迟，
+    按 AIMD 调整扫描并发度与表间间隔 —— 过载时并发减半（已为 1 时间隔翻倍），
+    恢复后先缩短间隔再逐个增加并发；并发度不超过 workers，间隔不超过 max_pacing"""
+
+    # 扫描语句延迟（每个采样周期取中位数）超过基线的倍数（且至少高出 LATENCY_SLACK 秒）视为过载
+    LATENCY_FACTOR = 3.0
+    LATENCY_SLACK = 0.05
+    # 延迟平滑系数（指数加权移动平均）
+    LATENCY_ALPHA = 0.3
+    # 间隔由 0 开始增加时的初始值（秒）及归零阈值
+    MIN_PACING = 0.1
+
+    def __init__(self, instance_factory: Callable[[], Optional[BaseDatabase]], max_concurrency: int,
+                 max_load: float, interval: float = 10.0, max_pacing: float = 5.0):
+        self.instance_factory = instance_factory
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_load = float(max_load)
+        self.interval = max(0.5, interval)
+        self.max_pacing = max_pacing
+        # 慢启动：从 1 个并发开始，负载正常时逐个增加
+        self.concurrency = 1
+        self.pacing = 0.0
+        self.adjustments = 0
+        self.peak_load: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._latency: Optional[float] = None
+        self._load_supported = True
+        # 扫描连接上报、尚未汇总的语句执行延迟（秒）
+        self._statement_latencies: List[float] = []
+        self._latency_lock = threading.Lock()
+        self._active = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sampler: Optional[BaseDatabase] = None
+
+    def start(self) -> None:
+        """建立采样连接并启动控制线程；采样连接不可用时以最大并发运行（不限速）"""
+        try:
+            self._sampler = self.instance_factory()
+            if not self._sampler or not self._sampler.connect():
+                raise RuntimeError("连接失败")
+        except Exception as e:
+            logger.warning(f"自适应限速采样连接建立失败，按最大并发 {self.max_concurrency} 扫描：{str(e)}")
+            self._sampler = None
+            self._set(self.max_concurrency, 0.0)
+            return
+        self._thread = threading.Thread(target=self._loop, name="throttle", daemon=True)
+        self._thread.start()
+        logger.info(f"自适应限速已启用：并发上限 {self.max_concurrency}，负载阈值 {self.max_load}，"
+                    f"采样间隔 {self.interval} 秒")
+
+    def stop(self) -> None:
+        """停止控制线程、断开采样连接，并释放所有等待中的扫描"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._sampler:
+            try:
+                self._sampler.disconnect()
+            except Exception:
+                pass
+        with self._cond:
+            self._cond.notify_all()
+        logger.info(f"自适应限速：调整 {self.adjustments} 次，最终并发 {self.concurrency}、间隔 {self.pacing:.2f} 秒"
+                    + (f"，峰值负载 {self.peak_load:g}" if self.peak_load is not None else ""))
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """占用一个扫描名额：在途扫描数达到当前并发度时等待，开始前按当前间隔暂停"""
+        with self._cond:
+            while self._active >= self.concurrency and not self._stop.is_set():
+                self._cond.wait()
+            self._active += 1
+            pacing = self.pacing
+        try:
+            if pacing:
+                time.sleep(pacing)
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify()
+
+    def _set(self, concurrency: int, pacing: float) -> None:
+        with self._cond:
+            self.concurrency = concurrency
+            self.pacing = pacing
+            self._cond.notify_all()
+
+    def record_latency(self, seconds: float) -> None:
+        """记录一条扫描语句的执行延迟（作为扫描连接的 statement_observer，由各工作线程调用）"""
+        with self._latency_lock:
+            self._statement_latencies.append(seconds)
+
+    def _drain_latency(self) -> Optional[float]:
+        """取出上个周期内扫描语句延迟的中位数；周期内没有扫描语句时返回 None"""
+        with self._latency_lock:
+            latencies, self._statement_latencies = self._statement_latencies, []
+        return statistics.median(latencies) if latencies else None
+
+    def _sample(self) -> Dict[str, Optional[float]]:
+        """采样一次服务端负载（负载视图不可见时为 None），延迟取扫描语句的实测值；
+        采样连接的语句不计入延迟，也不计入任务的往返次数"""
+        load = None
+        if self._load_supported:
+            try:
+                load = self._sampler.sample_server_load()
+            except Exception as e:
+                self._load_supported = False
+                logger.warning(f"服务端负载不可见（权限不足或不支持），仅按扫描语句延迟限速：{str(e)}")
+        if not self._load_supported:
+            # 仍用最小语句探测服务端是否可达（失败视为过载），其耗时不参与延迟判断
+            self._sampler.ping()
+        return {"load": load, "latency": self._drain_latency()}
+
+    def _is_overloaded(self, load: Optional[float], latency: Optional[float], failed: bool) -> Optional[str]:
+        """判断是否过载，返回原因（未过载返回 None）；latency 为 None 表示周期内没有扫描语句"""
+        if failed:
+            return "负载采样失败"
+        if load is not None:
+            self.peak_load = load if self.peak_load is None else max(self.peak_load, load)
+            if load >= self.max_load:
+                return f"服务端负载 {load:g} ≥ {self.max_load:g}"
+        if latency is None:
+            return None
+        self._latency = latency if self._latency is None else \
+            self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * self._latency
+        self._baseline = self._latency if self._baseline is None else min(self._baseline, self._latency)
+        threshold = max(self._baseline * self.LATENCY_FACTOR, self._baseline + self.LATENCY_SLACK)
+        if self._latency > threshold:
+            return f"扫描语句延迟 {self._latency * 1000:.0f}ms（基线 {self._baseline * 1000:.0f}ms）"
+        return None
+
+    def adjust(self, load: Optional[float], latency: Optional[float], failed: bool = False) -> None:
+        """按一次采样结果调整并发度与间隔（过载乘性减少，正常加性增加）；failed 表示负载采样失败"""
+        reason = self._is_overloaded(load, latency, failed)
+        concurrency, pacing = self.concurrency, self.pacing
+        if reason:
+            if concurrency > 1:
+                concurrency = max(1, concurrency // 2)
+            else:
+                pacing = min(self.max_pacing, max(self.MIN_PACING, pacing * 2))
+        elif pacing:
+            pacing = pacing / 2 if pacing / 2 >= self.MIN_PACING else 0.0
+        elif concurrency < self.max_concurrency:
+            concurrency += 1
+        if (concurrency, pacing) == (self.concurrency, self.pacing):
+            return
+        self.adjustments += 1
+        message = f"自适应限速：并发 {self.concurrency} → {concurrency}，间隔 {self.pacing:.2f} → {pacing:.2f} 秒"
+        if reason:
+            logger.warning(f"{message}（{reason}）")
+        else:
+            logger.info(message)
+        self._set(concurrency, pacing)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                sample = self._sample()
+            except Exception as e:
+                # 采样失败本身视为过载信号（连接异常或服务端无响应），下次采样前尝试重连
+                logger.warning(f"负载采样失败：{str(e)}")
+                sample = {"load": None, "latency": self._drain_latency(), "failed": True}
+                try:
+                    self._sampler.reconnect()
+                except Exception:
+                    pass
+            try:
+                self.adjust(sample["load"], sample["latency"], sample.get("failed", False))
+            except Exception as e:
+                # 单次异常的采样值不能终止控制线程（否则之后的扫描不再限速）
+                logger.error(f"自适应限速调整失败，保持当前并发 {self.concurrency}、间隔 {self.pacing:.2f} 秒：{str(e)}")
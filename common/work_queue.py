@@ -0,0 +1,486 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from config.default_config import DB_DEFAULT_CONFIG
+from db.base_db import BaseDatabase
+from common.logger import logger
+from common.exporter import ResultExporter, StreamingExporter, json_loads
+from common.row_spool import RowSpool
+from common.scan_engine import ScanEngine, scan_table
+from common.scan_planner import ScanPlanner
+from common.schema_cache import SchemaCache
+from common.circuit_breaker import TableCircuitBreaker
+from common.content_classifier import ContentClassifier
+from common.exception_handler import BaseExtractorError
+
+# 队列角色：coordinator=枚举工作单元并合并结果；worker=租用工作单元执行扫描
+QUEUE_ROLES = ("coordinator", "worker")
+# 协调端输出进度 / 工作端无单元可租时的轮询间隔（秒）
+POLL_SECONDS = 5
+# 写入队列的目标配置中不保存的字段（口令由工作端从环境变量或命令行获取）
+SECRET_KEYS = ("password",)
+
+
+class LeasedUnit(NamedTuple):
+    """工作端租到的工作单元"""
+    id: int
+    target: str
+    db_name: str
+    table_name: str
+    attempts: int
+    # 协调端规划时统计为空的表：扫描前先探测是否确有数据
+    probe_empty: bool
+
+
+class WorkQueue:
+    """分布式扫描的持久化工作队列（共享存储上的 SQLite 文件）
+
+    协调端把 (目标, 库, 表) 工作单元写入队列，各主机上的工作端以租约方式领取：租约到期未完成
+    （工作端崩溃、断网）的单元可被其他工作端重新领取，完成时只有仍持有租约的工作端能提交结果。
+    队列中只保存不含口令的目标配置
+    """
+
+    def __init__(self, path: str, lease_seconds: int = 600):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = max(1, lease_seconds)
+        self._lock = threading.Lock()
+        # 共享存储（NFS/SMB）上不支持 WAL，使用默认回滚日志；领取单元用 BEGIN IMMEDIATE 串行化
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS targets (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                config TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                id INTEGER PRIMARY KEY,
+                target TEXT NOT NULL,
+                db_name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                probe_empty INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (target, db_name, table_name)
+            );
+            CREATE INDEX IF NOT EXISTS units_status ON units (status, id);
+        """)
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], object]) -> object:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # ---------- 元数据与目标 ----------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)))
+
+    def add_target(self, name: str, position: int, config: Dict) -> None:
+        """登记目标配置（去除口令后保存）"""
+        stored = {key: value for key, value in config.items() if key not in SECRET_KEYS}
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO targets (name, position, config) VALUES (?, ?, ?)",
+            (name, position, json.dumps(stored, ensure_ascii=False))))
+
+    def targets(self) -> Dict[str, Dict]:
+        """按登记顺序返回 {目标名: 不含口令的目标配置}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, config FROM targets ORDER BY position").fetchall()
+        return {name: json.loads(config) for name, config in rows}
+
+    def add_units(self, target: str, units: List[Tuple[str, str]], empty: Iterable[Tuple[str, str]] = ()) -> int:
+        """写入工作单元（已存在的单元保持原状态），返回新增数量；empty 中的单元扫描前先探测是否为空表"""
+        empty = set(empty)
+
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO units (target, db_name, table_name, probe_empty) VALUES (?, ?, ?, ?)",
+                             [(target, db_name, table_name, int((db_name, table_name) in empty))
+                              for db_name, table_name in units])
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    # ---------- 租约 ----------
+
+    def lease(self, owner: str, max_attempts: int) -> Optional[LeasedUnit]:
+        """领取一个待扫描单元（含租约已过期的单元）；过期且已用尽尝试次数的单元标记为失败"""
+        def take(conn: sqlite3.Connection) -> Optional[LeasedUnit]:
+            now = time.time()
+            conn.execute("UPDATE units SET status = 'failed', owner = NULL, error = COALESCE(error, ?) "
+                         "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                         ("租约过期（工作端中断）", now, max_attempts))
+            row = conn.execute("SELECT id, target, db_name, table_name, attempts, probe_empty FROM units "
+                               "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                               "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE units SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                         "WHERE id = ?", (owner, now + self.lease_seconds, row[0]))
+            return LeasedUnit(row[0], row[1], row[2], row[3], row[4] + 1, bool(row[5]))
+        return self._transaction(take)
+
+    def renew(self, unit_ids: List[int], owner: str) -> None:
+        """续期仍在扫描中的单元的租约"""
+        if not unit_ids:
+            return
+        expires = time.time() + self.lease_seconds
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE units SET lease_expires = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            [(expires, unit_id, owner) for unit_id in unit_ids]))
+
+    def complete(self, unit_id: int, owner: str, result: Optional[str]) -> bool:
+        """提交单元结果（无敏感字段时为 None）；租约已被他人接管时返回 False，结果丢弃"""
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE units SET status = 'done', owner = NULL, lease_expires = NULL, error = NULL, result = ? "
+            "WHERE id = ? AND owner = ? AND status = 'leased'", (result, unit_id, owner)).rowcount == 1)
+
+    def fail(self, unit_id: int, owner: str, error: str, max_attempts: int) -> None:
+        """记录单元失败：尝试次数未用尽时放回队列，否则标记为失败"""
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_expires = NULL, error = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            (max_attempts, error, unit_id, owner)))
+
+    # ---------- 进度与结果 ----------
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def iter_results(self) -> Iterator[Tuple[str, str]]:
+        """按枚举顺序逐条返回 (目标名, 结果 JSON)"""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute("SELECT id, target, result FROM units WHERE id > ? AND status = 'done' "
+                                          "AND result IS NOT NULL ORDER BY id LIMIT 500", (last_id,)).fetchall()
+            if not rows:
+                return
+            for unit_id, target, result in rows:
+                yield target, result
+            last_id = rows[-1][0]
+
+    def failed_units(self) -> List[Tuple[str, str, str, str]]:
+        """失败单元：(目标名, 库名, 表名, 原因)"""
+        with self._lock:
+            return self._conn.execute("SELECT target, db_name, table_name, error FROM units "
+                                      "WHERE status = 'failed' ORDER BY id").fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QueueCoordinator:
+    """分布式扫描协调端：枚举各目标的 (库, 表) 写入队列，等待工作端全部完成后合并为常规导出结果
+
+    队列已完成枚举时（协调端重启）不再重复枚举，直接等待并合并
+    """
+
+    def __init__(self, queue: WorkQueue, base_config: Dict, targets: List[Dict],
+                 instance_factory: Callable[[Dict], Optional[BaseDatabase]],
+                 planner_factory: Callable[[Dict], Optional[ScanPlanner]]):
+        self.queue = queue
+        self.base_config = base_config
+        self.targets = targets
+        self.instance_factory = instance_factory
+        self.planner_factory = planner_factory
+
+    def _enumerate_target(self, config: Dict) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """枚举目标的工作单元，返回 (全部单元, 统计为空的单元)"""
+        db_instance = self.instance_factory(config)
+        if not db_instance or not db_instance.connect():
+            raise BaseExtractorError(f"目标 {config['name']} 连接失败，无法枚举工作单元")
+        try:
+            engine = ScanEngine(db_instance, lambda: None, config["db_type"], planner=self.planner_factory(config))
+            units = engine.enumerate_units()
+            if not engine.planner:
+                return units, []
+            # 单元按价值/成本顺序入队，统计为空的表排在最后
+            planned, empty = engine.plan(units)
+            ScanPlanner.log_plan(planned, empty, config["workers"])
+            return [item.unit for item in planned + empty], [item.unit for item in empty]
+        finally:
+            db_instance.disconnect()
+
+    def enumerate(self) -> None:
+        if self.queue.get_meta("enumerated"):
+            logger.info(f"队列 {self.queue.path} 已完成枚举，继续等待工作端完成")
+            return
+        self.queue.set_meta("timestamp", self.queue.get_meta("timestamp") or datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.queue.set_meta("max_attempts", str(self.base_config["retries"] + 1))
+        for position, config in enumerate(self.targets):
+            self.queue.add_target(config["name"], position, config)
+            added = self.queue.add_units(config["name"], *self._enumerate_target(config))
+            logger.info(f"目标 {config['name']}：{added} 个工作单元已入队")
+        self.queue.set_meta("enumerated", "1")
+
+    def wait(self) -> Dict[str, int]:
+        """轮询队列直到没有待扫描 / 扫描中的单元"""
+        while True:
+            counts = self.queue.counts()
+            logger.info(f"队列进度：待扫描 {counts['pending']}，扫描中 {counts['leased']}，"
+                        f"已完成 {counts['done']}，失败 {counts['failed']}")
+            if not counts["pending"] and not counts["leased"]:
+                return counts
+            time.sleep(POLL_SECONDS)
+
+    def merge(self) -> StreamingExporter:
+        """按枚举顺序把队列中的结果写入常规导出文件（多目标时每条结果附加目标名）"""
+        exporter = StreamingExporter(self.base_config["output_dir"], self.base_config["export_type"],
+                                     self.queue.get_meta("timestamp"), self.base_config["jsonl_compression"],
+                                     self.base_config["shard_by"])
+        # 续写同一时间戳的结果文件前清除上次合并的残留
+        if os.path.exists(exporter.jsonl_path):
+            os.remove(exporter.jsonl_path)
+        multi_target = len(self.queue.targets()) > 1
+        try:
+            for target, result in self.queue.iter_results():
+                record = json_loads(result)
+                exporter.write(dict({"目标": target}, **record) if multi_target else record)
+        finally:
+            exporter.close()
+        return exporter
+
+    def run(self) -> Dict:
+        self.enumerate()
+        counts = self.wait()
+        exporter = self.merge()
+        logger.info("\n" + "=" * 50)
+        logger.info(f"分布式扫描完成：{counts['done']} 个表已扫描，共发现 {exporter.count} 个含敏感数据的表")
+        failed = self.queue.failed_units()
+        if failed:
+            logger.warning(f"失败表 {len(failed)} 个：")
+            for target, db_name, table_name, error in failed:
+                logger.warning(f"  [{target}] {db_name}.{table_name}：{error}")
+        logger.info("=" * 50)
+        return {
+            "sensitive_tables": exporter.count,
+            "failed_tables": len(failed),
+            "jsonl_path": exporter.jsonl_path if exporter.count else None,
+        }
+
+
+class QueueWorker:
+    """分布式扫描工作端：多线程租用工作单元，每个线程按目标维持独立连接，扫描结果写回队列
+
+    扫描期间后台线程定期续租，工作端退出或崩溃后未续租的单元在租约到期后由其他工作端接管。
+    与单机扫描一致：启用 --schema-cache 时复用本机字段元数据缓存，统计为空的表先探测，
+    超时的表熔断（不再重试），慢表 / 熔断表按目标写出报告
+    """
+
+    def __init__(self, queue: WorkQueue, worker_config: Dict,
+                 instance_factory: Callable[[Dict], Optional[BaseDatabase]], password: Optional[str] = None):
+        self.queue = queue
+        self.worker_config = worker_config
+        self.instance_factory = instance_factory
+        # 命令行 / DB_PASSWORD 指定的口令，目标未配置 password_env 时使用
+        self.password = password
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.scanned = 0
+        self._active: Dict[int, str] = {}
+        self._classifiers: Dict[str, ContentClassifier] = {}
+        self._targets: Dict[str, Dict] = {}
+        # 各目标的字段元数据缓存、表变更指纹 {(目标名, 库名): {表名: 指纹}} 与熔断器
+        self._schema_caches: Dict[str, SchemaCache] = {}
+        self._fingerprints: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._breakers: Dict[str, TableCircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._local = threading.local()
+        self._encoder = ResultExporter(worker_config["output_dir"])
+
+    def _target_config(self, name: str) -> Dict:
+        """队列中的目标配置补充口令：password_env 指定的环境变量 > 命令行 / DB_PASSWORD > 默认口令"""
+        with self._lock:
+            if name not in self._targets:
+                self._targets.update(self.queue.targets())
+            config = dict(self._targets[name])
+        password = os.getenv(config["password_env"]) if config.get("password_env") else None
+        if password is None:
+            password = self.password if self.password is not None else DB_DEFAULT_CONFIG[config["db_type"]]["password"]
+        config["password"] = password
+        return config
+
+    def _classifier(self, config: Dict) -> Optional[ContentClassifier]:
+        if not config.get("content_scan"):
+            return None
+        with self._lock:
+            if config["name"] not in self._classifiers:
+                self._classifiers[config["name"]] = ContentClassifier(config["content_hit_threshold"],
+                                                                      config["content_pool_threshold"])
+            return self._classifiers[config["name"]]
+
+    def _breaker(self, name: str) -> TableCircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = TableCircuitBreaker(self.worker_config["slow_table_seconds"])
+            return self._breakers[name]
+
+    def _load_columns(self, config: Dict, instance: BaseDatabase, unit: LeasedUnit) -> Optional[List[Dict]]:
+        """启用本机字段元数据缓存时按表结构指纹复用缓存的字段信息，否则返回 None（由 scan_table 查询目录）"""
+        if not self.worker_config["schema_cache"]:
+            return None
+        with self._lock:
+            if config["name"] not in self._schema_caches:
+                self._schema_caches[config["name"]] = SchemaCache(self.worker_config["schema_cache"], config["db_type"],
+                                                                  config["host"], config["port"])
+            schema_cache = self._schema_caches[config["name"]]
+            fingerprints = self._fingerprints.get((config["name"], unit.db_name))
+        if fingerprints is None:
+            fingerprints = instance.get_table_fingerprints(unit.db_name)
+            with self._lock:
+                self._fingerprints[(config["name"], unit.db_name)] = fingerprints
+        fingerprint = fingerprints.get(unit.table_name)
+        columns = schema_cache.get(unit.db_name, unit.table_name, fingerprint)
+        if columns is None:
+            columns = instance.list_columns(unit.db_name, unit.table_name)
+            schema_cache.put(unit.db_name, unit.table_name, fingerprint, columns)
+        return columns
+
+    def _instance(self, config: Dict) -> BaseDatabase:
+        """当前线程连接该目标的实例（首次使用时创建）"""
+        instances = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        instance = instances.get(config["name"])
+        if instance is None:
+            instance = self.instance_factory(config)
+            if not instance or not instance.connect():
+                raise BaseExtractorError(f"目标 {config['name']} 连接失败")
+            instances[config["name"]] = instance
+        return instance
+
+    def _drop_instance(self, name: str) -> None:
+        instance = getattr(self._local, "instances", {}).pop(name, None)
+        if instance:
+            instance.disconnect()
+
+    def _heartbeat(self) -> None:
+        """每 1/3 租约时长为扫描中的单元续租"""
+        while not self._stopped.wait(max(1.0, self.queue.lease_seconds / 3)):
+            with self._lock:
+                unit_ids = list(self._active)
+            try:
+                self.queue.renew(unit_ids, self.owner)
+            except sqlite3.Error as e:
+                logger.warning(f"续租失败：{str(e)}")
+
+    def _scan(self, unit: LeasedUnit) -> Optional[str]:
+        config = self._target_config(unit.target)
+        instance = self._instance(config)
+        breaker = self._breaker(unit.target)
+        started = time.monotonic()
+        try:
+            result = scan_table(instance, config["db_type"], unit.db_name, unit.table_name, self._classifier(config),
+                                self._load_columns(config, instance, unit), unit.probe_empty)
+        except Exception as e:
+            breaker.record((unit.db_name, unit.table_name), time.monotonic() - started, str(e))
+            raise
+        breaker.record((unit.db_name, unit.table_name), time.monotonic() - started)
+        if result is None:
+            return None
+        try:
+            return "".join(self._encoder.encode_chunks(result))
+        finally:
+            if isinstance(result["rows"], RowSpool):
+                result["rows"].close()
+
+    def _work(self, max_attempts: int) -> None:
+        while True:
+            unit = self.queue.lease(self.owner, max_attempts)
+            if unit is None:
+                counts = self.queue.counts()
+                if not counts["pending"] and not counts["leased"]:
+                    return
+                # 其他工作端仍在扫描：等待其完成或租约过期后接管
+                time.sleep(POLL_SECONDS)
+                continue
+            with self._lock:
+                self._active[unit.id] = unit.target
+            try:
+                payload = self._scan(unit)
+            except Exception as e:
+                logger.warning(f"  [{unit.target}] {unit.db_name}.{unit.table_name}：扫描失败"
+                               f"（第 {unit.attempts} 次）：{str(e)}")
+                self._drop_instance(unit.target)
+                # 超时熔断的表直接标记为失败，不再由其他工作端重试
+                tripped = self._breaker(unit.target).is_open((unit.db_name, unit.table_name))
+                self.queue.fail(unit.id, self.owner, str(e), unit.attempts if tripped else max_attempts)
+                continue
+            finally:
+                with self._lock:
+                    self._active.pop(unit.id, None)
+            if self.queue.complete(unit.id, self.owner, payload):
+                with self._lock:
+                    self.scanned += 1
+            else:
+                logger.warning(f"  [{unit.target}] {unit.db_name}.{unit.table_name}：租约已被接管，结果丢弃")
+
+    def _run_thread(self, max_attempts: int) -> None:
+        try:
+            self._work(max_attempts)
+        finally:
+            for name in list(getattr(self._local, "instances", {})):
+                self._drop_instance(name)
+
+    def run(self) -> Dict:
+        """等待协调端完成枚举后开始领取，队列中没有待扫描 / 扫描中的单元时退出"""
+        while not self.queue.get_meta("enumerated"):
+            logger.info(f"等待协调端完成枚举：{self.queue.path}")
+            time.sleep(POLL_SECONDS)
+        max_attempts = int(self.queue.get_meta("max_attempts") or 1)
+        workers = max(1, self.worker_config["workers"])
+        logger.info(f"工作端 {self.owner} 开始领取工作单元，并发数：{workers}，租约 {self.queue.lease_seconds} 秒")
+
+        heartbeat = threading.Thread(target=self._heartbeat, name="queue-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._run_thread, args=(max_attempts,), name=f"queue-worker-{idx}")
+                   for idx in range(workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stopped.set()
+            heartbeat.join()
+            for classifier in self._classifiers.values():
+                classifier.close()
+            for schema_cache in self._schema_caches.values():
+                schema_cache.close()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for name, breaker in self._breakers.items():
+            breaker.write_report(self.worker_config["output_dir"], f"{timestamp}_{name}")
+        logger.info(f"工作端 {self.owner} 退出：共扫描 {self.scanned} 个表")
+        return {"scanned_tables": self.scanned}
@@ -18,6 +18,13 @@ DB_DEFAULT_CONFIG = {
         "port": 1521,
         "user": "system",
         "password": "oracle"
+    },
+    # 离线 SQL 转储文件：无需连接信息，以 --dump-path 作为目标标识
+    "dump": {
+        "host": "",
+        "port": 0,
+        "user": "",
+        "password": ""
     }
 }
 
@@ -25,9 +32,41 @@ DB_DEFAULT_CONFIG = {
 COMMON_CONFIG = {
     "extract_rows": 5,          # 默认提取行数
     "timeout": 10,              # 连接超时时间（秒）
-    "export_type": "all",       # 默认导出格式（csv/json/all）
+    "export_type": "all",       # 默认导出格式（csv/json/all/parquet/arrow）
+    "jsonl_compression": "none",  # 流式 JSON Lines 压缩方式（none/gzip/zstd）
+    "shard_by": None,           # 分片导出方式（database/table），None 为不分片
     "output_dir": "./output",   # 默认导出目录
-    "proxy": None               # 默认不使用代理
+    "proxy": None,              # 默认不使用代理
+    "workers": 1,               # 并发扫描线程数（1 表示逐表串行扫描）
+    "catalog_mode": "table",    # 字段目录加载方式（table/schema/instance）
+    "sample_mode": "head",      # 数据抽样方式（head/random/stratified）
+    "sample_percent": 1.0,      # 块抽样（TABLESAMPLE / SAMPLE BLOCK）百分比
+    "projection": False,        # 是否只查询敏感字段与主键
+    "lob_limit": 0,             # 宽字段/LOB 字段服务端截断长度（0 为不截断）
+    "fetch_batch": 1000,        # 流式读取每批行数（单表超出后转存临时文件）
+    "plan": False,              # 是否按目录统计信息规划扫描顺序
+    "time_budget": None,        # 扫描时间预算（秒），None 为不限制
+    "query_timeout": 0,         # 单条语句执行超时（秒，0 为不限制）
+    "slow_table_seconds": 60,   # 单表扫描耗时超过该值（秒）记为慢表
+    "throttle": False,          # 是否按服务端负载自适应调整并发度与表间间隔
+    "throttle_max_load": 16,    # 自适应限速的负载阈值（服务端正在执行的会话数）
+    "throttle_interval": 10,    # 自适应限速的负载采样间隔（秒）
+    "throttle_max_pacing": 5,   # 自适应限速时表间间隔上限（秒）
+    "profile": False,           # 是否输出各阶段性能分析报告（JSON + Prometheus 文本格式）
+    "profile_cprofile": False,  # 是否同时输出 cProfile 函数级采样结果（pstats）
+    "retries": 0,               # 单表扫描失败后的重试次数（0 为不重试）
+    "schema_cache": None,       # 字段元数据缓存文件路径（默认不启用）
+    "async_mode": False,        # 是否使用 asyncio 扫描后端
+    "async_concurrency": 16,    # 异步扫描时单主机最大在途查询数
+    "inventory": None,          # 资产清单文件路径（默认扫描单个目标）
+    "fleet_concurrency": 8,     # 资产清单模式：全局同时扫描的目标数
+    "per_host_concurrency": 1,  # 资产清单模式：同一主机同时扫描的目标数
+    "queue": None,              # 分布式扫描工作队列文件路径（SQLite，放在各主机可访问的共享存储上）
+    "queue_role": "coordinator",  # 分布式扫描角色（coordinator/worker）
+    "lease_seconds": 600,       # 分布式扫描中工作单元的租约时长（秒），到期未续租的单元由其他工作端接管
+    "content_scan": False,      # 是否对提取的数据做内容识别
+    "content_hit_threshold": 0.6,   # 内容识别命中率阈值（达到后判定为该类型）
+    "content_pool_threshold": 50000 # 单表待识别单元格数达到该值时使用进程池
 }
 
 # 系统数据库排除列表（避免扫描系统库）
@@ -0,0 +1,178 @@
+import asyncio
+from abc import ABCMeta, abstractmethod
+from typing import Callable, Dict, List, Optional, Union
+from db.base_db import BaseDatabase
+from common.row_spool import RowSpool
+from common.exception_handler import DBConnectionError
+
+
+class AsyncBaseDatabase(metaclass=ABCMeta):
+    """异步数据库适配器接口：方法与 BaseDatabase 一一对应，可在单个事件循环中并发执行大量小查询"""
+
+    # 敏感字段判定与字段信息组装沿用同步基类的实现，保证两种扫描方式结果一致
+    match_sensitive_keywords = BaseDatabase.match_sensitive_keywords
+    is_sensitive_column = BaseDatabase.is_sensitive_column
+    build_column_info = BaseDatabase.build_column_info
+    # 主键区间抽样的规划与结果合并同样复用同步基类
+    SAMPLE_MAX_PROBES = BaseDatabase.SAMPLE_MAX_PROBES
+    SAMPLE_STRATA = BaseDatabase.SAMPLE_STRATA
+    plan_key_probes = BaseDatabase.plan_key_probes
+    merge_probe_rows = BaseDatabase.merge_probe_rows
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int,
+                 sample_mode: str = "head", projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.extract_rows = extract_rows
+        self.sample_mode = sample_mode
+        self.projection = projection
+        self.lob_limit = lob_limit
+        self.fetch_batch = max(1, fetch_batch)
+        self.query_timeout = query_timeout
+        # 已发送的语句往返次数
+        self.round_trips = 0
+
+    @abstractmethod
+    async def connect(self) -> bool:
+        """连接数据库，返回是否成功"""
+        pass
+
+    @abstractmethod
+    async def list_databases(self) -> List[str]:
+        """获取所有非系统数据库"""
+        pass
+
+    @abstractmethod
+    async def list_tables(self, db_name: str) -> List[str]:
+        """获取指定数据库下的所有表"""
+        pass
+
+    @abstractmethod
+    async def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        """获取表的字段信息（含敏感字段标记）"""
+        pass
+
+    @abstractmethod
+    async def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表的前 N 行数据（columns 为已知字段信息时按配置做列裁剪与 LOB 截断）"""
+        pass
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """断开数据库连接"""
+        pass
+
+    async def fetch_top_rows(self, db_name: str, table_name: str,
+                             columns: Optional[List[Dict]] = None) -> Union[List[Dict], RowSpool]:
+        """读取前 N 行供扫描使用：行数不超过 fetch_batch 时返回列表，否则转存到 RowSpool"""
+        return await self.query_top_rows(db_name, table_name, columns)
+
+    async def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """批量获取库内各表的结构变更指纹；不支持时返回空字典"""
+        return {}
+
+    async def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        """探测表中是否至少有一行；不支持时返回 None"""
+        return None
+
+    async def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """批量获取库内各表的目录统计信息；不支持时返回空字典"""
+        return {}
+
+
+class ThreadedAsyncDatabase(AsyncBaseDatabase):
+    """将阻塞驱动的 BaseDatabase 包装为异步接口：维护一组独立连接，每次调用借出一个连接并通过
+    asyncio.to_thread 在线程中执行（适用于没有原生异步驱动的数据库）"""
+
+    def __init__(self, instance_factory: Callable[[], Optional[BaseDatabase]], pool_size: int = 8):
+        self.instance_factory = instance_factory
+        self.pool_size = max(1, pool_size)
+        self.host, self.port, self.extract_rows = None, None, 0
+        self._idle: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._instances: List[BaseDatabase] = []
+        self._primary: Optional[BaseDatabase] = None
+
+    @property
+    def round_trips(self) -> int:
+        """各连接的语句往返次数之和"""
+        return sum(instance.round_trips for instance in self._instances)
+
+    async def _new_instance(self) -> BaseDatabase:
+        instance = self.instance_factory()
+        if not instance or not await asyncio.to_thread(instance.connect):
+            raise DBConnectionError("async", "创建数据库连接失败")
+        if self._primary is not None:
+            # 共享首个连接加载的批量字段目录
+            instance.share_catalog(self._primary)
+        self._instances.append(instance)
+        return instance
+
+    async def connect(self) -> bool:
+        self._idle = asyncio.Queue()
+        self._primary = await self._new_instance()
+        self._created = 1
+        await self._idle.put(self._primary)
+        # 与同步实例保持相同的属性，便于扫描器统一使用
+        self.host, self.port = self._primary.host, self._primary.port
+        self.extract_rows = self._primary.extract_rows
+        return True
+
+    async def _acquire(self) -> BaseDatabase:
+        if self._idle.empty() and self._created < self.pool_size:
+            self._created += 1
+            try:
+                return await self._new_instance()
+            except Exception:
+                self._created -= 1
+                raise
+        return await self._idle.get()
+
+    async def _call(self, method: str, *args):
+        instance = await self._acquire()
+        try:
+            return await asyncio.to_thread(getattr(instance, method), *args)
+        except Exception:
+            # 连接可能已失效，重连后再归还
+            try:
+                await asyncio.to_thread(instance.reconnect)
+            except Exception:
+                pass
+            raise
+        finally:
+            self._idle.put_nowait(instance)
+
+    async def list_databases(self) -> List[str]:
+        return await self._call("list_databases")
+
+    async def list_tables(self, db_name: str) -> List[str]:
+        return await self._call("list_tables", db_name)
+
+    async def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        return await self._call("list_columns", db_name, table_name)
+
+    async def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        return await self._call("query_top_rows", db_name, table_name, columns)
+
+    async def fetch_top_rows(self, db_name: str, table_name: str,
+                             columns: Optional[List[Dict]] = None) -> Union[List[Dict], RowSpool]:
+        # 生成器须在同一线程内读取完毕，因此整体在工作线程中收集
+        return await self._call("fetch_top_rows", db_name, table_name, columns)
+
+    async def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        return await self._call("get_table_fingerprints", db_name)
+
+    async def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        return await self._call("table_has_rows", db_name, table_name)
+
+    async def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        return await self._call("get_table_stats", db_name)
+
+    async def disconnect(self) -> None:
+        for instance in self._instances:
+            await asyncio.to_thread(instance.disconnect)
+        self._instances = []
@@ -0,0 +1,194 @@
+import aiomysql
+from typing import List, Dict, Optional, Union
+from db.async_base_db import AsyncBaseDatabase
+from common.row_spool import RowSpool
+from db.mysql_db import (INTEGER_KEY_SQL, PRIMARY_KEY_SQL, TABLE_STATS_SQL, TABLE_FINGERPRINT_SQL, pick_integer_key,
+                         build_key_probe_sql, mysql_column_expression, session_timeout_statements)
+from config.default_config import SYSTEM_DATABASES
+from common.logger import logger
+from common.exception_handler import DBConnectionError, DBQueryError
+
+class AsyncMySQLDatabase(AsyncBaseDatabase):
+    """基于 aiomysql 的原生异步 MySQL 适配器，连接池大小即单主机最大在途查询数"""
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int,
+                 charset: str = "utf8mb4", pool_size: int = 16, sample_mode: str = "head",
+                 projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000, query_timeout: int = 0):
+        super().__init__(host, port, user, password, timeout, extract_rows, sample_mode, projection, lob_limit,
+                         fetch_batch, query_timeout)
+        self.charset = charset
+        self.pool_size = pool_size
+        self.pool = None
+
+    async def _create_pool(self, init_command: Optional[str]):
+        return await aiomysql.create_pool(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            charset=self.charset,
+            connect_timeout=self.timeout,
+            init_command=init_command,
+            minsize=1,
+            maxsize=self.pool_size,
+            cursorclass=aiomysql.DictCursor
+        )
+
+    async def connect(self) -> bool:
+        """创建 MySQL 异步连接池（配置语句超时时每个连接以 init_command 设置会话级超时）"""
+        try:
+            if not self.query_timeout:
+                self.pool = await self._create_pool(None)
+            else:
+                for init_command in session_timeout_statements(self.query_timeout) + [None]:
+                    try:
+                        self.pool = await self._create_pool(init_command)
+                        break
+                    except Exception:
+                        if init_command is None:
+                            raise
+                if self.pool is not None and init_command is None:
+                    logger.warning("MySQL 服务端不支持会话级语句超时，异步扫描不限制单条语句耗时")
+            logger.info(f"MySQL 异步连接池创建成功：{self.host}:{self.port}（用户：{self.user}，连接数上限：{self.pool_size}）")
+            return True
+        except Exception as e:
+            raise DBConnectionError("mysql", str(e)) from e
+
+    async def _fetchall(self, sql: str, params=None) -> List[Dict]:
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                self.round_trips += 1
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    async def list_databases(self) -> List[str]:
+        """获取 MySQL 非系统数据库"""
+        try:
+            all_dbs = [item["Database"] for item in await self._fetchall("SHOW DATABASES;")]
+            system_dbs = SYSTEM_DATABASES.get("mysql", [])
+            return [db for db in all_dbs if db not in system_dbs]
+        except Exception as e:
+            raise DBQueryError("system", "show_databases", str(e)) from e
+
+    async def list_tables(self, db_name: str) -> List[str]:
+        """获取指定数据库下的表（使用限定库名，无需 USE 切换）"""
+        try:
+            rows = await self._fetchall(f"SHOW TABLES FROM `{db_name}`;")
+            return [list(item.values())[0] for item in rows]
+        except Exception as e:
+            raise DBQueryError(db_name, "show_tables", str(e)) from e
+
+    async def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        """单次查询 INFORMATION_SCHEMA.COLUMNS 获取字段类型、可空性与注释（含敏感字段标记）"""
+        try:
+            rows = await self._fetchall("""
+                SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_COMMENT
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+                ORDER BY ORDINAL_POSITION;
+            """, (db_name, table_name))
+            return [
+                self.build_column_info(item["COLUMN_NAME"], item["COLUMN_TYPE"], item["IS_NULLABLE"] == "YES",
+                                       item["COLUMN_COMMENT"])
+                for item in rows
+            ]
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"获取字段信息失败：{str(e)}") from e
+
+    async def _build_select_list(self, db_name: str, table_name: str, columns: Optional[List[Dict]]) -> str:
+        """与同步适配器相同的列裁剪 / LOB 截断规则"""
+        if not columns or not (self.projection or self.lob_limit):
+            return "*"
+        selected = columns
+        if self.projection:
+            key_columns = {item["COLUMN_NAME"] for item in await self._fetchall(PRIMARY_KEY_SQL, (db_name, table_name))}
+            selected = [col for col in columns if col["is_sensitive"] or col["column_name"] in key_columns]
+        return ", ".join(mysql_column_expression(col["column_name"], col["column_type"], self.lob_limit)
+                         for col in selected)
+
+    async def _sample_by_key_ranges(self, db_name: str, table_name: str, select_list: str) -> Optional[List[Dict]]:
+        """主键区间随机 / 分层探测（与同步适配器的抽样语义一致）"""
+        key_column = pick_integer_key(await self._fetchall(INTEGER_KEY_SQL, (db_name, table_name)))
+        if not key_column:
+            return None
+        table_ref = f"`{db_name}`.`{table_name}`"
+        bounds = (await self._fetchall(
+            f"SELECT MIN(`{key_column}`) AS low, MAX(`{key_column}`) AS high FROM {table_ref};"
+        ))[0]
+        if bounds["low"] is None or int(bounds["high"]) - int(bounds["low"]) < self.extract_rows:
+            return None
+        probes = self.plan_key_probes(db_name, table_name, int(bounds["low"]), int(bounds["high"]))
+        sql, params = build_key_probe_sql(table_ref, key_column, probes, select_list)
+        return self.merge_probe_rows(list(await self._fetchall(sql, params)), key_column) or None
+
+    async def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表前 N 行数据；配置抽样模式时改为主键区间探测，配置列裁剪 / LOB 截断时改写 SELECT 列表"""
+        return list(await self.fetch_top_rows(db_name, table_name, columns))
+
+    async def fetch_top_rows(self, db_name: str, table_name: str,
+                             columns: Optional[List[Dict]] = None) -> Union[List[Dict], RowSpool]:
+        """无缓冲游标（SSDictCursor）按 fetch_batch 分批拉取，超过 fetch_batch 行时转存到 RowSpool"""
+        try:
+            select_list = await self._build_select_list(db_name, table_name, columns)
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"获取主键失败：{str(e)}") from e
+        if self.sample_mode != "head":
+            try:
+                rows = await self._sample_by_key_ranges(db_name, table_name, select_list)
+            except Exception as e:
+                logger.debug(f"表 {db_name}.{table_name} 抽样失败，改为读取前 N 行：{str(e)}")
+                rows = None
+            if rows is not None:
+                return rows
+        try:
+            rows, spool = [], None
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                    self.round_trips += 1
+                    await cursor.execute(f"SELECT {select_list} FROM `{db_name}`.`{table_name}` LIMIT {self.extract_rows};")
+                    while True:
+                        batch = await cursor.fetchmany(self.fetch_batch)
+                        if not batch:
+                            break
+                        if spool is None and len(rows) + len(batch) > self.fetch_batch:
+                            spool = RowSpool()
+                            spool.extend(rows)
+                        if spool is None:
+                            rows.extend(batch)
+                        else:
+                            spool.extend(batch)
+            return rows if spool is None else spool
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"查询数据失败：{str(e)}") from e
+
+    async def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """以字段定义的哈希作为表结构指纹（与同步适配器一致）"""
+        try:
+            rows = await self._fetchall(TABLE_FINGERPRINT_SQL, (db_name,))
+            return {item["TABLE_NAME"]: f"{item['COLUMN_COUNT']}|{item['COLUMN_HASH']}" for item in rows}
+        except Exception as e:
+            raise DBQueryError(db_name, "table_fingerprints", str(e)) from e
+
+    async def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        try:
+            return bool(await self._fetchall(f"SELECT 1 AS has_rows FROM `{db_name}`.`{table_name}` LIMIT 1;"))
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"探测数据失败：{str(e)}") from e
+
+    async def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """INFORMATION_SCHEMA.TABLES 的 TABLE_ROWS（InnoDB 为估算值）与 DATA_LENGTH"""
+        try:
+            rows = await self._fetchall(TABLE_STATS_SQL, (db_name,))
+            return {item["TABLE_NAME"]: {"rows": item["TABLE_ROWS"], "bytes": item["DATA_LENGTH"]} for item in rows}
+        except Exception as e:
+            raise DBQueryError(db_name, "table_stats", str(e)) from e
+
+    async def disconnect(self) -> None:
+        """关闭 MySQL 异步连接池"""
+        try:
+            if self.pool:
+                self.pool.close()
+                await self.pool.wait_closed()
+            logger.info("MySQL 异步连接池已关闭")
+        except Exception as e:
+            logger.error(f"关闭 MySQL 异步连接池失败：{str(e)}")
@@ -1,9 +1,27 @@
-from typing import List, Dict, Tuple
+import random
+import threading
+import time
+from typing import Any, Callable, List, Dict, Iterator, Sequence, Tuple, Optional, Union
 from abc import ABCMeta, abstractmethod
-from config.sensitive_keywords import SENSITIVE_FIELD_KEYWORDS
+from common.keyword_matcher import SENSITIVE_MATCHER, KeywordMatch
+from common.logger import logger
+from common.row_spool import RowSpool, collect_rows
+
+# 主键区间探测：(起始键值, 结束键值（不含）, 行数)
+KeyProbe = Tuple[int, int, int]
+# 批量执行的单条语句：(SQL, 参数)
+Statement = Tuple[str, Optional[Any]]
 
 class BaseDatabase(metaclass=ABCMeta):
-    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int):
+    # 随机抽样时单表最多发起的主键探测点数（合并为一条 UNION ALL 查询）
+    SAMPLE_MAX_PROBES = 32
+    # 分层抽样时的主键区间数
+    SAMPLE_STRATA = 8
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int,
+                 catalog_mode: str = "table", sample_mode: str = "head", sample_percent: float = 1.0,
+                 projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0):
         self.host = host
         self.port = port
         self.user = user
@@ -12,6 +30,34 @@ class BaseDatabase(metaclass=ABCMeta):
         self.extract_rows = extract_rows
         self.connection = None
         self.cursor = None
+        # 字段目录模式：table=逐表查询；schema=按库批量加载；instance=一次加载全部非系统库
+        self.catalog_mode = catalog_mode
+        # 内存字段目录：{库名: {表名: [字段信息, ...]}}
+        self.column_catalog: Dict[str, Dict[str, List[Dict]]] = {}
+        # 字段目录加载状态：已加载的库（实例模式记为 None）与加载锁，与目录一起在共享连接间共享，
+        # 保证并发取目录时每个库（或整个实例）只加载一次
+        self._catalog_state = {"loaded": set(), "lock": threading.Lock()}
+        # 抽样模式：head=前 N 行；random=随机抽样；stratified=按主键区间分层抽样
+        self.sample_mode = sample_mode
+        # 块抽样（TABLESAMPLE / SAMPLE BLOCK）的百分比
+        self.sample_percent = sample_percent
+        # 列裁剪：只查询敏感字段与主键
+        self.projection = projection
+        # 宽字段/LOB 字段在服务端截断的长度（文本按字符、二进制按字节），0 表示不截断
+        self.lob_limit = lob_limit
+        # 流式读取时每次网络往返拉取的行数，也是单表结果在内存中保留的行数上限（超出后转存临时文件）
+        self.fetch_batch = max(1, fetch_batch)
+        # 单条语句执行超时（秒），0 表示不限制（仅连接阶段受 timeout 约束）
+        self.query_timeout = query_timeout
+        # 会话状态：当前所在库（与之相同时省略 USE 切换），以及已发送的语句往返次数
+        self.current_database: Optional[str] = None
+        self.round_trips = 0
+        # 语句耗时回调（启用自适应限速时由扫描引擎设置，把扫描语句的执行延迟交给限速器）
+        self.statement_observer: Optional[Callable[[float], None]] = None
+        # 查询字段时顺带取得的主键信息（只保留最近一张表）：{(库名, 表名): [主键列行, ...]}，
+        # 行格式与各适配器自身的主键查询结果一致（MySQL 为 {"COLUMN_NAME", "DATA_TYPE"}，
+        # SQL Server 为 {"column_name", "type_name"}），只由同一适配器读取
+        self._key_columns: Dict[Tuple[str, str], List[Dict]] = {}
 
     @abstractmethod
     def connect(self) -> bool:
@@ -34,8 +80,8 @@ class BaseDatabase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def query_top_rows(self, db_name: str, table_name: str) -> List[Dict]:
-        """查询表的前 N 行数据（所有字段）"""
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表的前 N 行数据（columns 为已知字段信息时按配置做列裁剪与 LOB 截断）"""
         pass
 
     @abstractmethod
@@ -43,11 +89,249 @@ class BaseDatabase(metaclass=ABCMeta):
         """断开数据库连接"""
         pass
 
+    # ---------- 会话层 ----------
+
+    def execute(self, sql: str, params: Optional[Any] = None, cursor: Any = None) -> Any:
+        """在指定游标（默认主游标）上执行单条语句并计入往返次数，返回该游标"""
+        cursor = cursor or self.cursor
+        self.round_trips += 1
+        started = time.monotonic()
+        if params is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(sql, params)
+        if self.statement_observer:
+            self.statement_observer(time.monotonic() - started)
+        return cursor
+
+    def fetch_dicts(self, cursor: Any) -> List[Dict]:
+        """将游标当前结果集转换为字典列表（字典游标直接返回）"""
+        return list(cursor.fetchall())
+
+    def execute_batch(self, statements: Sequence[Statement]) -> List[List[Dict]]:
+        """执行多条互不依赖的小语句，按顺序返回各自的结果集；默认逐条执行，
+        支持多结果集的数据库覆盖为一次往返"""
+        return [self.fetch_dicts(self.execute(sql, params)) for sql, params in statements]
+
+    def use_statement(self, db_name: str) -> Optional[str]:
+        """切换当前库的语句；全部使用限定名、无需切换的数据库返回 None"""
+        return f"USE {self.quote_identifier(db_name)};"
+
+    def use_database(self, db_name: str) -> None:
+        """切换会话当前库：与当前库相同时省略，切换失败时保持原状态"""
+        if db_name == self.current_database:
+            return
+        statement = self.use_statement(db_name)
+        if statement:
+            self.execute(statement)
+        self.current_database = db_name
+
+    def remember_key_columns(self, db_name: str, table_name: str, key_columns: List[Dict]) -> None:
+        """记录查询字段时顺带取得的主键列（列裁剪 / 主键区间抽样时无需再次查询），
+        行格式须与该适配器主键查询的结果相同"""
+        self._key_columns = {(db_name, table_name): key_columns}
+
+    def cached_key_columns(self, db_name: str, table_name: str) -> Optional[List[Dict]]:
+        return self._key_columns.get((db_name, table_name))
+
+    # 最小往返语句（负载视图不可用时用于探测服务端是否可达）
+    PING_SQL = "SELECT 1"
+
+    def ping(self) -> None:
+        """执行一条最小语句（探测连接与服务端是否可用）"""
+        self.fetch_dicts(self.execute(self.PING_SQL))
+
+    def sample_server_load(self) -> Optional[float]:
+        """采样服务端当前负载（正在执行的会话数），用于自适应限速；不支持时返回 None，无权限时抛出异常"""
+        return None
+
+    def iter_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> Iterator[Dict]:
+        """以生成器逐批返回前 N 行（服务端游标 / fetchmany），内存占用以 fetch_batch 为上限；默认退化为 query_top_rows"""
+        yield from self.query_top_rows(db_name, table_name, columns)
+
+    def fetch_top_rows(self, db_name: str, table_name: str,
+                       columns: Optional[List[Dict]] = None) -> Union[List[Dict], RowSpool]:
+        """读取前 N 行供扫描使用：行数不超过 fetch_batch 时返回列表，否则边读取边转存到 RowSpool"""
+        return collect_rows(self.iter_top_rows(db_name, table_name, columns), self.fetch_batch)
+
+    def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """批量获取库内各表的结构变更指纹（一次查询），用于字段元数据缓存校验；不支持时返回空字典"""
+        return {}
+
+    def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        """探测表中是否至少有一行（只读取 1 行，用于核实统计为空的表）；不支持时返回 None"""
+        return None
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """批量获取库内各表的目录统计信息（一次查询）：{表名: {"rows": 估算行数, "bytes": 数据大小}}，
+        未收集统计信息的值为 None；不支持时返回空字典"""
+        return {}
+
+    def quote_identifier(self, name: str) -> str:
+        """转义标识符（各数据库按自身语法覆盖）"""
+        return name
+
+    def column_expression(self, column_name: str, column_type: str) -> str:
+        """生成单个字段的查询表达式：宽字段/LOB 字段按 lob_limit 在服务端截断，并以原字段名作为别名"""
+        return self.quote_identifier(column_name)
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        """获取主键列名（列裁剪时随敏感字段一起查询）；不支持时返回空列表"""
+        return []
+
+    def build_select_list(self, db_name: str, table_name: str, columns: Optional[List[Dict]]) -> str:
+        """生成 SELECT 列表：启用列裁剪时只含敏感字段与主键，启用 LOB 截断时改写宽字段，否则为 *"""
+        if not columns or not (self.projection or self.lob_limit):
+            return "*"
+        selected = columns
+        if self.projection:
+            key_columns = set(self.get_primary_key(db_name, table_name))
+            selected = [col for col in columns if col["is_sensitive"] or col["column_name"] in key_columns]
+        return ", ".join(self.column_expression(col["column_name"], col["column_type"]) for col in selected)
+
+    def get_integer_key(self, db_name: str, table_name: str) -> Optional[str]:
+        """获取表的单列整数主键名（用于主键区间抽样）；无此类主键或不支持时返回 None"""
+        return None
+
+    def query_key_bounds(self, db_name: str, table_name: str, key_column: str) -> Optional[Tuple[int, int]]:
+        """查询整数主键的最小/最大值（走索引，开销极小）；空表返回 None"""
+        return None
+
+    def query_key_probes(self, db_name: str, table_name: str, key_column: str, probes: List[KeyProbe],
+                         select_list: str = "*") -> Optional[List[Dict]]:
+        """按主键区间探测取数（各区间合并为一次查询）；不支持时返回 None，由调用方回退为读取前 N 行"""
+        return None
+
+    def query_block_sample(self, db_name: str, table_name: str, select_list: str = "*") -> Optional[List[Dict]]:
+        """数据库原生块抽样（SQL Server TABLESAMPLE / Oracle SAMPLE BLOCK）；不支持时返回 None"""
+        return None
+
+    def plan_key_probes(self, db_name: str, table_name: str, low: int, high: int) -> List[KeyProbe]:
+        """在 [low, high] 主键范围内规划探测区间：random 为随机起点，stratified 为等宽分层内的随机起点
+
+        随机数以库表名为种子，同一张表多次扫描得到相同的样本，便于结果比对
+        """
+        rng = random.Random(f"{db_name}.{table_name}")
+        end = high + 1
+        if self.sample_mode == "stratified":
+            strata = max(1, min(self.SAMPLE_STRATA, self.extract_rows, end - low))
+            width = (end - low) / strata
+            bounds = [(low + int(width * i), low + int(width * (i + 1))) for i in range(strata)]
+            starts = [(start + int(rng.random() * (stop - start) / 2), stop) for start, stop in bounds]
+        else:
+            probes = max(1, min(self.SAMPLE_MAX_PROBES, self.extract_rows))
+            starts = sorted((rng.randint(low, high), end) for _ in range(probes))
+        # N 行平均分配到各探测区间（余数分给靠前的区间）
+        batch, remainder = divmod(self.extract_rows, len(starts))
+        return [(start, stop, batch + (idx < remainder)) for idx, (start, stop) in enumerate(starts)]
+
+    def merge_probe_rows(self, rows: List[Dict], key_column: str) -> List[Dict]:
+        """合并各探测区间的结果：按主键去重（随机区间可能重叠），截取前 N 行"""
+        seen = set()
+        merged = []
+        for row in rows:
+            key = row.get(key_column)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(row)
+            if len(merged) >= self.extract_rows:
+                break
+        return merged
+
+    def _sample_by_key_ranges(self, db_name: str, table_name: str, select_list: str) -> Optional[List[Dict]]:
+        key_column = self.get_integer_key(db_name, table_name)
+        if not key_column:
+            return None
+        bounds = self.query_key_bounds(db_name, table_name, key_column)
+        if not bounds or bounds[1] - bounds[0] < self.extract_rows:
+            # 空表或键值范围不超过 N 的小表，直接读取前 N 行即可覆盖
+            return None
+        probes = self.plan_key_probes(db_name, table_name, *bounds)
+        rows = self.query_key_probes(db_name, table_name, key_column, probes, select_list)
+        if rows is None:
+            return None
+        return self.merge_probe_rows(rows, key_column) or None
+
+    def _sample_by_blocks(self, db_name: str, table_name: str, select_list: str) -> Optional[List[Dict]]:
+        rows = self.query_block_sample(db_name, table_name, select_list)
+        # 小表上块抽样可能不足 N 行，此时读取前 N 行即可覆盖全表
+        return rows if rows is not None and len(rows) >= self.extract_rows else None
+
+    def query_sample_rows(self, db_name: str, table_name: str, select_list: str = "*") -> Optional[List[Dict]]:
+        """按 sample_mode 抽样
+
+        random 优先使用原生块抽样，其次主键随机探测；stratified 优先主键区间分层，其次块抽样。
+        head 模式或各方式均不可用时返回 None，由调用方回退为读取前 N 行
+        """
+        if self.sample_mode == "head":
+            return None
+        strategies = [self._sample_by_blocks, self._sample_by_key_ranges]
+        if self.sample_mode == "stratified":
+            strategies.reverse()
+        for strategy in strategies:
+            try:
+                rows = strategy(db_name, table_name, select_list)
+            except Exception as e:
+                logger.debug(f"表 {db_name}.{table_name} 抽样失败，尝试其他方式：{str(e)}")
+                continue
+            if rows is not None:
+                return rows
+        return None
+
+    def reconnect(self) -> bool:
+        """断开后重新连接（网络中断等导致连接失效时使用）"""
+        self.disconnect()
+        self.connection = None
+        self.cursor = None
+        # 新会话没有当前库
+        self.current_database = None
+        return self.connect()
+
+    @abstractmethod
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        """批量加载字段目录到 column_catalog（db_name 为空时加载全部非系统库）"""
+        pass
+
+    def get_catalog(self, db_name: str) -> Optional[Dict[str, List[Dict]]]:
+        """获取指定库的内存字段目录（按需批量加载），逐表模式下返回 None"""
+        if self.catalog_mode == "table":
+            return None
+        scope = None if self.catalog_mode == "instance" else db_name
+        with self._catalog_state["lock"]:
+            if scope not in self._catalog_state["loaded"]:
+                self.load_catalog(scope)
+                self._catalog_state["loaded"].add(scope)
+            # 无表的库也记录为空目录
+            return self.column_catalog.setdefault(db_name, {})
+
+    def share_catalog(self, other: "BaseDatabase") -> None:
+        """复用另一个实例已加载的字段目录（并发扫描时工作连接无需重复加载）"""
+        self.catalog_mode = other.catalog_mode
+        self.column_catalog = other.column_catalog
+        self._catalog_state = other._catalog_state
+
+    def build_column_info(self, column_name: str, column_type: str, is_nullable: bool, column_comment: str) -> Dict:
+        """组装字段信息并标记敏感字段（逐表查询与批量目录共用）"""
+        column_comment = column_comment or ""
+        sensitive_types = SENSITIVE_MATCHER.matched_types(self.match_sensitive_keywords(column_name, column_comment))
+        return {
+            "column_name": column_name,
+            "column_type": column_type,
+            "is_nullable": is_nullable,
+            "column_comment": column_comment,
+            "is_sensitive": bool(sensitive_types),
+            "sensitive_type": sensitive_types[0] if sensitive_types else "",
+            "sensitive_types": sensitive_types
+        }
+
+    def match_sensitive_keywords(self, column_name: str, column_comment: str = "") -> Tuple[KeywordMatch, ...]:
+        """返回字段名与注释命中的全部敏感关键词（含类型与位置）"""
+        return SENSITIVE_MATCHER.match(column_name, column_comment or "")
+
     def is_sensitive_column(self, column_name: str, column_comment: str = "") -> Tuple[bool, str]:
-        """判断字段是否为敏感字段（所有数据库通用逻辑）"""
-        column_info = (column_name + " " + (column_comment or "")).lower()
-        for sensitive_type, keywords in SENSITIVE_FIELD_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword.lower() in column_info:
-                    return True, sensitive_type
-        return False, ""
\ No newline at end of file
+        """判断字段是否为敏感字段（所有数据库通用逻辑），返回按配置优先级的首个命中类型"""
+        sensitive_types = SENSITIVE_MATCHER.matched_types(self.match_sensitive_keywords(column_name, column_comment))
+        if not sensitive_types:
+            return False, ""
+        return True, sensitive_types[0]
\ No newline at end of file
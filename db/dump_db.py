@@ -0,0 +1,646 @@
+import os
+import re
+import gzip
+import threading
+from typing import Dict, IO, List, Optional, Tuple
+from db.base_db import BaseDatabase
+from common.logger import logger
+from common.exception_handler import DBConnectionError, DBQueryError
+
+# 支持的转储文件后缀
+DUMP_SUFFIXES = (".sql", ".sql.gz")
+# 每次读取的字符数：解析缓冲区只保留当前语句的未处理部分，内存与文件大小无关
+READ_CHUNK_CHARS = 1 << 20
+# mysqldump / MariaDB dump 的文件头特征：字符串使用反斜杠转义，且字符串内不含原始换行
+MYSQL_DUMP_MARKERS = ("MySQL dump", "MariaDB dump", "/*!40")
+# 无分号脚本（SSMS 生成脚本、SQL*Plus 脚本）中，括号外换行后以这些关键字开头即视为新语句
+STATEMENT_KEYWORDS = ("GO", "INSERT", "CREATE", "ALTER", "SET", "USE", "COMMENT", "EXEC", "EXECUTE", "DROP",
+                      "GRANT", "PROMPT", "BEGIN", "DECLARE", "PRINT")
+
+IDENT = r'(?:`[^`]+`|"[^"]+"|\[[^\]]+\]|[\w$#]+)'
+QUALIFIED = rf"{IDENT}(?:\s*\.\s*{IDENT})*"
+IDENT_PATTERN = re.compile(IDENT)
+INSERT_HEADER = re.compile(
+    rf"INSERT\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s+)*(?:INTO\s+)?(?P<table>{QUALIFIED})\s*"
+    rf"(?:\((?P<columns>[^)]*)\)\s*)?VALUES\s*", re.I)
+CREATE_TABLE = re.compile(
+    rf"CREATE\s+(?:(?:GLOBAL\s+)?TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<table>{QUALIFIED})\s*\(", re.I)
+USE_DATABASE = re.compile(rf"USE\s+(?P<db>{IDENT})", re.I)
+ORACLE_COLUMN_COMMENT = re.compile(
+    rf"COMMENT\s+ON\s+COLUMN\s+(?P<target>{QUALIFIED})\s+IS\s+'(?P<comment>(?:[^']|'')*)'", re.I | re.S)
+SQLSERVER_DESCRIPTION = re.compile(r"sp_addextendedproperty\b.*MS_Description", re.I | re.S)
+SQLSERVER_PROPERTY = re.compile(r"@(?P<key>value|level0name|level1name|level2name)\s*=\s*N?'(?P<value>(?:[^']|'')*)'",
+                                re.I | re.S)
+STATEMENT_HEAD = re.compile(r"(?P<keyword>[A-Za-z]+)\b")
+STATEMENT_END = re.compile(r"[;\n]")
+BOUNDARY = re.compile(r"[ \t\r\n]*(?P<keyword>[A-Za-z]+)\b")
+COLUMN_DEFINITION = re.compile(rf"(?P<name>{IDENT})\s+(?P<type>\[?\w+\]?(?:\s*\([^)]*\))?)", re.S)
+COLUMN_COMMENT = re.compile(r"\bCOMMENT\s+'(?P<comment>(?:[^'\\]|\\.|'')*)'", re.I | re.S)
+PRIMARY_KEY = re.compile(r"(?:CONSTRAINT\s+\S+\s+)?PRIMARY\s+KEY\b[^(]*\((?P<columns>[^)]*)\)", re.I)
+TABLE_CONSTRAINT = re.compile(r"(?:KEY|INDEX|UNIQUE|CONSTRAINT|FOREIGN|FULLTEXT|SPATIAL|CHECK|PERIOD)\b", re.I)
+NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+INTEGER = re.compile(r"[-+]?\d+")
+HEX_LITERAL = re.compile(r"0x(?P<hex>[0-9A-Fa-f]*)|[Xx]'(?P<quoted>[0-9A-Fa-f]*)'")
+TUPLE_SEPARATOR = re.compile(r"\s*,\s*")
+STRING_PREFIX = re.compile(r"(?:N|_\w+\s*)(?=')")
+MYSQL_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+def unquote_identifier(name: str) -> str:
+    if len(name) > 1 and name[0] in "`\"[":
+        return name[1:-1]
+    return name
+
+
+def split_qualified(name: str) -> List[str]:
+    return [unquote_identifier(part) for part in IDENT_PATTERN.findall(name)]
+
+
+def unescape_literal(text: str, backslash_escapes: bool) -> str:
+    text = text.replace("''", "'")
+    if backslash_escapes and "\\" in text:
+        text = re.sub(r"\\(.)", lambda m: MYSQL_ESCAPES.get(m.group(1), m.group(1)), text, flags=re.S)
+    return text
+
+
+class _NeedMore(Exception):
+    """缓冲区中的数据不足以完成当前解析，需要继续读取"""
+
+
+class DumpTable:
+    """转储文件中单个表的解析结果：字段定义、主键、前 N 行样本与数据量"""
+
+    def __init__(self):
+        # 原始字段定义：[(字段名, 类型, 是否可空, 注释), ...]
+        self.columns: List[List] = []
+        self.primary_key: List[str] = []
+        self.rows: List[Dict] = []
+        # 样本之外是否还有被跳过的数据行
+        self.truncated = False
+        # INSERT 语句总字符数（近似数据大小）
+        self.data_chars = 0
+
+    def set_comment(self, column_name: str, comment: str) -> None:
+        for column in self.columns:
+            if column[0] == column_name:
+                column[3] = comment
+
+
+class SqlDumpParser:
+    """SQL 转储文件流式解析器
+
+    按块读取（.sql.gz 边读边解压），只解析 CREATE TABLE（含字段注释）、USE、Oracle COMMENT ON COLUMN、
+    SQL Server MS_Description 扩展属性以及每个表的前 sample_rows 个 INSERT 元组；样本取满后其余 INSERT 数据
+    只做语句边界扫描直接跳过，不做逐值解析。缓冲区只保留当前语句未处理的部分，内存占用与转储大小无关
+    """
+
+    def __init__(self, path: str, sample_rows: int, encoding: str = "utf-8", chunk_chars: int = READ_CHUNK_CHARS):
+        self.path = path
+        self.sample_rows = sample_rows
+        self.encoding = encoding
+        self.chunk_chars = chunk_chars
+        self.tables: Dict[str, Dict[str, DumpTable]] = {}
+        # 未出现 USE 语句时，以文件名作为库名
+        self.default_db = os.path.basename(path).split(".")[0]
+        self.current_db: Optional[str] = None
+        self.backslash_escapes = False
+        self._outside: Optional[re.Pattern] = None
+        self._quote_end: Dict[str, re.Pattern] = {}
+        self._file: Optional[IO[str]] = None
+        self._buf = ""
+        self._pos = 0
+        # 已丢弃的缓冲区前缀长度（用于计算全局字符偏移）
+        self._base = 0
+        self._eof = False
+
+    # ---------- 缓冲区 ----------
+
+    def _fill(self) -> bool:
+        """丢弃已处理部分并追加读取一块，文件结束时返回 False"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self.chunk_chars)
+        if self._pos:
+            self._base += self._pos
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def _ensure(self, size: int) -> None:
+        """保证当前位置之后至少有 size 个字符（文件结束时尽量满足）"""
+        while len(self._buf) - self._pos < size and self._fill():
+            pass
+
+    @property
+    def _offset(self) -> int:
+        return self._base + self._pos
+
+    # ---------- 主循环 ----------
+
+    def parse(self) -> Dict[str, Dict[str, DumpTable]]:
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding=self.encoding, errors="replace") as self._file:
+            self._ensure(4096)
+            self.backslash_escapes = any(marker in self._buf[:4096] for marker in MYSQL_DUMP_MARKERS)
+            # 语句边界扫描：引号外查找结束符/引号/括号（无分号脚本还需查找换行），引号内查找闭合引号与转义符
+            self._outside = re.compile(r"[;'\"`()]" if self.backslash_escapes else r"[;'\"()\n]")
+            self._quote_end = {quote: re.compile(f"[{quote}\\\\]" if self.backslash_escapes else quote)
+                               for quote in "'\"`"}
+            while self._skip_blank():
+                self._ensure(4096)
+                match = STATEMENT_HEAD.match(self._buf, self._pos)
+                keyword = match.group("keyword").upper() if match else ""
+                if keyword == "INSERT":
+                    self._parse_insert()
+                elif keyword == "GO":
+                    self._pos = match.end()
+                elif keyword in ("CREATE", "USE", "COMMENT", "EXEC", "EXECUTE"):
+                    self._handle_statement(self._scan_statement(capture=True))
+                else:
+                    self._scan_statement(capture=False)
+        return self.tables
+
+    def _skip_blank(self) -> bool:
+        """跳过空白、空语句与注释，文件结束时返回 False"""
+        while True:
+            self._ensure(2)
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ";"):
+                pos += 1
+            self._pos = pos
+            if pos >= len(buf):
+                if not self._fill():
+                    return False
+                continue
+            self._ensure(2)
+            head = self._buf[self._pos:self._pos + 2]
+            if head == "--" or (head[0] == "#" and self.backslash_escapes):
+                self._skip_until("\n")
+            elif head == "/*":
+                self._skip_until("*/")
+            else:
+                return True
+
+    def _skip_until(self, marker: str) -> None:
+        while True:
+            idx = self._buf.find(marker, self._pos)
+            if idx >= 0:
+                self._pos = idx + len(marker)
+                return
+            # 保留可能被截断的标记前缀
+            self._pos = max(self._pos, len(self._buf) - len(marker) + 1)
+            if not self._fill():
+                self._pos = len(self._buf)
+                return
+
+    def _scan_statement(self, capture: bool) -> str:
+        """从当前位置扫描到语句结束（引号与括号感知），capture 时返回语句文本（不含结束符）"""
+        parts: List[str] = []
+        quote: Optional[str] = None
+        depth = 0
+        start = self._pos
+        while True:
+            buf, i = self._buf, self._pos
+            match = (self._quote_end[quote] if quote else self._outside).search(buf, i)
+            if match is None:
+                # 本块内没有特殊字符：整块跳过
+                if capture:
+                    parts.append(buf[start:])
+                self._pos = len(buf)
+                if not self._fill():
+                    return "".join(parts)
+                start = self._pos
+                continue
+            i = match.start()
+            char = buf[i]
+            if quote:
+                if char == "\\":
+                    if i + 1 >= len(buf):
+                        # 转义符位于块末尾：保留到下一块再处理
+                        if capture:
+                            parts.append(buf[start:i])
+                        self._pos = i
+                        if not self._fill():
+                            return "".join(parts)
+                        start = self._pos
+                        continue
+                    self._pos = i + 2
+                else:
+                    quote = None
+                    self._pos = i + 1
+                continue
+            if char in "'\"`":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth = max(0, depth - 1)
+            elif char == ";":
+                if capture:
+                    parts.append(buf[start:i])
+                self._pos = i + 1
+                return "".join(parts)
+            elif char == "\n" and depth == 0:
+                # 无分号脚本：换行后以语句关键字开头即为新语句
+                if len(buf) - i < 64 and not self._eof:
+                    if capture:
+                        parts.append(buf[start:i])
+                    self._pos = i
+                    self._fill()
+                    start = self._pos
+                    continue
+                boundary = BOUNDARY.match(buf, i + 1)
+                if boundary and boundary.group("keyword").upper() in STATEMENT_KEYWORDS:
+                    if capture:
+                        parts.append(buf[start:i])
+                    self._pos = i
+                    return "".join(parts)
+            self._pos = i + 1
+
+    def _repeat_follows(self, prefix: str) -> bool:
+        """下一条语句是否以 prefix 开头（允许先有一个换行）；是则定位到该语句开头"""
+        self._ensure(len(prefix) + 1)
+        pos = self._pos + 1 if self._buf.startswith("\n", self._pos) else self._pos
+        if self._buf.startswith(prefix, pos):
+            self._pos = pos
+            return True
+        return False
+
+    def _skip_insert_data(self, repeat_prefix: Optional[str] = None) -> None:
+        """跳过 INSERT 语句的剩余数据；mysqldump 字符串内不含原始换行，直接查找行尾分号。
+        repeat_prefix 非空时，紧随其后的同表 INSERT（逐行 INSERT 的转储）一并跳过"""
+        if not self.backslash_escapes:
+            self._skip_ansi_insert_data(repeat_prefix)
+            return
+        while True:
+            idx = self._buf.find(";\n", self._pos)
+            if idx >= 0:
+                self._pos = idx + 2
+                if repeat_prefix and self._repeat_follows(repeat_prefix):
+                    continue
+                return
+            self._pos = max(self._pos, len(self._buf) - 1)
+            if not self._fill():
+                self._pos = len(self._buf)
+                return
+
+    def _skip_ansi_insert_data(self, repeat_prefix: Optional[str] = None) -> None:
+        """无反斜杠转义的脚本：只在分号/换行处按单引号奇偶判断是否位于字符串外，不逐个字符扫描"""
+        in_string = False
+        while True:
+            buf = self._buf
+            match = STATEMENT_END.search(buf, self._pos)
+            if match is None:
+                in_string ^= buf.count("'", self._pos) % 2 == 1
+                self._pos = len(buf)
+                if not self._fill():
+                    return
+                continue
+            i = match.start()
+            in_string ^= buf.count("'", self._pos, i) % 2 == 1
+            self._pos = i + 1
+            if in_string:
+                continue
+            if repeat_prefix and self._repeat_follows(repeat_prefix):
+                continue
+            if buf[i] == ";":
+                return
+            buf, i = self._buf, self._pos - 1
+            if len(buf) - i < 64 and not self._eof:
+                # 换行位于块末尾：读取下一块后再判断下一行是否为新语句
+                self._pos = i
+                self._fill()
+                continue
+            boundary = BOUNDARY.match(buf, i + 1)
+            if boundary and boundary.group("keyword").upper() in STATEMENT_KEYWORDS:
+                self._pos = i
+                return
+
+    # ---------- 语句处理 ----------
+
+    def _resolve_table(self, parts: List[str]) -> Tuple[str, str]:
+        """限定名解析为 (库名, 表名)：已有 USE 时两段名视为 架构.表，否则视为 库.表；三段名取首段与末段"""
+        if len(parts) >= 3 or (len(parts) == 2 and self.current_db is None):
+            return parts[0], parts[-1]
+        return self.current_db or self.default_db, parts[-1]
+
+    def _table(self, db_name: str, table_name: str) -> DumpTable:
+        return self.tables.setdefault(db_name, {}).setdefault(table_name, DumpTable())
+
+    def _handle_statement(self, statement: str) -> None:
+        statement = statement.strip()
+        match = CREATE_TABLE.match(statement)
+        if match:
+            self._parse_create_table(match, statement)
+            return
+        match = USE_DATABASE.match(statement)
+        if match:
+            self.current_db = unquote_identifier(match.group("db"))
+            return
+        match = ORACLE_COLUMN_COMMENT.match(statement)
+        if match:
+            parts = split_qualified(match.group("target"))
+            if len(parts) >= 2:
+                db_name, table_name = self._resolve_table(parts[:-1])
+                if table_name in self.tables.get(db_name, {}):
+                    self.tables[db_name][table_name].set_comment(parts[-1], match.group("comment").replace("''", "'"))
+            return
+        if SQLSERVER_DESCRIPTION.search(statement):
+            props = {m.group("key").lower(): m.group("value").replace("''", "'")
+                     for m in SQLSERVER_PROPERTY.finditer(statement)}
+            if "level2name" in props and "level1name" in props:
+                db_name = self.current_db or self.default_db
+                table = self.tables.get(db_name, {}).get(props["level1name"])
+                if table:
+                    table.set_comment(props["level2name"], props.get("value", ""))
+
+    def _parse_create_table(self, match: re.Match, statement: str) -> None:
+        db_name, table_name = self._resolve_table(split_qualified(match.group("table")))
+        table = self._table(db_name, table_name)
+        table.columns = []
+        for item in self._split_top_level(statement, match.end()):
+            primary_key = PRIMARY_KEY.match(item)
+            if primary_key:
+                table.primary_key = [unquote_identifier(col.strip().split()[0])
+                                     for col in primary_key.group("columns").split(",") if col.strip()]
+                continue
+            if TABLE_CONSTRAINT.match(item):
+                continue
+            column = COLUMN_DEFINITION.match(item)
+            if not column:
+                continue
+            name = unquote_identifier(column.group("name"))
+            column_type = re.sub(r"\s+", " ", re.sub(r"[\[\]]", "", column.group("type")))
+            rest = item[column.end():]
+            comment = COLUMN_COMMENT.search(rest)
+            table.columns.append([
+                name, column_type, not re.search(r"\bNOT\s+NULL\b", rest, re.I),
+                unescape_literal(comment.group("comment"), self.backslash_escapes) if comment else ""
+            ])
+            if re.search(r"\bPRIMARY\s+KEY\b", rest, re.I):
+                table.primary_key = [name]
+
+    def _split_top_level(self, text: str, start: int) -> List[str]:
+        """按顶层逗号拆分 CREATE TABLE 括号内的定义项"""
+        items, depth, quote, item_start, i = [], 0, None, start, start
+        while i < len(text):
+            char = text[i]
+            if quote:
+                if char == "\\" and self.backslash_escapes:
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif char in "'\"`":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                if depth == 0:
+                    items.append(text[item_start:i].strip())
+                    break
+                depth -= 1
+            elif char == "," and depth == 0:
+                items.append(text[item_start:i].strip())
+                item_start = i + 1
+            i += 1
+        return [item for item in items if item]
+
+    def _parse_insert(self) -> None:
+        started = self._offset
+        self._ensure(4096)
+        header = INSERT_HEADER.match(self._buf, self._pos)
+        if not header:
+            self._scan_statement(capture=False)
+            return
+        db_name, table_name = self._resolve_table(split_qualified(header.group("table")))
+        table = self._table(db_name, table_name)
+        repeat_prefix = self._buf[header.start():header.end("table")]
+        self._pos = header.end()
+        names = [unquote_identifier(col.strip()) for col in header.group("columns").split(",")] \
+            if header.group("columns") else [column[0] for column in table.columns]
+
+        saturated = False
+        while True:
+            if len(table.rows) >= self.sample_rows:
+                saturated = True
+                break
+            try:
+                values, end = self._parse_tuple(self._buf, self._pos)
+            except _NeedMore:
+                if self._fill():
+                    continue
+                break
+            except ValueError as e:
+                logger.debug(f"转储文件 {self.path}：表 {db_name}.{table_name} 的 INSERT 无法解析，已跳过：{str(e)}")
+                break
+            self._pos = end
+            table.rows.append({
+                names[idx] if idx < len(names) else f"col_{idx + 1}": value for idx, value in enumerate(values)
+            })
+            self._ensure(64)
+            match = TUPLE_SEPARATOR.match(self._buf, self._pos)
+            if not match:
+                break
+            self._pos = match.end()
+        # 样本已取满：剩余元组及紧随其后的同表 INSERT 不再逐值解析
+        table.truncated = table.truncated or saturated
+        self._skip_insert_data(repeat_prefix if saturated else None)
+        table.data_chars += self._offset - started
+
+    def _parse_tuple(self, buf: str, i: int) -> Tuple[List, int]:
+        """解析一个 (v1, v2, ...) 元组，数据不完整时抛出 _NeedMore"""
+        try:
+            while buf[i].isspace():
+                i += 1
+            if buf[i] != "(":
+                raise ValueError(f"元组格式错误：{buf[i:i + 32]!r}")
+            i += 1
+            values = []
+            while True:
+                while buf[i].isspace():
+                    i += 1
+                value, i = self._parse_value(buf, i)
+                values.append(value)
+                while buf[i].isspace():
+                    i += 1
+                if buf[i] == ",":
+                    i += 1
+                elif buf[i] == ")":
+                    return values, i + 1
+                else:
+                    raise ValueError(f"元组格式错误：{buf[i:i + 32]!r}")
+        except IndexError:
+            raise _NeedMore()
+
+    def _parse_value(self, buf: str, i: int):
+        char = buf[i]
+        prefix = STRING_PREFIX.match(buf, i)
+        if prefix:
+            i, char = prefix.end(), "'"
+        if char == "'":
+            return self._parse_string(buf, i)
+        hex_literal = HEX_LITERAL.match(buf, i)
+        if hex_literal:
+            if hex_literal.end() >= len(buf):
+                raise IndexError
+            return bytes.fromhex(hex_literal.group("hex") or hex_literal.group("quoted") or ""), hex_literal.end()
+        if buf.startswith("NULL", i) or buf.startswith("null", i):
+            if i + 4 >= len(buf):
+                raise IndexError
+            return None, i + 4
+        number = NUMBER.match(buf, i)
+        if number and number.end() < len(buf) and buf[number.end()] in ",) \t\r\n":
+            text = number.group()
+            return (int(text) if INTEGER.fullmatch(text) else text), number.end()
+        return self._parse_expression(buf, i)
+
+    def _parse_string(self, buf: str, i: int) -> Tuple[str, int]:
+        parts, i = [], i + 1
+        while True:
+            quote = buf.find("'", i)
+            backslash = buf.find("\\", i, quote if quote >= 0 else len(buf)) if self.backslash_escapes else -1
+            if backslash >= 0:
+                parts.append(buf[i:backslash])
+                escaped = buf[backslash + 1]
+                parts.append(MYSQL_ESCAPES.get(escaped, escaped))
+                i = backslash + 2
+                continue
+            if quote < 0 or quote + 1 >= len(buf):
+                raise IndexError
+            parts.append(buf[i:quote])
+            if buf[quote + 1] == "'":
+                parts.append("'")
+                i = quote + 2
+                continue
+            return "".join(parts), quote + 1
+
+    def _parse_expression(self, buf: str, i: int) -> Tuple[str, int]:
+        """函数调用等复杂取值（TO_DATE(...)、CAST(...) 等）按原文保留"""
+        start, depth, quote = i, 0, None
+        while True:
+            char = buf[i]
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char == "'":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char in ",)" and depth == 0:
+                return buf[start:i].strip(), i
+            elif char == ")":
+                depth -= 1
+            i += 1
+
+
+# 已解析的转储索引：同一进程内多个连接（并发扫描的工作线程）共享，只解析一次
+_DUMP_INDEXES: Dict[Tuple, Dict[str, Dict[str, DumpTable]]] = {}
+_DUMP_INDEX_LOCK = threading.Lock()
+
+
+def find_dump_files(dump_path: str) -> List[str]:
+    """单个文件直接使用；目录按文件名顺序收集其中的 .sql / .sql.gz 文件"""
+    if os.path.isfile(dump_path):
+        return [dump_path]
+    if os.path.isdir(dump_path):
+        return sorted(os.path.join(dump_path, name) for name in os.listdir(dump_path)
+                      if name.lower().endswith(DUMP_SUFFIXES))
+    return []
+
+
+class DumpFileDatabase(BaseDatabase):
+    """SQL 转储文件数据源（mysqldump、SSMS 生成脚本、SQL*Plus/expdp 导出的 SQL 脚本）
+
+    无需数据库服务器：连接时流式解析一遍转储文件，取得表结构、字段注释与每个表的前 N 行样本，
+    之后的库表枚举与数据查询均在内存索引上完成
+    """
+
+    def __init__(self, dump_path: str, extract_rows: int, catalog_mode: str = "table", sample_mode: str = "head",
+                 sample_percent: float = 1.0, projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0, encoding: str = "utf-8"):
+        super().__init__(dump_path, 0, "", "", 0, extract_rows, catalog_mode, sample_mode, sample_percent,
+                         projection, lob_limit, fetch_batch, query_timeout)
+        self.dump_path = dump_path
+        self.encoding = encoding
+        self.tables: Dict[str, Dict[str, DumpTable]] = {}
+
+    def connect(self) -> bool:
+        """解析转储文件（同一文件在进程内只解析一次）"""
+        files = find_dump_files(self.dump_path)
+        if not files:
+            raise DBConnectionError("dump", f"未找到转储文件（支持 {'/'.join(DUMP_SUFFIXES)}）：{self.dump_path}")
+        key = (tuple(os.path.abspath(path) for path in files), self.extract_rows, self.encoding)
+        with _DUMP_INDEX_LOCK:
+            if key not in _DUMP_INDEXES:
+                tables: Dict[str, Dict[str, DumpTable]] = {}
+                for path in files:
+                    try:
+                        parsed = SqlDumpParser(path, self.extract_rows, self.encoding).parse()
+                    except Exception as e:
+                        raise DBConnectionError("dump", f"解析转储文件失败（{path}）：{str(e)}") from e
+                    for db_name, db_tables in parsed.items():
+                        tables.setdefault(db_name, {}).update(db_tables)
+                    logger.info(f"转储文件解析完成：{path}")
+                _DUMP_INDEXES[key] = tables
+        self.tables = _DUMP_INDEXES[key]
+        self.connection = self.tables
+        logger.info(f"转储文件已加载：{self.dump_path}（{len(self.tables)} 个库，"
+                    f"{sum(len(tables) for tables in self.tables.values())} 个表）")
+        return True
+
+    def list_databases(self) -> List[str]:
+        return list(self.tables.keys())
+
+    def list_tables(self, db_name: str) -> List[str]:
+        return list(self.tables.get(db_name, {}).keys())
+
+    def _get_table(self, db_name: str, table_name: str) -> DumpTable:
+        table = self.tables.get(db_name, {}).get(table_name)
+        if table is None:
+            raise DBQueryError(db_name, table_name, "转储文件中不存在该表")
+        return table
+
+    def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        table = self._get_table(db_name, table_name)
+        if not table.columns and table.rows:
+            # 转储中只有 INSERT 没有 CREATE TABLE：以样本行的字段名作为字段信息
+            return [self.build_column_info(name, "", True, "") for name in table.rows[0]]
+        return [self.build_column_info(*column) for column in table.columns]
+
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        for name in ([db_name] if db_name else self.list_databases()):
+            self.column_catalog[name] = {table_name: self.list_columns(name, table_name)
+                                         for table_name in self.list_tables(name)}
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """行数：样本未截断时即为全表行数，否则未知；大小：INSERT 语句的字符数"""
+        return {
+            table_name: {"rows": None if table.truncated else len(table.rows), "bytes": table.data_chars}
+            for table_name, table in self.tables.get(db_name, {}).items()
+        }
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        return self._get_table(db_name, table_name).primary_key
+
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """返回解析时保存的前 N 行，按配置做列裁剪与 LOB 截断（转储文件只保存前 N 行，不支持随机/分层抽样）"""
+        rows = self._get_table(db_name, table_name).rows[:self.extract_rows]
+        selected = None
+        if columns and self.projection:
+            selected = set(self.get_primary_key(db_name, table_name))
+            selected.update(col["column_name"] for col in columns if col["is_sensitive"])
+        result = []
+        for row in rows:
+            row = {key: value for key, value in row.items() if selected is None or key in selected}
+            if self.lob_limit:
+                row = {key: value[:self.lob_limit] if isinstance(value, (str, bytes)) else value
+                       for key, value in row.items()}
+            result.append(row)
+        return result
+
+    def disconnect(self) -> None:
+        self.connection = None
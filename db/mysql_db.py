@@ -1,13 +1,108 @@
+import re
 import pymysql
-from typing import List, Dict
-from db.base_db import BaseDatabase
+from typing import List, Dict, Iterator, Optional, Tuple
+from db.base_db import BaseDatabase, KeyProbe
 from config.default_config import SYSTEM_DATABASES
 from common.logger import logger
 from common.exception_handler import DBConnectionError, DBQueryError
 
+# 可用于主键区间抽样的整数类型
+INTEGER_KEY_TYPES = ("tinyint", "smallint", "mediumint", "int", "bigint")
+# 服务端截断时按字符截取（LEFT）与按字节截取（SUBSTRING）的宽字段类型
+TEXT_LOB_TYPES = ("tinytext", "text", "mediumtext", "longtext", "json")
+BINARY_LOB_TYPES = ("tinyblob", "blob", "mediumblob", "longblob")
+
+INTEGER_KEY_SQL = """
+    SELECT COLUMN_NAME, DATA_TYPE
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_KEY = 'PRI';
+"""
+
+
+def pick_integer_key(key_columns: List[Dict]) -> Optional[str]:
+    """主键为单列整数时返回列名，否则返回 None"""
+    if len(key_columns) == 1 and key_columns[0]["DATA_TYPE"].lower() in INTEGER_KEY_TYPES:
+        return key_columns[0]["COLUMN_NAME"]
+    return None
+
+
+TABLE_STATS_SQL = """
+    SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE';
+"""
+
+# 表结构指纹：由字段定义本身计算（逐列 MD5 取前 64 位按位异或，加字段数），不受 GROUP_CONCAT 长度限制。
+# 不使用 TABLES.CREATE_TIME/UPDATE_TIME：两者在 MySQL 8 中是缓存的统计值，INSTANT DDL、重命名字段、
+# 修改注释不一定更新，而 UPDATE_TIME 又随每次 DML 变化
+TABLE_FINGERPRINT_SQL = """
+    SELECT TABLE_NAME, COUNT(*) AS COLUMN_COUNT,
+           BIT_XOR(CAST(CONV(LEFT(MD5(CONCAT_WS(CHAR(0), ORDINAL_POSITION, COLUMN_NAME, COLUMN_TYPE,
+                                                IS_NULLABLE, COLUMN_COMMENT)), 16), 16, 10) AS UNSIGNED)) AS COLUMN_HASH
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = %s
+    GROUP BY TABLE_NAME;
+"""
+
+# 单次查询取得字段类型、可空性、注释与主键标记（替代 USE + DESCRIBE + 注释查询三次往返）
+COLUMNS_SQL = """
+    SELECT COLUMN_NAME, COLUMN_TYPE, DATA_TYPE, IS_NULLABLE, COLUMN_COMMENT, COLUMN_KEY
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+    ORDER BY ORDINAL_POSITION;
+"""
+
+PRIMARY_KEY_SQL = """
+    SELECT COLUMN_NAME
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+    ORDER BY ORDINAL_POSITION;
+"""
+
+
+def session_timeout_statements(query_timeout: int) -> List[str]:
+    """会话级语句超时设置：MySQL 使用 MAX_EXECUTION_TIME（毫秒），MariaDB 使用 max_statement_time（秒）；
+    同时限制元数据锁等待（lock_wait_timeout），避免被锁住的表无限期阻塞"""
+    return [
+        f"SET SESSION MAX_EXECUTION_TIME = {int(query_timeout * 1000)}, SESSION lock_wait_timeout = {query_timeout};",
+        f"SET SESSION max_statement_time = {query_timeout}, SESSION lock_wait_timeout = {query_timeout};",
+    ]
+
+
+def mysql_column_expression(column_name: str, column_type: str, lob_limit: int) -> str:
+    """TEXT/JSON 与超过 lob_limit 的 (VAR)CHAR 用 LEFT 截断，BLOB 与超长 (VAR)BINARY 用 SUBSTRING 截断"""
+    column = f"`{column_name}`"
+    if lob_limit:
+        type_name = column_type.lower()
+        base_type = type_name.split("(")[0].strip()
+        length = re.search(r"\((\d+)\)", type_name)
+        wide = bool(length) and int(length.group(1)) > lob_limit
+        if base_type in TEXT_LOB_TYPES or (base_type in ("char", "varchar") and wide):
+            return f"LEFT({column}, {lob_limit}) AS {column}"
+        if base_type in BINARY_LOB_TYPES or (base_type in ("binary", "varbinary") and wide):
+            return f"SUBSTRING({column}, 1, {lob_limit}) AS {column}"
+    return column
+
+
+def build_key_probe_sql(table_ref: str, key_column: str, probes: List[KeyProbe],
+                        select_list: str = "*") -> Tuple[str, List[int]]:
+    """将各主键区间探测合并为一条 UNION ALL 查询（每个分支走主键索引范围扫描，避免 ORDER BY RAND() 全表排序）"""
+    key = f"`{key_column}`"
+    parts, params = [], []
+    for start, stop, batch in probes:
+        parts.append(f"(SELECT {select_list} FROM {table_ref} WHERE {key} >= %s AND {key} < %s "
+                     f"ORDER BY {key} LIMIT {batch})")
+        params.extend((start, stop))
+    return " UNION ALL ".join(parts) + ";", params
+
+
 class MySQLDatabase(BaseDatabase):
-    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int, charset: str = "utf8mb4"):
-        super().__init__(host, port, user, password, timeout, extract_rows)
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int, charset: str = "utf8mb4",
+                 catalog_mode: str = "table", sample_mode: str = "head", sample_percent: float = 1.0,
+                 projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0):
+        super().__init__(host, port, user, password, timeout, extract_rows, catalog_mode, sample_mode, sample_percent,
+                         projection, lob_limit, fetch_batch, query_timeout)
         self.charset = charset
 
     def connect(self) -> bool:
@@ -20,18 +115,37 @@ class MySQLDatabase(BaseDatabase):
                 password=self.password,
                 charset=self.charset,
                 connect_timeout=self.timeout,
+                # 客户端读超时兜底（服务端不支持语句超时或网络中断时）
+                read_timeout=self.query_timeout * 2 if self.query_timeout else None,
                 cursorclass=pymysql.cursors.DictCursor
             )
             self.cursor = self.connection.cursor()
+            self.current_database = None
+            if self.query_timeout:
+                self._apply_session_timeout()
             logger.info(f"MySQL 连接成功：{self.host}:{self.port}（用户：{self.user}）")
             return True
         except Exception as e:
             raise DBConnectionError("mysql", str(e)) from e
 
+    def _apply_session_timeout(self) -> None:
+        for statement in session_timeout_statements(self.query_timeout):
+            try:
+                self.execute(statement)
+                return
+            except Exception:
+                continue
+        logger.warning("MySQL 服务端不支持会话级语句超时，仅依赖客户端读超时")
+
+    def sample_server_load(self) -> Optional[float]:
+        """Threads_running：服务端正在执行语句的线程数（含本连接）"""
+        rows = self.fetch_dicts(self.execute("SHOW GLOBAL STATUS LIKE 'Threads_running';"))
+        return float(rows[0]["Value"]) if rows else None
+
     def list_databases(self) -> List[str]:
         """获取 MySQL 非系统数据库"""
         try:
-            self.cursor.execute("SHOW DATABASES;")
+            self.execute("SHOW DATABASES;")
             all_dbs = [item["Database"] for item in self.cursor.fetchall()]
             # 排除系统库
             system_dbs = SYSTEM_DATABASES.get("mysql", [])
@@ -39,58 +153,154 @@ class MySQLDatabase(BaseDatabase):
         except Exception as e:
             raise DBQueryError("system", "show_databases", str(e)) from e
 
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        """一次流式查询 INFORMATION_SCHEMA.COLUMNS 加载整库（或全部非系统库）的字段目录，在本地完成敏感字段分类"""
+        if db_name:
+            where_clause, params = "TABLE_SCHEMA = %s", (db_name,)
+        else:
+            system_dbs = SYSTEM_DATABASES.get("mysql", [])
+            where_clause = f"TABLE_SCHEMA NOT IN ({', '.join(['%s'] * len(system_dbs))})"
+            params = tuple(system_dbs)
+
+        cursor = None
+        column_count = 0
+        try:
+            # 使用无缓冲游标逐行读取，避免一次性缓存整个实例的字段元数据
+            cursor = self.connection.cursor(pymysql.cursors.SSCursor)
+            self.execute(f"""
+                SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_COMMENT
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE {where_clause}
+                ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION;
+            """, params, cursor)
+            for schema, table_name, column_name, column_type, is_nullable, column_comment in cursor:
+                table_columns = self.column_catalog.setdefault(schema, {}).setdefault(table_name, [])
+                table_columns.append(self.build_column_info(
+                    column_name, column_type, is_nullable == "YES", column_comment
+                ))
+                column_count += 1
+            logger.info(f"MySQL 字段目录加载完成：{db_name or '全部非系统库'}，共 {column_count} 个字段")
+        except Exception as e:
+            raise DBQueryError(db_name or "system", "load_catalog", f"批量加载字段目录失败：{str(e)}") from e
+        finally:
+            if cursor:
+                cursor.close()
+
+    def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """以字段定义（名称、类型、可空性、注释、顺序）的哈希作为表结构指纹，一次查询取得整库"""
+        try:
+            self.execute(TABLE_FINGERPRINT_SQL, (db_name,))
+            return {
+                item["TABLE_NAME"]: f"{item['COLUMN_COUNT']}|{item['COLUMN_HASH']}"
+                for item in self.cursor.fetchall()
+            }
+        except Exception as e:
+            raise DBQueryError(db_name, "table_fingerprints", str(e)) from e
+
+    def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        try:
+            return self.execute(f"SELECT 1 FROM `{db_name}`.`{table_name}` LIMIT 1;").fetchone() is not None
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"探测数据失败：{str(e)}") from e
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """INFORMATION_SCHEMA.TABLES 的 TABLE_ROWS（InnoDB 为估算值）与 DATA_LENGTH"""
+        try:
+            self.execute(TABLE_STATS_SQL, (db_name,))
+            return {item["TABLE_NAME"]: {"rows": item["TABLE_ROWS"], "bytes": item["DATA_LENGTH"]}
+                    for item in self.cursor.fetchall()}
+        except Exception as e:
+            raise DBQueryError(db_name, "table_stats", str(e)) from e
+
     def list_tables(self, db_name: str) -> List[str]:
         """获取指定数据库下的表"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None:
+            return list(catalog.keys())
         try:
-            self.cursor.execute(f"USE `{db_name}`;")
-            self.cursor.execute("SHOW TABLES;")
+            # 使用限定库名，无需 USE 切换
+            self.execute(f"SHOW TABLES FROM `{db_name}`;")
             return [list(item.values())[0] for item in self.cursor.fetchall()]
         except Exception as e:
             raise DBQueryError(db_name, "show_tables", str(e)) from e
 
     def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
         """获取表字段信息（含敏感字段标记）"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None and table_name in catalog:
+            return catalog[table_name]
         try:
-            self.cursor.execute(f"USE `{db_name}`;")
-            # 获取字段基本信息（类型、是否为空等）
-            self.cursor.execute(f"DESCRIBE `{table_name}`;")
-            columns = self.cursor.fetchall()
-
-            # 获取字段注释
-            self.cursor.execute(f"""
-                SELECT COLUMN_NAME, COLUMN_COMMENT 
-                FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s;
-            """, (db_name, table_name))
-            comments = {item["COLUMN_NAME"]: item["COLUMN_COMMENT"] for item in self.cursor.fetchall()}
+            columns = self.execute(COLUMNS_SQL, (db_name, table_name)).fetchall()
+            # 主键列随字段一并取得，列裁剪 / 主键区间抽样时无需再次查询
+            self.remember_key_columns(db_name, table_name, [
+                {"COLUMN_NAME": col["COLUMN_NAME"], "DATA_TYPE": col["DATA_TYPE"]}
+                for col in columns if col["COLUMN_KEY"] == "PRI"
+            ])
 
             # 整理字段信息，添加敏感字段标记
-            result = []
-            for col in columns:
-                field_name = col["Field"]
-                is_sensitive, sensitive_type = self.is_sensitive_column(
-                    field_name, comments.get(field_name, "")
-                )
-                result.append({
-                    "column_name": field_name,
-                    "column_type": col["Type"],
-                    "is_nullable": col["Null"] == "YES",
-                    "column_comment": comments.get(field_name, ""),
-                    "is_sensitive": is_sensitive,
-                    "sensitive_type": sensitive_type
-                })
-            return result
+            return [
+                self.build_column_info(col["COLUMN_NAME"], col["COLUMN_TYPE"], col["IS_NULLABLE"] == "YES",
+                                       col["COLUMN_COMMENT"])
+                for col in columns
+            ]
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"获取字段信息失败：{str(e)}") from e
 
-    def query_top_rows(self, db_name: str, table_name: str) -> List[Dict]:
-        """查询表前 N 行数据（所有字段）"""
+    def quote_identifier(self, name: str) -> str:
+        return f"`{name}`"
+
+    def column_expression(self, column_name: str, column_type: str) -> str:
+        return mysql_column_expression(column_name, column_type, self.lob_limit)
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        key_columns = self.cached_key_columns(db_name, table_name)
+        if key_columns is not None:
+            return [item["COLUMN_NAME"] for item in key_columns]
+        return [item["COLUMN_NAME"] for item in self.execute(PRIMARY_KEY_SQL, (db_name, table_name)).fetchall()]
+
+    def get_integer_key(self, db_name: str, table_name: str) -> Optional[str]:
+        """获取单列整数主键（INFORMATION_SCHEMA.COLUMNS.COLUMN_KEY = 'PRI'）"""
+        key_columns = self.cached_key_columns(db_name, table_name)
+        if key_columns is None:
+            key_columns = self.execute(INTEGER_KEY_SQL, (db_name, table_name)).fetchall()
+        return pick_integer_key(key_columns)
+
+    def query_key_bounds(self, db_name: str, table_name: str, key_column: str) -> Optional[Tuple[int, int]]:
+        bounds = self.execute(f"SELECT MIN(`{key_column}`) AS low, MAX(`{key_column}`) AS high "
+                              f"FROM `{db_name}`.`{table_name}`;").fetchone()
+        return None if bounds["low"] is None else (int(bounds["low"]), int(bounds["high"]))
+
+    def query_key_probes(self, db_name: str, table_name: str, key_column: str, probes: List[KeyProbe],
+                         select_list: str = "*") -> List[Dict]:
+        sql, params = build_key_probe_sql(f"`{db_name}`.`{table_name}`", key_column, probes, select_list)
+        return list(self.execute(sql, params).fetchall())
+
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表前 N 行数据；配置抽样模式时改为主键区间随机 / 分层探测，配置列裁剪 / LOB 截断时改写 SELECT 列表"""
+        return list(self.iter_top_rows(db_name, table_name, columns))
+
+    def iter_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> Iterator[Dict]:
+        """无缓冲游标（SSDictCursor）按 fetch_batch 分批拉取，结果不在客户端整体缓存"""
+        cursor = None
         try:
-            self.cursor.execute(f"USE `{db_name}`;")
-            self.cursor.execute(f"SELECT * FROM `{table_name}` LIMIT {self.extract_rows};")
-            return self.cursor.fetchall()
+            select_list = self.build_select_list(db_name, table_name, columns)
+            rows = self.query_sample_rows(db_name, table_name, select_list)
+            if rows is not None:
+                yield from rows
+                return
+            cursor = self.connection.cursor(pymysql.cursors.SSDictCursor)
+            self.execute(f"SELECT {select_list} FROM `{db_name}`.`{table_name}` LIMIT {self.extract_rows};",
+                         cursor=cursor)
+            while True:
+                batch = cursor.fetchmany(self.fetch_batch)
+                if not batch:
+                    break
+                yield from batch
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"查询数据失败：{str(e)}") from e
+        finally:
+            if cursor:
+                cursor.close()
 
     def disconnect(self) -> None:
         """断开 MySQL 连接"""
@@ -1,13 +1,24 @@
 import oracledb
-from typing import List, Dict
-from db.base_db import BaseDatabase
+from typing import Any, List, Dict, Iterator, Optional, Tuple
+from db.base_db import BaseDatabase, KeyProbe
 from config.default_config import SYSTEM_DATABASES
 from common.logger import logger
 from common.exception_handler import DBConnectionError, DBQueryError
 
 class OracleDatabase(BaseDatabase):
-    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int, service_name: str = None):
-        super().__init__(host, port, user, password, timeout, extract_rows)
+    # 批量加载字段目录时每次网络往返拉取的行数
+    CATALOG_ARRAYSIZE = 5000
+    # SQL 语境下 DBMS_LOB.SUBSTR 的返回上限：CLOB 为 VARCHAR2(4000)，NCLOB 为 NVARCHAR2(2000 字符)，BLOB 为 RAW(2000)
+    LOB_SUBSTR_LIMITS = {"CLOB": 4000, "NCLOB": 2000, "BLOB": 2000}
+    # 估算表大小时使用的数据块大小（默认 8K）
+    BLOCK_BYTES = 8192
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int, service_name: str = None,
+                 catalog_mode: str = "table", sample_mode: str = "head", sample_percent: float = 1.0,
+                 projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0):
+        super().__init__(host, port, user, password, timeout, extract_rows, catalog_mode, sample_mode, sample_percent,
+                         projection, lob_limit, fetch_batch, query_timeout)
         # Oracle 连接配置
         # 如果没有提供service_name，默认使用ORCL
         service_name = service_name or "ORCL"
@@ -24,18 +35,32 @@ class OracleDatabase(BaseDatabase):
         try:
             # 连接 Oracle 数据库
             self.connection = oracledb.connect(**self.connection_params)
+            if self.query_timeout:
+                # 单次数据库往返超时（毫秒），超时后调用被中断并抛出 DPY-4024
+                self.connection.call_timeout = int(self.query_timeout * 1000)
             self.cursor = self.connection.cursor()
             logger.info(f"Oracle 连接成功：{self.host}:{self.port}（用户：{self.user}）")
             return True
         except Exception as e:
             raise DBConnectionError("oracle", str(e)) from e
 
+    PING_SQL = "SELECT 1 FROM DUAL"
+
+    def sample_server_load(self) -> Optional[float]:
+        """最近一分钟的平均活动会话数（v$sysmetric，需 SELECT_CATALOG_ROLE 等可见权限）"""
+        self.execute("""
+            SELECT value FROM v$sysmetric
+            WHERE metric_name = 'Average Active Sessions' AND group_id = 2
+        """)
+        row = self.cursor.fetchone()
+        return float(row[0]) if row else None
+
     def list_databases(self) -> List[str]:
         """获取 Oracle 非系统用户（Oracle 没有真正的数据库概念，这里返回用户列表）"""
         try:
             # 查询所有用户（排除系统用户）
             # 使用all_users代替dba_users，普通用户也能访问
-            self.cursor.execute("""
+            self.execute("""
                 SELECT username 
                 FROM all_users
                 ORDER BY username
@@ -48,25 +73,111 @@ class OracleDatabase(BaseDatabase):
         except Exception as e:
             raise DBQueryError("system", "show_databases", str(e)) from e
 
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        """按用户（或全部非系统用户）一次性关联 all_tab_columns 与 all_col_comments 加载字段目录"""
+        if db_name:
+            where_clause, params = "c.owner = :owner", {"owner": db_name}
+        else:
+            system_users = SYSTEM_DATABASES.get("oracle", [])
+            params = {f"sys{idx}": user for idx, user in enumerate(system_users)}
+            where_clause = f"c.owner NOT IN ({', '.join(':' + key for key in params)})"
+
+        cursor = None
+        column_count = 0
+        try:
+            cursor = self.connection.cursor()
+            # 加大单次往返行数，减少数据字典查询的网络往返
+            cursor.arraysize = self.CATALOG_ARRAYSIZE
+            cursor.prefetchrows = self.CATALOG_ARRAYSIZE
+            self.execute(f"""
+                SELECT
+                    c.owner,
+                    c.table_name,
+                    c.column_name,
+                    c.data_type,
+                    c.nullable,
+                    cc.comments
+                FROM all_tab_columns c
+                JOIN all_tables t
+                    ON t.owner = c.owner
+                    AND t.table_name = c.table_name
+                LEFT JOIN all_col_comments cc
+                    ON cc.owner = c.owner
+                    AND cc.table_name = c.table_name
+                    AND cc.column_name = c.column_name
+                WHERE {where_clause}
+                ORDER BY c.owner, c.table_name, c.column_id
+            """, params, cursor)
+            for owner, table_name, column_name, data_type, nullable, comments in cursor:
+                table_columns = self.column_catalog.setdefault(owner, {}).setdefault(table_name, [])
+                table_columns.append(self.build_column_info(column_name, data_type, nullable == 'Y', comments))
+                column_count += 1
+            logger.info(f"Oracle 字段目录加载完成：{db_name or '全部非系统用户'}，共 {column_count} 个字段")
+        except Exception as e:
+            raise DBQueryError(db_name or "system", "load_catalog", f"批量加载字段目录失败：{str(e)}") from e
+        finally:
+            if cursor:
+                cursor.close()
+
+    def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """以 all_objects.last_ddl_time 作为表变更指纹"""
+        try:
+            self.execute("""
+                SELECT object_name, last_ddl_time
+                FROM all_objects
+                WHERE owner = :owner
+                AND object_type = 'TABLE'
+            """, {"owner": db_name})
+            return {row[0]: str(row[1]) for row in self.cursor.fetchall()}
+        except Exception as e:
+            raise DBQueryError(db_name, "table_fingerprints", str(e)) from e
+
+    def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        try:
+            return self.execute(f"SELECT 1 FROM {db_name}.{table_name} WHERE ROWNUM = 1").fetchone() is not None
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"探测数据失败：{str(e)}") from e
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """all_tables 的 num_rows / blocks（未收集统计信息的表为 NULL）"""
+        try:
+            self.execute("""
+                SELECT table_name, num_rows, blocks
+                FROM all_tables
+                WHERE owner = :owner
+            """, {"owner": db_name})
+            return {
+                row[0]: {"rows": row[1], "bytes": row[2] * self.BLOCK_BYTES if row[2] is not None else None}
+                for row in self.cursor.fetchall()
+            }
+        except Exception as e:
+            raise DBQueryError(db_name, "table_stats", str(e)) from e
+
     def list_tables(self, db_name: str) -> List[str]:
         """获取指定用户下的表（在 Oracle 中，db_name 实际上是用户名）"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None:
+            return list(catalog.keys())
         try:
             # 查询指定用户下的表
-            self.cursor.execute("""
+            self.execute("""
                 SELECT table_name 
                 FROM all_tables 
                 WHERE owner = :owner
                 ORDER BY table_name
-            """, owner=db_name)
+            """, {"owner": db_name})
             return [row[0] for row in self.cursor.fetchall()]
         except Exception as e:
             raise DBQueryError(db_name, "show_tables", str(e)) from e
 
     def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
         """获取表字段信息（含敏感字段标记）"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None and table_name in catalog:
+            return catalog[table_name]
         try:
             # 查询字段信息（名称、类型、注释、是否允许为空）
-            self.cursor.execute("""
+            self.execute("""
                 SELECT 
                     column_name, 
                     data_type, 
@@ -80,44 +191,121 @@ class OracleDatabase(BaseDatabase):
                 WHERE owner = :owner 
                 AND table_name = :table_name
                 ORDER BY column_id
-            """, owner=db_name, table_name=table_name)
+            """, {"owner": db_name, "table_name": table_name})
 
             columns = self.cursor.fetchall()
-            result = []
-            for col in columns:
-                column_name = col[0]
-                column_comment = col[3] or ""
-                is_sensitive, sensitive_type = self.is_sensitive_column(
-                    column_name, column_comment
-                )
-                result.append({
-                    "column_name": column_name,
-                    "column_type": col[1],
-                    "is_nullable": col[2] == 'Y',
-                    "column_comment": column_comment,
-                    "is_sensitive": is_sensitive,
-                    "sensitive_type": sensitive_type
-                })
-            return result
+            return [self.build_column_info(col[0], col[1], col[2] == 'Y', col[3]) for col in columns]
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"获取字段信息失败：{str(e)}") from e
 
-    def query_top_rows(self, db_name: str, table_name: str) -> List[Dict]:
-        """查询表前 N 行数据（所有字段）"""
+    def fetch_dicts(self, cursor: Any) -> List[Dict]:
+        """将当前结果集转换为字典列表（键为字段名）"""
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def use_statement(self, db_name: str) -> Optional[str]:
+        # 表名均以 用户名.表名 限定，无需切换当前 schema
+        return None
+
+    def quote_identifier(self, name: str) -> str:
+        # 目录中的字段名即实际大小写，加双引号原样引用
+        return f'"{name}"'
+
+    def column_expression(self, column_name: str, column_type: str) -> str:
+        """CLOB/NCLOB/BLOB 用 DBMS_LOB.SUBSTR 截断，VARCHAR2/NVARCHAR2 用 SUBSTR 截断"""
+        column = self.quote_identifier(column_name)
+        if self.lob_limit:
+            type_name = column_type.upper()
+            if type_name in self.LOB_SUBSTR_LIMITS:
+                return f"DBMS_LOB.SUBSTR({column}, {min(self.lob_limit, self.LOB_SUBSTR_LIMITS[type_name])}, 1) AS {column}"
+            if type_name in ("VARCHAR2", "NVARCHAR2"):
+                return f"SUBSTR({column}, 1, {self.lob_limit}) AS {column}"
+        return column
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        self.execute("""
+            SELECT cc.column_name
+            FROM all_constraints k
+            JOIN all_cons_columns cc ON k.owner = cc.owner AND k.constraint_name = cc.constraint_name
+            WHERE k.owner = :owner AND k.table_name = :table_name AND k.constraint_type = 'P'
+            ORDER BY cc.position
+        """, {"owner": db_name, "table_name": table_name})
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_integer_key(self, db_name: str, table_name: str) -> Optional[str]:
+        """获取单列整数主键（NUMBER 且标度为 0）"""
+        self.execute("""
+            SELECT cc.column_name, c.data_type, c.data_scale
+            FROM all_constraints k
+            JOIN all_cons_columns cc ON k.owner = cc.owner AND k.constraint_name = cc.constraint_name
+            JOIN all_tab_columns c
+                ON c.owner = cc.owner AND c.table_name = cc.table_name AND c.column_name = cc.column_name
+            WHERE k.owner = :owner AND k.table_name = :table_name AND k.constraint_type = 'P'
+        """, {"owner": db_name, "table_name": table_name})
+        key_columns = self.cursor.fetchall()
+        if len(key_columns) == 1 and key_columns[0][1] == "NUMBER" and key_columns[0][2] == 0:
+            return key_columns[0][0]
+        return None
+
+    def query_key_bounds(self, db_name: str, table_name: str, key_column: str) -> Optional[Tuple[int, int]]:
+        key = self.quote_identifier(key_column)
+        self.execute(f"SELECT MIN({key}), MAX({key}) FROM {db_name}.{table_name}")
+        low, high = self.cursor.fetchone()
+        return None if low is None else (int(low), int(high))
+
+    def query_key_probes(self, db_name: str, table_name: str, key_column: str, probes: List[KeyProbe],
+                         select_list: str = "*") -> List[Dict]:
+        """各主键区间的 ROWNUM 子查询合并为一条 UNION ALL 查询"""
+        key = self.quote_identifier(key_column)
+        parts, params = [], {}
+        for idx, (start, stop, batch) in enumerate(probes):
+            parts.append(f"SELECT * FROM (SELECT {select_list} FROM {db_name}.{table_name} WHERE {key} >= :lo{idx} "
+                         f"AND {key} < :hi{idx} ORDER BY {key}) WHERE ROWNUM <= {batch}")
+            params.update({f"lo{idx}": start, f"hi{idx}": stop})
+        return self.fetch_dicts(self.execute(" UNION ALL ".join(parts), params))
+
+    def query_block_sample(self, db_name: str, table_name: str, select_list: str = "*") -> Optional[List[Dict]]:
+        """SAMPLE BLOCK 按数据块抽样，只读取约 sample_percent% 的块"""
+        self.execute(f"""
+            SELECT {select_list} FROM {db_name}.{table_name} SAMPLE BLOCK ({float(self.sample_percent):g})
+            WHERE ROWNUM <= :limit
+        """, {"limit": self.extract_rows})
+        return self.fetch_dicts(self.cursor)
+
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表前 N 行数据；配置抽样模式时改为 SAMPLE BLOCK / 主键区间抽样，配置列裁剪 / LOB 截断时改写 SELECT 列表"""
+        return list(self.iter_top_rows(db_name, table_name, columns))
+
+    def iter_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> Iterator[Dict]:
+        """独立游标以 arraysize / prefetchrows = fetch_batch 分批拉取并逐批转换为字典"""
+        cursor = None
         try:
+            select_list = self.build_select_list(db_name, table_name, columns)
+            rows = self.query_sample_rows(db_name, table_name, select_list)
+            if rows is not None:
+                yield from rows
+                return
+            cursor = self.connection.cursor()
+            cursor.arraysize = self.fetch_batch
+            cursor.prefetchrows = self.fetch_batch
             # 查询前 N 行，转换为字典格式（键为字段名）
             full_table_name = f"{db_name}.{table_name}"
-            self.cursor.execute(f"""
-                SELECT * FROM {full_table_name} 
+            self.execute(f"""
+                SELECT {select_list} FROM {full_table_name} 
                 WHERE ROWNUM <= :limit
-            """, limit=self.extract_rows)
-            
-            # 获取字段名列表
-            columns = [column[0] for column in self.cursor.description]
-            # 转换行数据为字典
-            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            """, {"limit": self.extract_rows}, cursor)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(zip(columns, row))
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"查询数据失败：{str(e)}") from e
+        finally:
+            if cursor:
+                cursor.close()
 
     def disconnect(self) -> None:
         """断开 Oracle 连接"""
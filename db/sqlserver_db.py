@@ -1,13 +1,22 @@
 import pyodbc
-from typing import List, Dict
-from db.base_db import BaseDatabase
+from typing import Any, List, Dict, Iterator, Optional, Sequence, Tuple
+from db.base_db import BaseDatabase, KeyProbe, Statement
 from config.default_config import SYSTEM_DATABASES
 from common.logger import logger
 from common.exception_handler import DBConnectionError, DBQueryError
 
 class SQLServerDatabase(BaseDatabase):
-    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int):
-        super().__init__(host, port, user, password, timeout, extract_rows)
+    # 可用于主键区间抽样的整数类型
+    INTEGER_KEY_TYPES = ("tinyint", "smallint", "int", "bigint")
+    # 服务端截断时用 SUBSTRING 截取的字符 / 二进制类型（目录中不含长度，统一截取，短值不受影响）
+    TRUNCATABLE_TYPES = ("char", "varchar", "nchar", "nvarchar", "text", "ntext", "binary", "varbinary", "image")
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int, extract_rows: int,
+                 catalog_mode: str = "table", sample_mode: str = "head", sample_percent: float = 1.0,
+                 projection: bool = False, lob_limit: int = 0, fetch_batch: int = 1000,
+                 query_timeout: int = 0):
+        super().__init__(host, port, user, password, timeout, extract_rows, catalog_mode, sample_mode, sample_percent,
+                         projection, lob_limit, fetch_batch, query_timeout)
         # 获取可用的SQL Server ODBC驱动
         self.driver = self._get_available_driver()
         if not self.driver:
@@ -24,6 +33,9 @@ class SQLServerDatabase(BaseDatabase):
             r"TrustServerCertificate=yes;"
             r"Encrypt=no;"
         )
+        # 表键名（list_tables 返回的名称）对应的原始 (schema, 表名)：{(库名, 表键名): (schema, 表名)}，
+        # 枚举表 / 加载目录时记录，生成三段式名称时直接使用，不从键名按 "." 拆分（表名本身可能含 "."）
+        self._table_parts: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
     
     def _get_available_driver(self):
         """获取可用的SQL Server ODBC驱动"""
@@ -59,17 +71,35 @@ class SQLServerDatabase(BaseDatabase):
                 timeout=self.timeout
             )
             self.connection = pyodbc.connect(conn_str)
+            if self.query_timeout:
+                # 之后创建的游标继承语句超时（秒），超时抛出 HYT00
+                self.connection.timeout = self.query_timeout
             self.cursor = self.connection.cursor()
+            # 连接字符串指定 DATABASE=master，尚未切换到任何目标库
+            self.current_database = None
+            if self.query_timeout:
+                # 锁等待超时（毫秒），被锁住的表不会无限期阻塞
+                self.execute(f"SET LOCK_TIMEOUT {int(self.query_timeout * 1000)};")
             logger.info(f"SQL Server 连接成功：{self.host}:{self.port}（用户：{self.user}，驱动：{self.driver}）")
             return True
         except Exception as e:
             raise DBConnectionError("sqlserver", str(e)) from e
 
+    def sample_server_load(self) -> Optional[float]:
+        """用户会话中正在执行（running / runnable / suspended）的请求数，不含本会话；需 VIEW SERVER STATE 权限"""
+        self.execute("""
+            SELECT COUNT(*) FROM sys.dm_exec_requests r
+            JOIN sys.dm_exec_sessions s ON s.session_id = r.session_id
+            WHERE s.is_user_process = 1 AND r.session_id <> @@SPID
+              AND r.status IN ('running', 'runnable', 'suspended');
+        """)
+        return float(self.cursor.fetchone()[0])
+
     def list_databases(self) -> List[str]:
         """获取 SQL Server 非系统数据库"""
         try:
             # 查询所有数据库
-            self.cursor.execute("SELECT name FROM sys.databases;")
+            self.execute("SELECT name FROM sys.databases;")
             all_dbs = [row[0] for row in self.cursor.fetchall()]
             # 排除系统库
             system_dbs = SYSTEM_DATABASES.get("sqlserver", [])
@@ -77,77 +107,314 @@ class SQLServerDatabase(BaseDatabase):
         except Exception as e:
             raise DBQueryError("system", "show_databases", str(e)) from e
 
+    @staticmethod
+    def _quote_name(name: str) -> str:
+        """以方括号转义标识符"""
+        return "[" + name.replace("]", "]]") + "]"
+
+    def _qualified_table(self, db_name: str, table_name: str) -> str:
+        """表键名转为 [db].[schema].[table]：schema 与表名取枚举时记录的原始名称；
+        未记录（或逐表模式下多个 schema 存在同名表）时为 [db]..[table]，按该库的默认 schema 解析"""
+        schema, name = self._table_parts.get((db_name, table_name), (None, table_name))
+        return ".".join([self._quote_name(db_name), self._quote_name(schema) if schema else "",
+                         self._quote_name(name)])
+
+    def share_catalog(self, other: "BaseDatabase") -> None:
+        """与字段目录一起共享表名对应关系（工作连接不再枚举表）"""
+        super().share_catalog(other)
+        self._table_parts = other._table_parts
+
+    def load_catalog(self, db_name: Optional[str] = None) -> None:
+        """单次查询加载指定库全部用户表（跨所有 schema）的字段与 MS_Description，表名以 schema.table 为键"""
+        if not db_name:
+            # SQL Server 字段目录按库隔离，实例模式下逐库加载
+            for name in self.list_databases():
+                self.load_catalog(name)
+            return
+
+        db = self._quote_name(db_name)
+        cursor = None
+        column_count = 0
+        try:
+            cursor = self.connection.cursor()
+            # 使用三段式名称访问目标库的目录视图，无需 USE 切换
+            self.execute(f"""
+                SELECT
+                    s.name AS schema_name,
+                    t.name AS table_name,
+                    col.name AS column_name,
+                    ty.name AS column_type,
+                    col.is_nullable,
+                    CAST(ISNULL(ep.value, '') AS NVARCHAR(4000)) AS column_comment
+                FROM
+                    {db}.sys.tables t
+                JOIN
+                    {db}.sys.schemas s ON s.schema_id = t.schema_id
+                JOIN
+                    {db}.sys.columns col ON col.object_id = t.object_id
+                JOIN
+                    {db}.sys.types ty ON ty.user_type_id = col.user_type_id
+                LEFT JOIN
+                    {db}.sys.extended_properties ep
+                    ON ep.class = 1
+                    AND ep.major_id = col.object_id
+                    AND ep.minor_id = col.column_id
+                    AND ep.name = 'MS_Description'
+                WHERE
+                    t.is_ms_shipped = 0
+                ORDER BY
+                    s.name, t.name, col.column_id;
+            """, cursor=cursor)
+            table_catalog = self.column_catalog.setdefault(db_name, {})
+            for row in cursor:
+                key = f"{row.schema_name}.{row.table_name}"
+                self._table_parts[(db_name, key)] = (row.schema_name, row.table_name)
+                table_columns = table_catalog.setdefault(key, [])
+                table_columns.append(self.build_column_info(
+                    row.column_name, row.column_type, row.is_nullable == 1, row.column_comment
+                ))
+                column_count += 1
+            logger.info(f"SQL Server 字段目录加载完成：{db_name}，共 {column_count} 个字段")
+        except Exception as e:
+            raise DBQueryError(db_name, "load_catalog", f"批量加载字段目录失败：{str(e)}") from e
+        finally:
+            if cursor:
+                cursor.close()
+
+    def get_table_fingerprints(self, db_name: str) -> Dict[str, str]:
+        """以 sys.tables.modify_date 作为表变更指纹，键与 list_tables 的表名形式一致"""
+        db = self._quote_name(db_name)
+        try:
+            self.execute(f"""
+                SELECT s.name AS schema_name, t.name AS table_name, t.modify_date
+                FROM {db}.sys.tables t
+                JOIN {db}.sys.schemas s ON s.schema_id = t.schema_id
+                WHERE t.type = 'U';
+            """)
+            fingerprints: Dict[str, str] = {}
+            for row in self.cursor.fetchall():
+                if self.catalog_mode == "table":
+                    # 逐表模式下表名不含 schema，同名表的指纹合并
+                    key = row.table_name
+                    fingerprint = f"{row.schema_name}:{row.modify_date}"
+                    fingerprints[key] = "|".join(sorted(filter(None, [fingerprints.get(key), fingerprint])))
+                else:
+                    fingerprints[f"{row.schema_name}.{row.table_name}"] = str(row.modify_date)
+            return fingerprints
+        except Exception as e:
+            raise DBQueryError(db_name, "table_fingerprints", str(e)) from e
+
+    def table_has_rows(self, db_name: str, table_name: str) -> Optional[bool]:
+        try:
+            return self.execute(f"SELECT TOP 1 1 FROM {self._qualified_table(db_name, table_name)};").fetchone() is not None
+        except Exception as e:
+            raise DBQueryError(db_name, table_name, f"探测数据失败：{str(e)}") from e
+
+    def get_table_stats(self, db_name: str) -> Dict[str, Dict[str, Optional[int]]]:
+        """sys.dm_db_partition_stats 汇总各表行数（堆/聚集索引分区）与已用页大小，键与 list_tables 的表名形式一致"""
+        db = self._quote_name(db_name)
+        try:
+            self.execute(f"""
+                SELECT s.name AS schema_name, t.name AS table_name,
+                       SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END) AS row_count,
+                       SUM(ps.used_page_count) * 8192 AS used_bytes
+                FROM {db}.sys.dm_db_partition_stats ps
+                JOIN {db}.sys.tables t ON t.object_id = ps.object_id
+                JOIN {db}.sys.schemas s ON s.schema_id = t.schema_id
+                WHERE t.type = 'U'
+                GROUP BY s.name, t.name;
+            """)
+            stats: Dict[str, Dict[str, Optional[int]]] = {}
+            for row in self.cursor.fetchall():
+                # 逐表模式下表名不含 schema，同名表的统计值合并
+                key = row.table_name if self.catalog_mode == "table" else f"{row.schema_name}.{row.table_name}"
+                entry = stats.setdefault(key, {"rows": 0, "bytes": 0})
+                entry["rows"] += int(row.row_count)
+                entry["bytes"] += int(row.used_bytes)
+            return stats
+        except Exception as e:
+            raise DBQueryError(db_name, "table_stats", str(e)) from e
+
     def list_tables(self, db_name: str) -> List[str]:
         """获取指定数据库下的表"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None:
+            return list(catalog.keys())
+        db = self._quote_name(db_name)
         try:
-            # 切换数据库
-            self.cursor.execute(f"USE [{db_name}];")
-            # 查询用户表（排除系统表）
-            self.cursor.execute("""
-                SELECT name FROM sys.tables 
-                WHERE type = 'U'  -- U = User Table（用户表）
-                ORDER BY name;
+            # 查询用户表（排除系统表），使用三段式名称无需 USE 切换
+            self.execute(f"""
+                SELECT s.name AS schema_name, t.name AS table_name
+                FROM {db}.sys.tables t
+                JOIN {db}.sys.schemas s ON s.schema_id = t.schema_id
+                WHERE t.type = 'U'  -- U = User Table（用户表）
+                ORDER BY t.name;
             """)
-            return [row[0] for row in self.cursor.fetchall()]
+            schemas: Dict[str, List[str]] = {}
+            for row in self.cursor.fetchall():
+                schemas.setdefault(row.table_name, []).append(row.schema_name)
+            # 逐表模式下表名不含 schema：只在一个 schema 中存在的表记录其 schema，同名表按默认 schema 解析
+            for table_name, owners in schemas.items():
+                self._table_parts[(db_name, table_name)] = (owners[0] if len(owners) == 1 else None, table_name)
+            return list(schemas)
         except Exception as e:
             raise DBQueryError(db_name, "show_tables", str(e)) from e
 
+    def _columns_statement(self, db_name: str, table_name: str) -> Statement:
+        """字段信息（名称、类型、注释、是否允许为空）查询，使用三段式名称无需 USE 切换"""
+        db = self._quote_name(db_name)
+        return f"""
+            SELECT 
+                col.name AS column_name,
+                t.name AS column_type,
+                col.is_nullable,
+                ISNULL(ep.value, '') AS column_comment
+            FROM 
+                {db}.sys.columns col
+            JOIN 
+                {db}.sys.types t ON col.user_type_id = t.user_type_id
+            LEFT JOIN 
+                {db}.sys.extended_properties ep 
+                ON ep.class = 1
+                AND col.object_id = ep.major_id 
+                AND col.column_id = ep.minor_id 
+                AND ep.name = 'MS_Description'
+            WHERE 
+                col.object_id = OBJECT_ID(?)
+            ORDER BY 
+                col.column_id;
+        """, [self._qualified_table(db_name, table_name)]
+
+    def _primary_key_statement(self, db_name: str, table_name: str) -> Statement:
+        """主键列名与类型查询（三段式名称）"""
+        db = self._quote_name(db_name)
+        return f"""
+            SELECT c.name AS column_name, t.name AS type_name
+            FROM {db}.sys.indexes i
+            JOIN {db}.sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+            JOIN {db}.sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+            JOIN {db}.sys.types t ON c.user_type_id = t.user_type_id
+            WHERE i.is_primary_key = 1 AND i.object_id = OBJECT_ID(?)
+            ORDER BY ic.key_ordinal;
+        """, [self._qualified_table(db_name, table_name)]
+
     def list_columns(self, db_name: str, table_name: str) -> List[Dict]:
         """获取表字段信息（含敏感字段标记）"""
+        catalog = self.get_catalog(db_name)
+        if catalog is not None and table_name in catalog:
+            return catalog[table_name]
         try:
-            self.cursor.execute(f"USE [{db_name}];")
-            # 查询字段信息（名称、类型、注释、是否允许为空）
-            self.cursor.execute(f"""
-                SELECT 
-                    col.name AS column_name,
-                    t.name AS column_type,
-                    col.is_nullable,
-                    ISNULL(ep.value, '') AS column_comment
-                FROM 
-                    sys.columns col
-                JOIN 
-                    sys.types t ON col.system_type_id = t.system_type_id
-                LEFT JOIN 
-                    sys.extended_properties ep 
-                    ON col.object_id = ep.major_id 
-                    AND col.column_id = ep.minor_id 
-                    AND ep.name = 'MS_Description'
-                WHERE 
-                    col.object_id = OBJECT_ID('[{table_name}]')
-                ORDER BY 
-                    col.column_id;
-            """)
-
-            columns = self.cursor.fetchall()
-            result = []
-            for col in columns:
-                column_name = col.column_name
-                is_sensitive, sensitive_type = self.is_sensitive_column(
-                    column_name, col.column_comment
-                )
-                result.append({
-                    "column_name": column_name,
-                    "column_type": col.column_type,
-                    "is_nullable": col.is_nullable == 1,
-                    "column_comment": col.column_comment,
-                    "is_sensitive": is_sensitive,
-                    "sensitive_type": sensitive_type
-                })
-            return result
+            statements = [self._columns_statement(db_name, table_name)]
+            # 列裁剪 / 主键区间抽样需要主键：与字段查询合并为一个批次，一次往返取回
+            need_keys = self.projection or self.sample_mode != "head"
+            if need_keys:
+                statements.append(self._primary_key_statement(db_name, table_name))
+            results = self.execute_batch(statements)
+            if need_keys:
+                self.remember_key_columns(db_name, table_name, results[1])
+            return [
+                self.build_column_info(col["column_name"], col["column_type"], col["is_nullable"] == 1,
+                                       col["column_comment"])
+                for col in results[0]
+            ]
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"获取字段信息失败：{str(e)}") from e
 
-    def query_top_rows(self, db_name: str, table_name: str) -> List[Dict]:
-        """查询表前 N 行数据（所有字段）"""
+    def fetch_dicts(self, cursor: Any) -> List[Dict]:
+        """将当前结果集转换为字典列表（键为字段名）"""
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def execute_batch(self, statements: Sequence[Statement]) -> List[List[Dict]]:
+        """多条语句合并为一个批次发送（一次往返），按顺序读取各结果集"""
+        sql = "\n".join(statement for statement, _ in statements)
+        params = [value for _, statement_params in statements for value in (statement_params or [])]
+        cursor = self.execute(sql, params or None)
+        results = []
+        while True:
+            # 不返回结果集的语句（如 SET）没有 description，跳过
+            if cursor.description is not None:
+                results.append(self.fetch_dicts(cursor))
+            if not cursor.nextset():
+                break
+        return results
+
+    def quote_identifier(self, name: str) -> str:
+        return self._quote_name(name)
+
+    def column_expression(self, column_name: str, column_type: str) -> str:
+        """字符 / 二进制 / text / image 用 SUBSTRING 截断，xml 转为 nvarchar 后截断"""
+        column = self._quote_name(column_name)
+        if self.lob_limit:
+            type_name = column_type.lower()
+            if type_name in self.TRUNCATABLE_TYPES:
+                return f"SUBSTRING({column}, 1, {self.lob_limit}) AS {column}"
+            if type_name == "xml":
+                return f"LEFT(CAST({column} AS nvarchar(max)), {self.lob_limit}) AS {column}"
+        return column
+
+    def _primary_key_columns(self, db_name: str, table_name: str) -> List[Dict]:
+        """主键列名与类型：优先使用查询字段时同批次取得的结果"""
+        key_columns = self.cached_key_columns(db_name, table_name)
+        if key_columns is None:
+            key_columns = self.execute_batch([self._primary_key_statement(db_name, table_name)])[0]
+        return key_columns
+
+    def get_primary_key(self, db_name: str, table_name: str) -> List[str]:
+        return [row["column_name"] for row in self._primary_key_columns(db_name, table_name)]
+
+    def get_integer_key(self, db_name: str, table_name: str) -> Optional[str]:
+        """获取单列整数主键"""
+        key_columns = self._primary_key_columns(db_name, table_name)
+        if len(key_columns) == 1 and key_columns[0]["type_name"] in self.INTEGER_KEY_TYPES:
+            return key_columns[0]["column_name"]
+        return None
+
+    def query_key_bounds(self, db_name: str, table_name: str, key_column: str) -> Optional[Tuple[int, int]]:
+        key = self._quote_name(key_column)
+        low, high = self.execute(f"SELECT MIN({key}), MAX({key}) FROM {self._qualified_table(db_name, table_name)};").fetchone()
+        return None if low is None else (int(low), int(high))
+
+    def query_key_probes(self, db_name: str, table_name: str, key_column: str, probes: List[KeyProbe],
+                         select_list: str = "*") -> List[Dict]:
+        """各主键区间的 TOP 子查询合并为一条 UNION ALL 查询"""
+        key = self._quote_name(key_column)
+        table = self._qualified_table(db_name, table_name)
+        parts, params = [], []
+        for idx, (start, stop, batch) in enumerate(probes):
+            parts.append(f"SELECT * FROM (SELECT TOP {batch} {select_list} FROM {table} "
+                         f"WHERE {key} >= ? AND {key} < ? ORDER BY {key}) AS p{idx}")
+            params.extend((start, stop))
+        return self.fetch_dicts(self.execute(" UNION ALL ".join(parts) + ";", params))
+
+    def query_block_sample(self, db_name: str, table_name: str, select_list: str = "*") -> Optional[List[Dict]]:
+        """TABLESAMPLE SYSTEM 按数据页抽样，只读取约 sample_percent% 的页"""
+        return self.fetch_dicts(self.execute(
+            f"SELECT TOP {self.extract_rows} {select_list} FROM {self._qualified_table(db_name, table_name)} "
+            f"TABLESAMPLE SYSTEM ({float(self.sample_percent):g} PERCENT);"))
+
+    def query_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> List[Dict]:
+        """查询表前 N 行数据；配置抽样模式时改为 TABLESAMPLE / 主键区间抽样，配置列裁剪 / LOB 截断时改写 SELECT 列表"""
+        return list(self.iter_top_rows(db_name, table_name, columns))
+
+    def iter_top_rows(self, db_name: str, table_name: str, columns: Optional[List[Dict]] = None) -> Iterator[Dict]:
+        """fetchmany 按 fetch_batch 分批拉取并逐批转换为字典"""
         try:
-            self.cursor.execute(f"USE [{db_name}];")
+            # 所有读取均使用 [db].[schema].[table] 三段式名称，无需 USE 切换
+            select_list = self.build_select_list(db_name, table_name, columns)
+            rows = self.query_sample_rows(db_name, table_name, select_list)
+            if rows is not None:
+                yield from rows
+                return
             # 查询前 N 行，转换为字典格式（键为字段名）
-            self.cursor.execute(f"SELECT TOP {self.extract_rows} * FROM [{table_name}];")
-            
-            # 获取字段名列表
+            self.execute(f"SELECT TOP {self.extract_rows} {select_list} FROM {self._qualified_table(db_name, table_name)};")
             columns = [column[0] for column in self.cursor.description]
-            # 转换行数据为字典
-            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            while True:
+                batch = self.cursor.fetchmany(self.fetch_batch)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(zip(columns, row))
         except Exception as e:
             raise DBQueryError(db_name, table_name, f"查询数据失败：{str(e)}") from e
 
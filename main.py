@@ -1,37 +1,113 @@
 import os
+import asyncio
+import cProfile
 import argparse
 import time
 import sys
 from dotenv import load_dotenv
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from config.default_config import DB_DEFAULT_CONFIG, COMMON_CONFIG
 from db.base_db import BaseDatabase  # 新增：导入基类
 from db.mysql_db import MySQLDatabase
 from common.logger import logger
 from common.proxy_handler import set_proxy, clear_proxy
-from common.exporter import ResultExporter
+from common.exporter import StreamingExporter
+from common.scan_engine import ScanEngine
+from common.content_classifier import ContentClassifier
+from common.checkpoint import CheckpointJournal
+from common.schema_cache import SchemaCache
+from common.fleet import FleetRunner, build_target_config, load_inventory
+from common.work_queue import QUEUE_ROLES, QueueCoordinator, QueueWorker, WorkQueue
+from common.scan_planner import ScanPlanner
+from common.circuit_breaker import TableCircuitBreaker
+from common.throttle import AdaptiveThrottle
+from common.profiler import ScanProfiler
+from common.async_scanner import AsyncScanner
+from db.async_base_db import AsyncBaseDatabase, ThreadedAsyncDatabase
 from common.exception_handler import BaseExtractorError
 
 def parse_args() -> argparse.Namespace:
     """解析命令行参数（修复 -h 冲突，改用 -H 作为 --host 缩写）"""
-    parser = argparse.ArgumentParser(description="敏感数据提取工具（支持 MySQL/SQL Server/Oracle）")
+    parser = argparse.ArgumentParser(description="敏感数据提取工具（支持 MySQL/SQL Server/Oracle/SQL 转储文件）")
 
     # 数据库核心参数：--host 缩写改为 -H（避免与帮助参数 -h 冲突）
     parser.add_argument("-t", "--db-type", type=str, default="mysql",
-                        choices=["mysql", "sqlserver", "oracle"], help="数据库类型（默认：mysql）")
+                        choices=["mysql", "sqlserver", "oracle", "dump"],
+                        help="数据库类型，dump 为离线扫描 SQL 转储文件（默认：mysql）")
     parser.add_argument("-H", "--host", type=str, help="数据库IP/主机名（默认：127.0.0.1）")  # 关键修改：-h → -H
     parser.add_argument("-P", "--port", type=int, help="数据库端口（默认：mysql=3306，sqlserver=1433，oracle=1521）")
     parser.add_argument("-u", "--user", type=str, help="数据库用户名（默认：mysql=root，sqlserver=sa，oracle=system）")
     parser.add_argument("-pwd", "--password", type=str, help="数据库密码（默认：空）")
     parser.add_argument("-s", "--service-name", type=str, help="Oracle服务名（默认：ORCL）")
+    parser.add_argument("--dump-path", type=str,
+                        help="SQL 转储文件或目录（-t dump 时使用，支持 .sql / .sql.gz，目录下的转储文件按文件名顺序解析）")
 
     # 扩展参数
     parser.add_argument("-px", "--proxy", type=str, help="代理地址（格式：http://ip:port 或 socks5://ip:port）")
     parser.add_argument("-to", "--timeout", type=int, help="连接超时时间（秒，默认：10）")
     parser.add_argument("-r", "--extract-rows", type=int, help="提取表数据行数（默认：5）")
     parser.add_argument("-e", "--export-type", type=str, default="all",
-                        choices=["csv", "json", "all"], help="导出格式（默认：all）")
+                        choices=["csv", "json", "all", "parquet", "arrow"],
+                        help="导出格式：all=JSON+CSV；parquet/arrow=列式导出 findings/columns/samples 三张表，需安装 pyarrow（默认：all）")
+    parser.add_argument("--jsonl-compression", type=str, choices=["none", "gzip", "zstd"],
+                        help="流式 JSON Lines 结果的压缩方式，zstd 需安装 zstandard（默认：none）")
+    parser.add_argument("--shard-by", type=str, choices=["database", "table"],
+                        help="另外按库或按表导出分片 JSON Lines 与索引 index.json，供 sensitive_data_viewer_new.html 按需加载（默认：不分片）")
     parser.add_argument("-o", "--output-dir", type=str, help="导出文件目录（默认：./output）")
+    parser.add_argument("-c", "--catalog-mode", type=str, choices=["table", "schema", "instance"],
+                        help="字段目录加载方式：table=逐表查询，schema=按库批量加载，instance=一次加载全部库（默认：table）")
+    parser.add_argument("--sample-mode", type=str, choices=["head", "random", "stratified"],
+                        help="数据抽样方式：head=前 N 行；random=随机抽样（SQL Server TABLESAMPLE / Oracle SAMPLE BLOCK / "
+                             "MySQL 主键随机探测）；stratified=按主键区间分层抽样（默认：head）")
+    parser.add_argument("--sample-percent", type=float, help="块抽样（TABLESAMPLE / SAMPLE BLOCK）百分比（默认：1）")
+    parser.add_argument("--projection", action="store_true", help="只查询敏感字段与主键，不再 SELECT *")
+    parser.add_argument("--lob-limit", type=int,
+                        help="宽字段/LOB 字段在服务端截断的长度，文本按字符、二进制按字节（默认：0，不截断）")
+    parser.add_argument("--fetch-batch", type=int,
+                        help="流式读取时每批拉取的行数，单表超过该行数的结果边读取边转存临时文件（默认：1000）")
+    parser.add_argument("--plan", action="store_true",
+                        help="按目录统计信息规划扫描：跳过空表，按价值/成本排序（--time-budget / --plan-only 时自动启用）")
+    parser.add_argument("--time-budget", type=float, help="扫描时间预算（秒），到期后不再开始新的表，返回已完成的部分结果")
+    parser.add_argument("--plan-only", action="store_true", help="只输出扫描规划与预计耗时，不提取数据")
+    parser.add_argument("--query-timeout", type=int,
+                        help="单条语句执行超时（秒，默认：0 即不限制），超时的表熔断且不再重试")
+    parser.add_argument("--slow-table-seconds", type=float,
+                        help="单表扫描耗时超过该值（秒）时记为慢表并写入报告（默认：60）")
+    parser.add_argument("--throttle", action="store_true",
+                        help="按服务端负载与往返延迟自适应调整并发度和表间间隔（并发上限为 -w）")
+    parser.add_argument("--throttle-max-load", type=float,
+                        help="自适应限速的服务端负载阈值：正在执行的会话数达到该值时降低并发（默认：16）")
+    parser.add_argument("--throttle-interval", type=float,
+                        help="自适应限速的负载采样间隔（秒，默认：10）")
+    parser.add_argument("--throttle-max-pacing", type=float,
+                        help="自适应限速时表间间隔的上限（秒，默认：5）")
+    parser.add_argument("--profile", action="store_true",
+                        help="统计各阶段（适配器调用、内容识别、导出）的次数、往返、字节数与耗时分布，"
+                             "写出 profile_<时间戳>.json 与 Prometheus 文本格式的 profile_<时间戳>.prom")
+    parser.add_argument("--profile-cprofile", action="store_true",
+                        help="同时以 cProfile 采集主线程的函数级耗时，写出 profile_<时间戳>.pstats（隐含 --profile）")
+    parser.add_argument("-w", "--workers", type=int, help="并发扫描线程数，每个线程独立连接（默认：1）")
+    parser.add_argument("--resume", action="store_true",
+                        help="从检查点续扫：跳过已完成的表，结果追加到上次任务的导出文件")
+    parser.add_argument("--retries", type=int, help="单表扫描失败后的重试次数（默认：0 即不重试）")
+    parser.add_argument("--schema-cache", type=str,
+                        help="字段元数据缓存文件路径（SQLite），表结构指纹未变的表跨任务复用缓存的字段分类结果")
+    parser.add_argument("-i", "--inventory", type=str,
+                        help="资产清单文件（YAML/CSV/JSON），并发扫描清单中的多个数据库目标")
+    parser.add_argument("--fleet-concurrency", type=int, help="资产清单模式下同时扫描的目标数上限（默认：8）")
+    parser.add_argument("--per-host-concurrency", type=int, help="资产清单模式下同一主机同时扫描的目标数上限（默认：1）")
+    parser.add_argument("--queue", type=str,
+                        help="分布式扫描工作队列文件（SQLite，放在共享存储上）：协调端枚举库表入队并合并结果，"
+                             "多台主机上的工作端租用单元执行扫描")
+    parser.add_argument("--queue-role", type=str, choices=QUEUE_ROLES,
+                        help="分布式扫描角色：coordinator=枚举并合并结果，worker=领取单元扫描（默认：coordinator）")
+    parser.add_argument("--lease-seconds", type=int,
+                        help="分布式扫描中工作单元的租约时长（秒），工作端中断后到期的单元由其他工作端接管（默认：600）")
+    parser.add_argument("--async", dest="async_mode", action="store_true",
+                        help="使用 asyncio 扫描后端（MySQL 安装 aiomysql 时使用原生异步驱动，其余通过线程包装同步驱动）")
+    parser.add_argument("--async-concurrency", type=int, help="异步扫描时单主机最大在途查询数（默认：16）")
+    parser.add_argument("--content-scan", action="store_true",
+                        help="按 SENSITIVE_DATA_PATTERNS 对提取的数据做内容识别（含 Luhn/身份证校验位校验）")
 
     return parser.parse_args()
 
@@ -48,14 +124,55 @@ def load_config(args: argparse.Namespace) -> Dict:
         "timeout": args.timeout or int(os.getenv("TIMEOUT", COMMON_CONFIG["timeout"])),
         "extract_rows": args.extract_rows or int(os.getenv("EXTRACT_ROWS", COMMON_CONFIG["extract_rows"])),
         "export_type": args.export_type or os.getenv("EXPORT_TYPE", COMMON_CONFIG["export_type"]),
+        "jsonl_compression": args.jsonl_compression or os.getenv("JSONL_COMPRESSION", COMMON_CONFIG["jsonl_compression"]),
+        "shard_by": args.shard_by or os.getenv("SHARD_BY") or COMMON_CONFIG["shard_by"],
         "output_dir": args.output_dir or os.getenv("OUTPUT_DIR", COMMON_CONFIG["output_dir"]),
-        "proxy": args.proxy or os.getenv("PROXY") or COMMON_CONFIG["proxy"]
+        "proxy": args.proxy or os.getenv("PROXY") or COMMON_CONFIG["proxy"],
+        "workers": args.workers or int(os.getenv("WORKERS", COMMON_CONFIG["workers"])),
+        "catalog_mode": args.catalog_mode or os.getenv("CATALOG_MODE", COMMON_CONFIG["catalog_mode"]),
+        "sample_mode": args.sample_mode or os.getenv("SAMPLE_MODE", COMMON_CONFIG["sample_mode"]),
+        "sample_percent": args.sample_percent or float(os.getenv("SAMPLE_PERCENT", COMMON_CONFIG["sample_percent"])),
+        "projection": args.projection or os.getenv("PROJECTION", str(COMMON_CONFIG["projection"])).lower() == "true",
+        "lob_limit": args.lob_limit if args.lob_limit is not None else int(os.getenv("LOB_LIMIT", COMMON_CONFIG["lob_limit"])),
+        "fetch_batch": args.fetch_batch or int(os.getenv("FETCH_BATCH", COMMON_CONFIG["fetch_batch"])),
+        "plan": args.plan or os.getenv("PLAN", str(COMMON_CONFIG["plan"])).lower() == "true",
+        "time_budget": args.time_budget or (float(os.getenv("TIME_BUDGET")) if os.getenv("TIME_BUDGET") else COMMON_CONFIG["time_budget"]),
+        "plan_only": args.plan_only,
+        "query_timeout": args.query_timeout if args.query_timeout is not None else int(os.getenv("QUERY_TIMEOUT", COMMON_CONFIG["query_timeout"])),
+        "slow_table_seconds": args.slow_table_seconds or float(os.getenv("SLOW_TABLE_SECONDS", COMMON_CONFIG["slow_table_seconds"])),
+        "throttle": args.throttle or os.getenv("THROTTLE", str(COMMON_CONFIG["throttle"])).lower() == "true",
+        "throttle_max_load": args.throttle_max_load or float(os.getenv("THROTTLE_MAX_LOAD", COMMON_CONFIG["throttle_max_load"])),
+        "throttle_interval": args.throttle_interval or float(os.getenv("THROTTLE_INTERVAL", COMMON_CONFIG["throttle_interval"])),
+        "throttle_max_pacing": args.throttle_max_pacing or float(os.getenv("THROTTLE_MAX_PACING", COMMON_CONFIG["throttle_max_pacing"])),
+        "profile": args.profile or args.profile_cprofile or os.getenv("PROFILE", str(COMMON_CONFIG["profile"])).lower() == "true",
+        "profile_cprofile": args.profile_cprofile or os.getenv("PROFILE_CPROFILE", str(COMMON_CONFIG["profile_cprofile"])).lower() == "true",
+        "resume": args.resume,
+        "async_mode": args.async_mode or os.getenv("ASYNC_MODE", str(COMMON_CONFIG["async_mode"])).lower() == "true",
+        "async_concurrency": args.async_concurrency or int(os.getenv("ASYNC_CONCURRENCY", COMMON_CONFIG["async_concurrency"])),
+        "inventory": args.inventory or os.getenv("INVENTORY") or COMMON_CONFIG["inventory"],
+        "fleet_concurrency": args.fleet_concurrency or int(os.getenv("FLEET_CONCURRENCY", COMMON_CONFIG["fleet_concurrency"])),
+        "per_host_concurrency": args.per_host_concurrency or int(os.getenv("PER_HOST_CONCURRENCY", COMMON_CONFIG["per_host_concurrency"])),
+        "queue": args.queue or os.getenv("QUEUE") or COMMON_CONFIG["queue"],
+        "queue_role": args.queue_role or os.getenv("QUEUE_ROLE", COMMON_CONFIG["queue_role"]),
+        "lease_seconds": args.lease_seconds or int(os.getenv("LEASE_SECONDS", COMMON_CONFIG["lease_seconds"])),
+        "schema_cache": args.schema_cache or os.getenv("SCHEMA_CACHE") or COMMON_CONFIG["schema_cache"],
+        "retries": args.retries if args.retries is not None else int(os.getenv("RETRIES", COMMON_CONFIG["retries"])),
+        "content_scan": args.content_scan or os.getenv("CONTENT_SCAN", str(COMMON_CONFIG["content_scan"])).lower() == "true",
+        "content_hit_threshold": float(os.getenv("CONTENT_HIT_THRESHOLD", COMMON_CONFIG["content_hit_threshold"])),
+        "content_pool_threshold": int(os.getenv("CONTENT_POOL_THRESHOLD", COMMON_CONFIG["content_pool_threshold"]))
     }
     
     # Oracle 额外配置
     if db_type == "oracle":
         config["service_name"] = args.service_name or os.getenv("DB_SERVICE_NAME") or "ORCL"
 
+    # 离线转储文件配置：以转储路径作为目标标识（检查点、字段缓存按路径区分）
+    if db_type == "dump":
+        config["dump_path"] = args.dump_path or os.getenv("DUMP_PATH")
+        if not config["dump_path"]:
+            raise BaseExtractorError("离线扫描转储文件需指定 --dump-path")
+        config["host"] = config["dump_path"]
+
     # MySQL 额外配置
     if db_type == "mysql":
         config["charset"] = os.getenv("DB_CHARSET") or DB_DEFAULT_CONFIG[db_type]["charset"]
@@ -68,7 +185,7 @@ def load_config(args: argparse.Namespace) -> Dict:
     return config
 
 def create_db_instance(config: Dict) -> Optional[BaseDatabase]:
-    """创建数据库实例（支持 MySQL + SQL Server + Oracle）"""
+    """创建数据库实例（支持 MySQL + SQL Server + Oracle + SQL 转储文件）"""
     db_type = config["db_type"]
     try:
         if db_type == "mysql":
@@ -79,7 +196,14 @@ def create_db_instance(config: Dict) -> Optional[BaseDatabase]:
                 password=config["password"],
                 timeout=config["timeout"],
                 extract_rows=config["extract_rows"],
-                charset=config["charset"]
+                charset=config["charset"],
+                catalog_mode=config["catalog_mode"],
+                sample_mode=config["sample_mode"],
+                sample_percent=config["sample_percent"],
+                projection=config["projection"],
+                lob_limit=config["lob_limit"],
+                fetch_batch=config["fetch_batch"],
+                query_timeout=config["query_timeout"]
             )
         elif db_type == "sqlserver":  # 新增 SQL Server 支持
             from db.sqlserver_db import SQLServerDatabase
@@ -89,7 +213,14 @@ def create_db_instance(config: Dict) -> Optional[BaseDatabase]:
                 user=config["user"],
                 password=config["password"],
                 timeout=config["timeout"],
-                extract_rows=config["extract_rows"]
+                extract_rows=config["extract_rows"],
+                catalog_mode=config["catalog_mode"],
+                sample_mode=config["sample_mode"],
+                sample_percent=config["sample_percent"],
+                projection=config["projection"],
+                lob_limit=config["lob_limit"],
+                fetch_batch=config["fetch_batch"],
+                query_timeout=config["query_timeout"]
             )
         elif db_type == "oracle":  # 新增 Oracle 支持
             from db.oracle_db import OracleDatabase
@@ -100,20 +231,260 @@ def create_db_instance(config: Dict) -> Optional[BaseDatabase]:
                 password=config["password"],
                 timeout=config["timeout"],
                 extract_rows=config["extract_rows"],
-                service_name=config.get("service_name")
+                service_name=config.get("service_name"),
+                catalog_mode=config["catalog_mode"],
+                sample_mode=config["sample_mode"],
+                sample_percent=config["sample_percent"],
+                projection=config["projection"],
+                lob_limit=config["lob_limit"],
+                fetch_batch=config["fetch_batch"],
+                query_timeout=config["query_timeout"]
+            )
+        elif db_type == "dump":  # 离线 SQL 转储文件
+            from db.dump_db import DumpFileDatabase
+            return DumpFileDatabase(
+                dump_path=config["dump_path"],
+                extract_rows=config["extract_rows"],
+                catalog_mode=config["catalog_mode"],
+                sample_mode=config["sample_mode"],
+                sample_percent=config["sample_percent"],
+                projection=config["projection"],
+                lob_limit=config["lob_limit"],
+                fetch_batch=config["fetch_batch"],
+                query_timeout=config["query_timeout"]
             )
         else:
-            logger.error(f"暂未支持 {db_type} 数据库，当前支持：mysql/sqlserver/oracle")
+            logger.error(f"暂未支持 {db_type} 数据库，当前支持：mysql/sqlserver/oracle/dump")
             return None
     except Exception as e:
         logger.error(f"创建数据库实例失败：{str(e)}")
         return None
 
+def create_async_db_instance(config: Dict) -> AsyncBaseDatabase:
+    """创建异步数据库实例：MySQL 优先使用 aiomysql 原生异步驱动，其余数据库以线程包装同步驱动"""
+    if config["db_type"] == "mysql":
+        try:
+            from db.async_mysql_db import AsyncMySQLDatabase
+        except ImportError:
+            logger.warning("未安装 aiomysql，MySQL 异步扫描改为线程包装同步驱动")
+        else:
+            return AsyncMySQLDatabase(
+                host=config["host"],
+                port=config["port"],
+                user=config["user"],
+                password=config["password"],
+                timeout=config["timeout"],
+                extract_rows=config["extract_rows"],
+                charset=config["charset"],
+                pool_size=config["async_concurrency"],
+                sample_mode=config["sample_mode"],
+                projection=config["projection"],
+                lob_limit=config["lob_limit"],
+                fetch_batch=config["fetch_batch"],
+                query_timeout=config["query_timeout"]
+            )
+    return ThreadedAsyncDatabase(lambda: create_db_instance(config), config["async_concurrency"])
+
+async def run_async_scan(config: Dict, scanner_kwargs: Dict, on_result,
+                         profiler: Optional[ScanProfiler] = None) -> Tuple[AsyncScanner, List[Dict]]:
+    """异步后端：连接 → 扫描 → 断开，返回扫描器（含失败单元）与结果摘要"""
+    async_db = create_async_db_instance(config)
+    if profiler:
+        profiler.instrument(async_db)
+    try:
+        await async_db.connect()
+        scanner = AsyncScanner(async_db, config["db_type"], config["async_concurrency"], **scanner_kwargs)
+        results = await scanner.run(on_result=on_result)
+        logger.info(f"数据库语句往返：{async_db.round_trips} 次")
+        return scanner, results
+    finally:
+        await async_db.disconnect()
+
+def create_planner(config: Dict) -> Optional[ScanPlanner]:
+    """启用扫描规划（--plan / --time-budget / --plan-only）时创建规划器"""
+    if config["plan"] or config["time_budget"] or config["plan_only"]:
+        return ScanPlanner(config["extract_rows"])
+    return None
+
+def run_plan_only(config: Dict) -> Dict:
+    """只枚举库表并输出扫描规划（行数、大小、预计耗时），不提取数据、不生成结果文件"""
+    db_instance = create_db_instance(config)
+    if not db_instance or not db_instance.connect():
+        raise BaseExtractorError("数据库连接失败，任务终止")
+    try:
+        engine = ScanEngine(db_instance, lambda: create_db_instance(config), config["db_type"], config["workers"],
+                            planner=create_planner(config))
+        planned, empty = engine.plan(engine.enumerate_units())
+        ScanPlanner.log_plan(planned, empty, config["workers"], verbose=True)
+        planned = planned + empty
+        return {"sensitive_tables": 0, "failed_tables": 0, "jsonl_path": None,
+                "planned_tables": len(planned), "estimated_seconds": round(sum(item.est_seconds for item in planned), 3)}
+    finally:
+        db_instance.disconnect()
+
+def run_queue(config: Dict, password: Optional[str]) -> Dict:
+    """分布式扫描：协调端枚举（单个目标或资产清单中的全部目标）并合并结果，工作端领取单元扫描"""
+    queue = WorkQueue(config["queue"], config["lease_seconds"])
+    try:
+        if config["queue_role"] == "worker":
+            return QueueWorker(queue, config, create_db_instance, password).run()
+        if config["inventory"]:
+            # 保留 password_env，工作端据此从本机环境变量读取口令（队列中不保存口令）
+            targets = [dict(build_target_config(config, target, config["output_dir"]),
+                            password_env=target.get("password_env"))
+                       for target in load_inventory(config["inventory"])]
+        else:
+            targets = [dict(config, name=f"{config['db_type']}_{config['host']}_{config['port']}")]
+        return QueueCoordinator(queue, config, targets, create_db_instance, create_planner).run()
+    finally:
+        queue.close()
+
+def start_cprofile() -> Optional[cProfile.Profile]:
+    """在当前线程启用 cProfile；已有其他分析器运行（如资产清单模式下并发的目标）时跳过"""
+    c_profiler = cProfile.Profile()
+    try:
+        c_profiler.enable()
+    except ValueError as e:
+        logger.warning(f"cProfile 启用失败（已有其他分析器在运行），跳过函数级采样：{str(e)}")
+        return None
+    return c_profiler
+
+def run_scan(config: Dict) -> Dict:
+    """对单个数据库目标执行完整扫描流程（连接 → 扫描 → 流式导出），返回任务摘要"""
+    db_instance: Optional[BaseDatabase] = None
+    content_classifier: Optional[ContentClassifier] = None
+    exporter: Optional[StreamingExporter] = None
+    journal: Optional[CheckpointJournal] = None
+    schema_cache: Optional[SchemaCache] = None
+    # 单表熔断器：查询超时的表不再重试，超时/慢表单独汇总
+    circuit_breaker = TableCircuitBreaker(config["slow_table_seconds"])
+    # 性能分析：各阶段埋点（--profile），可选 cProfile 函数级采样（--profile-cprofile）
+    profiler = ScanProfiler(f"{config['db_type']}://{config['host']}:{config['port']}") if config["profile"] else None
+
+    if config["plan_only"]:
+        return run_plan_only(config)
+    c_profiler = start_cprofile() if config["profile_cprofile"] else None
+
+    try:
+        if config["content_scan"]:
+            content_classifier = ContentClassifier(config["content_hit_threshold"], config["content_pool_threshold"])
+            if profiler:
+                profiler.instrument_classifier(content_classifier)
+        # 检查点：记录已完成的表，中断后可通过 --resume 续扫
+        journal = CheckpointJournal(config["output_dir"], config["db_type"], config["host"], config["port"])
+        resumed = config["resume"] and journal.load()
+        # 每个表的结果产生后立即流式写入文件，内存中只保留摘要
+        exporter = StreamingExporter(config["output_dir"], config["export_type"],
+                                     journal.run_timestamp if resumed else None, config["jsonl_compression"],
+                                     config["shard_by"])
+        if resumed:
+            exporter.resume(journal.done_units)
+        journal.start(exporter.timestamp, append=resumed)
+        if profiler:
+            profiler.instrument_exporter(exporter)
+
+        if config["schema_cache"]:
+            schema_cache = SchemaCache(config["schema_cache"], config["db_type"], config["host"], config["port"])
+
+        if config["async_mode"]:
+            # asyncio 后端：单主机在途查询数受信号量约束
+            if config["throttle"]:
+                logger.warning("异步扫描后端不支持自适应限速，在途查询数仅受 --async-concurrency 约束")
+            engine, sensitive_results = asyncio.run(run_async_scan(config, {
+                "content_classifier": content_classifier, "journal": journal,
+                "max_retries": config["retries"], "schema_cache": schema_cache,
+                "planner": create_planner(config), "time_budget": config["time_budget"],
+                "circuit_breaker": circuit_breaker
+            }, exporter.write, profiler))
+        else:
+            # 创建数据库实例 + 连接（启用性能分析时为每个连接加埋点），记录全部实例用于汇总往返次数
+            instances: List[BaseDatabase] = []
+
+            def instance_factory() -> Optional[BaseDatabase]:
+                instance = create_db_instance(config)
+                if instance:
+                    instances.append(instance)
+                return profiler.instrument(instance) if profiler else instance
+
+            db_instance = instance_factory()
+            if not db_instance or not db_instance.connect():
+                raise BaseExtractorError("数据库连接失败，任务终止")
+
+            # 负载自适应限速：独立采样连接（不计入往返统计与性能分析），并发度上限为 workers
+            throttle = AdaptiveThrottle(lambda: create_db_instance(config), config["workers"], config["throttle_max_load"],
+                                        config["throttle_interval"], config["throttle_max_pacing"]) \
+                if config["throttle"] else None
+            # 提取敏感数据（工作线程通过 instance_factory 创建独立连接）
+            engine = ScanEngine(db_instance, instance_factory, config["db_type"], config["workers"],
+                                content_classifier, journal, config["retries"], schema_cache,
+                                create_planner(config), config["time_budget"], circuit_breaker, throttle)
+            sensitive_results = engine.run(on_result=exporter.write)
+            logger.info(f"数据库语句往返：{sum(instance.round_trips for instance in instances)} 次")
+
+        # 导出结果
+        logger.info("\n" + "=" * 50)
+        logger.info(f"数据提取完成！共发现 {exporter.count} 个含敏感数据的表")
+        if engine.failed_units:
+            logger.warning(f"失败表 {len(engine.failed_units)} 个（详见检查点文件 {journal.path}）：")
+            for (db_name, table_name), error in engine.failed_units.items():
+                logger.warning(f"  {db_name}.{table_name}：{error}")
+        circuit_breaker.write_report(config["output_dir"], exporter.timestamp)
+        logger.info("=" * 50)
+
+        if exporter.count:
+            # 控制台打印摘要
+            for idx, result in enumerate(sensitive_results, 1):
+                logger.info(f"\n{idx}. 数据库：{result['数据库名']} → 表：{result['表名']}")
+                logger.info(f"   敏感字段：{result['敏感字段列表']}")
+                logger.info(f"   提取数据：{result['提取数据行数']} 行")
+                content_types = {col: info["detected_type"] for col, info in result.get("内容识别", {}).items()
+                                 if info["detected_type"]}
+                if content_types:
+                    logger.info(f"   内容识别：{content_types}")
+
+            # 关闭流式文件并合并生成最终 JSON
+            exporter.close()
+        else:
+            logger.info("\n未发现任何含敏感数据的表")
+
+        if profiler:
+            profiler.write_reports(config["output_dir"], exporter.timestamp)
+        if c_profiler:
+            c_profiler.disable()
+            pstats_path = os.path.join(config["output_dir"], f"profile_{exporter.timestamp}.pstats")
+            c_profiler.dump_stats(pstats_path)
+            logger.info(f"cProfile 结果已保存：{pstats_path}（可用 python -m pstats 或 snakeviz 查看）")
+
+        return {
+            "sensitive_tables": exporter.count,
+            "failed_tables": len(engine.failed_units),
+            "budget_skipped_tables": len(engine.budget_skipped),
+            "circuit_open_tables": len(circuit_breaker.tripped),
+            "jsonl_path": exporter.jsonl_path if exporter.count else None,
+        }
+    finally:
+        # 清理资源
+        if c_profiler:
+            c_profiler.disable()
+        if db_instance:
+            db_instance.disconnect()
+        if content_classifier:
+            content_classifier.close()
+        if journal:
+            journal.close()
+        if schema_cache:
+            schema_cache.close()
+        # 任务异常中断时也落盘已完成的表结果
+        if exporter:
+            try:
+                exporter.close()
+            except BaseExtractorError:
+                pass
+
 def main():
     start_time = time.time()
     
     # 关键修改：初始化变量
-    db_instance: Optional[BaseDatabase] = None
     proxy_set = False  # 标记是否设置了代理
     
     try:
@@ -134,63 +505,15 @@ def main():
             set_proxy(config["proxy"])
             proxy_set = True
 
-        # 3. 创建数据库实例 + 连接
-        db_instance = create_db_instance(config)
-        if not db_instance or not db_instance.connect():
-            raise BaseExtractorError("数据库连接失败，任务终止")
-
-        # 4. 提取敏感数据
-        sensitive_results = []
-        databases = db_instance.list_databases()
-        logger.info(f"\n共发现 {len(databases)} 个非系统数据库")
-
-        for db_name in databases:
-            logger.info(f"\n--- 开始处理数据库：{db_name} ---")
-            tables = db_instance.list_tables(db_name)
-            logger.info(f"数据库 {db_name} 包含 {len(tables)} 个表")
-
-            for table_name in tables:
-                # 获取字段信息，判断是否含敏感字段
-                columns = db_instance.list_columns(db_name, table_name)
-                sensitive_cols = [col for col in columns if col["is_sensitive"]]
-                if not sensitive_cols:
-                    logger.info(f"  表 {table_name}：无敏感字段，跳过")
-                    continue
-
-                # 提取表数据
-                logger.info(f"  表 {table_name}：发现 {len(sensitive_cols)} 个敏感字段 → 提取前 {config['extract_rows']} 行数据")
-                rows = db_instance.query_top_rows(db_name, table_name)
-
-                # 整理结果
-                sensitive_results.append({
-                    "数据库类型": config["db_type"],
-                    "数据库名": db_name,
-                    "表名": table_name,
-                    "敏感字段数": len(sensitive_cols),
-                    "敏感字段列表": [col["column_name"] for col in sensitive_cols],
-                    "敏感字段详情": columns,
-                    "提取数据行数": len(rows),
-                    "提取时间": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
-                    "rows": rows
-                })
-
-        # 5. 导出结果
-        logger.info("\n" + "=" * 50)
-        logger.info(f"数据提取完成！共发现 {len(sensitive_results)} 个含敏感数据的表")
-        logger.info("=" * 50)
-
-        if sensitive_results:
-            # 控制台打印摘要
-            for idx, result in enumerate(sensitive_results, 1):
-                logger.info(f"\n{idx}. 数据库：{result['数据库名']} → 表：{result['表名']}")
-                logger.info(f"   敏感字段：{result['敏感字段列表']}")
-                logger.info(f"   提取数据：{result['提取数据行数']} 行")
-
-            # 导出文件
-            exporter = ResultExporter(config["output_dir"])
-            exporter.export(sensitive_results, config["export_type"])
+        # 3. 执行扫描：分布式模式下作为协调端/工作端运行，资产清单模式下并发扫描多个目标，否则扫描单个目标
+        if config["queue"]:
+            run_queue(config, args.password or os.getenv("DB_PASSWORD"))
+        elif config["inventory"]:
+            targets = load_inventory(config["inventory"])
+            runner = FleetRunner(config, targets, run_scan, config["fleet_concurrency"], config["per_host_concurrency"])
+            runner.run()
         else:
-            logger.info("\n未发现任何含敏感数据的表")
+            run_scan(config)
 
         # 6. 统计耗时
         end_time = time.time()
@@ -203,10 +526,6 @@ def main():
         logger.error(f"\n任务执行异常：{str(e)}", exc_info=True)
         sys.exit(1)
     finally:
-        # 清理资源（db_instance 已初始化，不会报错）
-        if db_instance:
-            db_instance.disconnect()
-        
         # 只在实际设置了代理时才清理代理
         if proxy_set:
             clear_proxy()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入仓库内的模块（与 benchmarks 一致，不依赖安装）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+"""异步扫描：连接池中的多个实例共享字段目录，并发取目录时整个实例（或每个库）只加载一次"""
+import asyncio
+import threading
+import pytest
+from benchmarks.synthetic_db import CatalogShape, SyntheticDatabase
+from db.async_base_db import ThreadedAsyncDatabase
+
+SHAPE = CatalogShape(databases=3, tables_per_db=6, columns_per_table=10, sensitive_ratio=0.5)
+
+
+class CountingDatabase(SyntheticDatabase):
+    """记录 load_catalog 的调用范围"""
+
+    loads = []
+    lock = threading.Lock()
+
+    def load_catalog(self, db_name=None):
+        with self.lock:
+            self.loads.append(db_name)
+        super().load_catalog(db_name)
+
+
+async def gather_columns(catalog_mode: str):
+    CountingDatabase.loads = []
+    db = ThreadedAsyncDatabase(lambda: CountingDatabase(SHAPE, latency=0.01, catalog_mode=catalog_mode), pool_size=4)
+    await db.connect()
+    try:
+        databases = await db.list_databases()
+        tables = await asyncio.gather(*(db.list_tables(db_name) for db_name in databases))
+        units = [(db_name, table_name) for db_name, names in zip(databases, tables) for table_name in names]
+        columns = await asyncio.gather(*(db.list_columns(db_name, table_name) for db_name, table_name in units))
+        return dict(zip(units, columns)), len(db._instances)
+    finally:
+        await db.disconnect()
+
+
+@pytest.mark.parametrize("catalog_mode,expected_loads", [("instance", [None]), ("schema", None)])
+def test_pooled_catalog_loads_once(catalog_mode, expected_loads):
+    columns, pool = asyncio.run(gather_columns(catalog_mode))
+    assert pool > 1
+    reference = SyntheticDatabase(SHAPE, catalog_mode="table")
+    for (db_name, table_name), table_columns in columns.items():
+        # 并发加载会把字段重复追加到共享目录
+        assert table_columns == reference.list_columns(db_name, table_name)
+    loads = CountingDatabase.loads
+    if expected_loads is not None:
+        assert loads == expected_loads
+    else:
+        assert sorted(loads) == sorted({db_name for db_name, _ in columns})
@@ -0,0 +1,72 @@
+"""检查点续扫：中断后从检查点恢复，已完成的表不再扫描，失败的表在续扫时重试，结果不重复、不遗漏"""
+import pytest
+from benchmarks.synthetic_db import CatalogShape, SyntheticDatabase
+from common.checkpoint import CheckpointJournal
+from common.scan_engine import ScanEngine
+
+SHAPE = CatalogShape(databases=2, tables_per_db=10, columns_per_table=8, sensitive_ratio=0.7)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FlakyDatabase(SyntheticDatabase):
+    """指定的表读取失败（模拟网络抖动），healthy 为 True 后恢复"""
+
+    broken = set()
+
+    def iter_top_rows(self, db_name, table_name, columns=None):
+        if (db_name, table_name) in self.broken:
+            raise ConnectionError("connection reset")
+        return super().iter_top_rows(db_name, table_name, columns)
+
+
+def new_journal(output_dir) -> CheckpointJournal:
+    return CheckpointJournal(str(output_dir), "mysql", "synthetic", 0)
+
+
+def run(journal, on_result, workers=1):
+    engine = ScanEngine(FlakyDatabase(SHAPE), lambda: FlakyDatabase(SHAPE), "mysql", workers, journal=journal)
+    return engine, engine.run(on_result=on_result)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_skips_done_and_retries_failed(tmp_path, workers):
+    reference = [(item["数据库名"], item["表名"]) for item in ScanEngine(
+        SyntheticDatabase(SHAPE), lambda: SyntheticDatabase(SHAPE), "mysql").run()]
+    assert len(reference) > 6
+    FlakyDatabase.broken = {reference[1]}
+
+    exported = []
+
+    def interrupt_after_five(item):
+        if len(exported) == 5:
+            raise Interrupted()
+        exported.append((item["数据库名"], item["表名"]))
+
+    journal = new_journal(tmp_path)
+    journal.start("20260101_000000")
+    with pytest.raises(Interrupted):
+        run(journal, interrupt_after_five, workers)
+    journal.close()
+
+    resumed = new_journal(tmp_path)
+    assert resumed.load()
+    assert resumed.run_timestamp == "20260101_000000"
+    assert reference[1] in resumed.failed_units
+    assert set(exported) <= resumed.done_units
+
+    # 续扫：网络恢复，失败的表被重试，已完成的表不再扫描
+    FlakyDatabase.broken = set()
+    resumed.start(resumed.run_timestamp, append=True)
+    engine, _ = run(resumed, lambda item: exported.append((item["数据库名"], item["表名"])), workers)
+    resumed.close()
+
+    assert not engine.failed_units
+    assert len(exported) == len(set(exported))
+    assert sorted(exported) == sorted(reference)
+
+    final = new_journal(tmp_path)
+    assert final.load() and not final.failed_units
+    assert set(reference) <= final.done_units
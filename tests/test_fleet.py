@@ -0,0 +1,57 @@
+"""资产清单：CSV / JSON 中的扫描参数按 TARGET_OVERRIDABLE_KEYS 的类型转换，无效值在加载时报错"""
+import json
+import pytest
+from common.exception_handler import BaseExtractorError
+from common.fleet import build_target_config, load_inventory
+from config.default_config import COMMON_CONFIG
+
+
+def write_csv(tmp_path, header: str, *rows: str) -> str:
+    path = tmp_path / "inventory.csv"
+    path.write_text("\n".join((header,) + rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_csv_values_are_coerced(tmp_path):
+    path = write_csv(tmp_path, "db_type,host,throttle,throttle_max_load,workers,projection,catalog_mode",
+                     "MySQL,10.0.0.1,Yes,12.5,4,false,schema",
+                     "oracle,10.0.0.2,,8,,,")
+    first, second = load_inventory(path)
+    assert first["db_type"] == "mysql"
+    assert first["throttle"] is True and first["projection"] is False
+    assert first["throttle_max_load"] == 12.5 and first["workers"] == 4
+    assert first["catalog_mode"] == "schema"
+    # 空单元格视为未配置，整数写法的浮点参数同样转换为 float
+    assert "throttle" not in second and "workers" not in second
+    assert second["throttle_max_load"] == 8.0 and isinstance(second["throttle_max_load"], float)
+
+
+def test_coerced_values_reach_target_config(tmp_path):
+    path = write_csv(tmp_path, "db_type,host,throttle,throttle_max_load", "mysql,10.0.0.1,true,12.5")
+    config = build_target_config(dict(COMMON_CONFIG), load_inventory(path)[0], str(tmp_path))
+    assert config["throttle"] is True
+    assert config["throttle_max_load"] == 12.5
+    # 负载比较在限速线程中进行，转换后的值必须可与数值比较
+    assert config["throttle_max_load"] <= 16.0
+
+
+@pytest.mark.parametrize("column,value", [
+    ("throttle_max_load", "lots"),
+    ("workers", "4.5"),
+    ("throttle", "maybe"),
+    ("timeout", "abc"),
+])
+def test_invalid_csv_values_are_rejected(tmp_path, column, value):
+    path = write_csv(tmp_path, f"db_type,host,{column}", f"mysql,10.0.0.1,{value}")
+    with pytest.raises(BaseExtractorError, match=f"第 1 个目标的 {column} 无效"):
+        load_inventory(path)
+
+
+def test_json_rejects_bool_for_numeric(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps({"targets": [
+        {"db_type": "mysql", "host": "10.0.0.1", "workers": 2, "throttle_max_load": 4},
+        {"db_type": "mysql", "host": "10.0.0.2", "workers": True},
+    ]}), encoding="utf-8")
+    with pytest.raises(BaseExtractorError, match="第 2 个目标的 workers 无效"):
+        load_inventory(str(path))